@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Build a keyness reference list
+Counts lemmas of a reference corpus (or reads a ready lemma frequency list)
+once, offline, and writes the binary list that the app's keyness comparison
+loads from data/reference/. Corpus files are read chunk by chunk; counts
+beyond the memory budget are spilled to disk as sorted runs and merged
+exactly at the end; the merged counts are written straight into the list
+file, collecting the top-K on the way.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+
+# Make src/ modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import count_chunk_lemmas
+from text_input_handler import iter_input_documents
+from keyness import write_reference_list, REFERENCE_DIR
+from external_counts import SpillingCounter, TopCounts, DEFAULT_MEMORY_BUDGET
+from atomic_files import atomic_open
+
+
+def count_frequency_list(path, counts):
+    """
+    Add counts from a lemma frequency list
+
+    Accepts "lemma count" lines (tab or space separated) or a CSV exported
+    by the app (columns Лемма and Частота).
+
+    Args:
+        path: Frequency list file
+        counts: SpillingCounter to update
+    """
+    with open(path, encoding='utf-8-sig') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                counts.add(row['Лемма'], int(row['Частота']))
+            return
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2 and not line.startswith('#') and fields[1].isdigit():
+                counts.add(fields[0].lower(), int(fields[1]))
+
+
+def count_corpus_file(path, lang_code, counts, form_cache):
+    """
+    Lemmatize a corpus file (.txt, .pdf, .docx or an archive of them) and
+    add its lemma counts
+
+    The file is read chunk by chunk (archives member by member, each
+    member being one document), so only one chunk's tokens are in memory.
+
+    Args:
+        path: Corpus file
+        lang_code: Language code ('ru', 'be' or 'auto')
+        counts: SpillingCounter to update
+        form_cache: Form -> lemma cache shared by the files of a run
+                    (see analysis_pipeline.count_chunk_lemmas)
+
+    Returns:
+        int: Number of tokens in the file
+    """
+    tokens = 0
+    with open(path, 'rb') as f:
+        for _, chunks in iter_input_documents(f, os.path.basename(path)):
+            tokens += count_chunk_lemmas(chunks, lang_code, counts, form_cache)
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a binary reference frequency list for keyness comparison")
+    parser.add_argument("--corpus", nargs="*", default=[], help="Corpus files (.txt, .pdf, .docx or archives of them) to lemmatize")
+    parser.add_argument("--freq-list", nargs="*", default=[],
+                        help="Lemma frequency lists (\"lemma count\" per line or a CSV exported by the app)")
+    parser.add_argument("--language", choices=("ru", "be", "auto"), default="auto",
+                        help="Language of the corpus files")
+    parser.add_argument("--name", required=True, help="Reference list name shown in the app")
+    parser.add_argument("--min-count", type=int, default=1, help="Drop lemmas seen fewer times than this")
+    parser.add_argument("--output", help="Output file (default: data/reference/<name>.npz)")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Memory budget of the lemma counts; larger vocabularies are counted on disk")
+    parser.add_argument("--top", type=int, default=0, help="Print the N most frequent lemmas")
+    args = parser.parse_args()
+
+    if not args.corpus and not args.freq_list:
+        parser.error("give at least one --corpus or --freq-list file")
+
+    print("=" * 70)
+    print("Keyness Reference List Builder")
+    print("=" * 70)
+    print()
+
+    start = time.time()
+    form_cache = {}
+    with SpillingCounter(args.memory_mb * 1024 * 1024) as counts:
+        for path in args.freq_list:
+            count_frequency_list(path, counts)
+            print(f"✅ Read frequency list {path}")
+        for path in args.corpus:
+            tokens = count_corpus_file(path, args.language, counts, form_cache)
+            print(f"✅ Lemmatized {path}: {tokens:,} tokens")
+        if counts.spilled:
+            print(f"💾 Counts exceeded {args.memory_mb} MB: merging {counts.spills} sorted runs from disk")
+
+        output_path = Path(args.output or os.path.join(REFERENCE_DIR, f"{args.name}.npz"))
+        top = TopCounts(args.top)
+
+        def kept_counts():
+            for lemma, count in counts.items():
+                if count >= args.min_count:
+                    top.add(lemma, count)
+                    yield lemma, count
+
+        with atomic_open(output_path) as f:
+            num_lemmas, tokens = write_reference_list(
+                f, kept_counts(), args.name, language=args.language,
+                sources=[os.path.basename(p) for p in args.freq_list + args.corpus]
+            )
+
+    print(f"📊 {num_lemmas:,} lemmas, {tokens:,} tokens ({time.time() - start:.1f}s)")
+    for lemma, count in top.result():
+        print(f"   {count:>12,}  {lemma}")
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"✅ Created: {output_path} ({size_kb:.0f} KB)")
+    print()
+    print("The list appears under \"Эталонный корпус\" in the keyness section of the app.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Build the Russian hot-vocabulary table
+Lemmatizes the most frequent word forms with pymorphy3 once, offline, and
+writes a compact form -> lemma and part-of-speech table that ru_support
+loads at startup
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# Make src/ modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import tokenize_text
+from text_input_handler import read_file_content, NamedBytesIO
+from ru_support import (
+    get_russian_analyzer, get_dictionary_version, parse_russian, save_hot_vocabulary, HOT_VOCABULARY_PATH
+)
+
+
+def count_frequency_list(path, counts):
+    """
+    Add counts from a frequency list
+
+    Each line is "form count" (tab or space separated) or just "form";
+    lists without counts are taken to be in rank order.
+
+    Args:
+        path: Frequency list file
+        counts: Counter to update
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = [line.split() for line in f if line.strip() and not line.startswith('#')]
+
+    for rank, fields in enumerate(lines):
+        count = int(fields[1]) if len(fields) > 1 and fields[1].isdigit() else len(lines) - rank
+        # Normalize the same way the app tokenizes text
+        for form in tokenize_text(fields[0]):
+            counts[form] += count
+
+
+def count_corpus_file(path, counts):
+    """
+    Add token counts from a corpus file (.txt, .pdf or .docx)
+
+    Args:
+        path: Corpus file
+        counts: Counter to update
+    """
+    text = read_file_content(NamedBytesIO(Path(path).read_bytes(), os.path.basename(path)))
+    counts.update(tokenize_text(text))
+
+
+def build_hot_vocabulary(counts, top_n):
+    """
+    Lemmatize the top_n most frequent forms with pymorphy3
+
+    Args:
+        counts: Counter of word form frequencies
+        top_n: Number of forms to keep
+
+    Returns:
+        tuple: (form_entries, coverage) - form -> (lemma, pos) table in
+               frequency order and the share of counted tokens it covers
+    """
+    morph = get_russian_analyzer()
+    top_forms = counts.most_common(top_n)
+    form_entries = {form: parse_russian(morph, form) for form, _ in top_forms}
+
+    total = sum(counts.values())
+    coverage = sum(count for _, count in top_forms) / total if total else 0.0
+    return form_entries, coverage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Russian hot-vocabulary lemma table")
+    parser.add_argument("--freq-list", nargs="*", default=[],
+                        help="Frequency list files (\"form count\" or one form per line in rank order)")
+    parser.add_argument("--corpus", nargs="*", default=[],
+                        help="Corpus files (.txt, .pdf, .docx) to count forms in")
+    parser.add_argument("--top", type=int, default=50000, help="Number of most frequent forms to keep")
+    parser.add_argument("--output", default=HOT_VOCABULARY_PATH, help="Output table (.tsv.gz)")
+    args = parser.parse_args()
+
+    if not args.freq_list and not args.corpus:
+        parser.error("give at least one --freq-list or --corpus file")
+
+    print("=" * 70)
+    print("Russian Hot Vocabulary Builder")
+    print("=" * 70)
+    print()
+
+    counts = Counter()
+    for path in args.freq_list:
+        count_frequency_list(path, counts)
+        print(f"✅ Read frequency list {path}")
+    for path in args.corpus:
+        count_corpus_file(path, counts)
+        print(f"✅ Counted corpus file {path}")
+    print(f"📊 Distinct forms: {len(counts):,}, tokens: {sum(counts.values()):,}")
+
+    start = time.time()
+    form_entries, coverage = build_hot_vocabulary(counts, args.top)
+    version = get_dictionary_version(get_russian_analyzer())
+    print(f"⚙️ Lemmatized {len(form_entries):,} forms in {time.time() - start:.1f}s")
+    print(f"📊 Token coverage of the counted data: {coverage * 100:.1f}%")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    save_hot_vocabulary(output_path, form_entries, version)
+
+    size_kb = output_path.stat().st_size / 1024
+    print(f"✅ Created: {output_path} ({size_kb:.0f} KB)")
+    print(f"   Dictionary: {version}")
+    print()
+    print("The table is used automatically on the next app start.")
+    print("Rebuild it after upgrading pymorphy3 or its dictionary (an outdated table is ignored).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Export the lemmatized token stream of a document
+Writes every token with its lemma, character offsets and the lemmatizer
+that produced the lemma as CoNLL-U or JSONL, chunk by chunk, for
+downstream corpus tools
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Make src/ modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import analyze_text, get_default_stop_words
+from text_input_handler import read_file_content, NamedBytesIO
+from token_export import TOKEN_EXPORT_FORMATS, write_token_export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export tokens with lemmas as CoNLL-U or JSONL")
+    parser.add_argument("input", help="Document (.txt, .pdf, .docx or a compressed .txt)")
+    parser.add_argument("--language", choices=("ru", "be", "auto"), default="auto", help="Document language")
+    parser.add_argument("--format", choices=list(TOKEN_EXPORT_FORMATS), default="conllu", help="Output format")
+    parser.add_argument("--no-stop-words", action="store_true", help="Do not mark default stop words")
+    parser.add_argument("--output", help="Output file (default: <input>.<format extension>)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Token Stream Export")
+    print("=" * 70)
+    print()
+
+    start = time.time()
+    name = os.path.basename(args.input)
+    text = read_file_content(NamedBytesIO(Path(args.input).read_bytes(), name))
+    stop_words = set() if args.no_stop_words else get_default_stop_words(args.language)
+    analysis = analyze_text(text, args.language, stop_words)
+    print(f"✅ Lemmatized {args.input}: {analysis['total_words']:,} tokens ({time.time() - start:.1f}s)")
+
+    output_path = args.output or f"{args.input}.{TOKEN_EXPORT_FORMATS[args.format][2]}"
+    start = time.time()
+    written = write_token_export(output_path, text, analysis, args.language, args.format, doc_id=name)
+    print(f"✅ Created: {output_path} ({written / (1024 * 1024):.1f} MB, {time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Concurrent multi-session load test
+Simulates N Streamlit sessions running the full analysis pipeline
+(tokenize, lemmatize, count) on the shared lemmatizers at the same time and
+reports latency percentiles and throughput for each concurrency level.
+
+Every result is compared with a single-threaded reference run, and the
+per-request Belarusian lemmatizer counters are checked against the
+process-wide totals, so races in shared state show up as failures.
+
+Usage:
+    python scripts/load_test.py --texts sample_text.txt --language auto --concurrency 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Make src/ modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import analyze_text, get_default_stop_words
+from text_input_handler import read_file_content, NamedBytesIO
+from belarusian.be_support import get_belarusian_analyzer, USE_ENHANCED
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of a sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def summarize(analysis):
+    """Comparable summary of an analysis result"""
+    return analysis['total_words'], analysis['freq_table'].top(50)
+
+
+def run_level(texts, lang_code, stop_words, concurrency, requests, references):
+    """
+    Run one concurrency level
+
+    Args:
+        texts: List of texts; session i starts with text i and cycles through them
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words
+        concurrency: Number of simultaneous sessions
+        requests: Analyses per session
+        references: Single-threaded summaries aligned with texts
+
+    Returns:
+        dict: Latencies, wall time, word count, mismatches, errors and
+              summed per-request lemmatizer counters
+    """
+    latencies = []
+    words = []
+    mismatches = []
+    errors = []
+    request_stats = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def session(session_id):
+        barrier.wait()
+        for i in range(requests):
+            index = (session_id + i) % len(texts)
+            start = time.perf_counter()
+            try:
+                analysis = analyze_text(texts[index], lang_code, stop_words)
+            except Exception as e:
+                with lock:
+                    errors.append(f"session {session_id}: {e}")
+                continue
+            latency = time.perf_counter() - start
+
+            with lock:
+                latencies.append(latency)
+                words.append(analysis['total_words'])
+                if summarize(analysis) != references[index]:
+                    mismatches.append((session_id, index))
+                for key, value in analysis['lemmatizer_stats'].items():
+                    request_stats[key] = request_stats.get(key, 0) + value
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    return {
+        'latencies': sorted(latencies),
+        'wall_time': wall_time,
+        'words': sum(words),
+        'mismatches': mismatches,
+        'errors': errors,
+        'request_stats': request_stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-session load test of the analysis pipeline")
+    parser.add_argument("--texts", nargs="*", default=["sample_text.txt"],
+                        help="Input files (.txt, .pdf, .docx); sessions cycle through them")
+    parser.add_argument("--language", choices=("ru", "be", "auto"), default="auto", help="Analysis language")
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 2, 4, 8],
+                        help="Numbers of simultaneous sessions to test")
+    parser.add_argument("--requests", type=int, default=20, help="Analyses per session")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Repeat each text this many times (larger documents)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Text Analyzer Load Test")
+    print("=" * 70)
+    print()
+
+    texts = []
+    for path in args.texts:
+        text = read_file_content(NamedBytesIO(Path(path).read_bytes(), os.path.basename(path)))
+        texts.append("\n".join([text] * args.repeat))
+    stop_words = get_default_stop_words(args.language)
+
+    # Warm up the shared lemmatizers, then take single-threaded references
+    print("🔄 Loading lemmatizers and computing reference results...")
+    analyzer = get_belarusian_analyzer()
+    references = [summarize(analyze_text(text, args.language, stop_words)) for text in texts]
+    print(f"📄 {len(texts)} text(s), {sum(ref[0] for ref in references):,} words, language: {args.language}")
+    print(f"⚙️ Belarusian lemmatizer: {'enhanced' if USE_ENHANCED else 'basic'}")
+    print()
+
+    print(f"{'sessions':>8} {'requests':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'req/s':>8} {'words/s':>10}")
+    failed = False
+    for concurrency in args.concurrency:
+        if USE_ENHANCED:
+            analyzer.reset_stats()
+        level = run_level(texts, args.language, stop_words, concurrency, args.requests, references)
+
+        latencies = level['latencies']
+        wall_time = max(level['wall_time'], 1e-9)
+        print(f"{concurrency:>8} {len(latencies):>9} "
+              f"{percentile(latencies, 50) * 1000:>9.1f} "
+              f"{percentile(latencies, 95) * 1000:>9.1f} "
+              f"{percentile(latencies, 99) * 1000:>9.1f} "
+              f"{len(latencies) / wall_time:>8.1f} "
+              f"{level['words'] / wall_time:>10.0f}")
+
+        for error in level['errors'][:5]:
+            print(f"   ❌ {error}")
+        if level['mismatches']:
+            print(f"   ❌ {len(level['mismatches'])} results differ from the single-threaded reference")
+        if USE_ENHANCED:
+            totals = analyzer.get_performance_stats()
+            if totals['total_words'] != level['request_stats'].get('total_words', 0):
+                print(f"   ❌ Lemmatizer counters: {totals['total_words']:,} process-wide vs "
+                      f"{level['request_stats'].get('total_words', 0):,} summed over requests")
+                failed = True
+        failed = failed or bool(level['errors']) or bool(level['mismatches'])
+
+    print()
+    if failed:
+        print("❌ Load test found errors")
+        sys.exit(1)
+    print("✅ All results match the reference and lemmatizer counters are consistent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Query the analysis results store
+Adds documents to the local SQLite store of lemma counts and answers
+cross-document lemma queries: total frequency and the documents that
+mention a lemma most, optionally limited to recent analyses
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Make src/ modules importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import analyze_text
+from text_input_handler import read_file_content, NamedBytesIO
+from results_store import STORE_PATH, DOCUMENT_ORDERS, ResultsStore, normalize_query, format_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store analyses and query lemma frequencies across documents")
+    parser.add_argument("--db", default=STORE_PATH, help="Results store database")
+    parser.add_argument("--add", nargs="+", metavar="FILE", help="Analyze documents and store their lemma counts")
+    parser.add_argument("--language", choices=("ru", "be", "auto"),
+                        help="Language of added documents (default: auto); also filters --lemma and --list")
+    parser.add_argument("--lemma", help="Lemma to query")
+    parser.add_argument("--top", type=int, default=20, help="Number of documents to show")
+    parser.add_argument("--days", type=float, help="Only documents analyzed in the last N days")
+    parser.add_argument("--order", choices=list(DOCUMENT_ORDERS), default="count",
+                        help="Rank documents by count or by frequency per million words")
+    parser.add_argument("--list", action="store_true", help="List stored documents")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Analysis Results Store")
+    print("=" * 70)
+    print()
+
+    store = ResultsStore(args.db)
+
+    for path in args.add or []:
+        start = time.time()
+        name = os.path.basename(path)
+        text = read_file_content(NamedBytesIO(Path(path).read_bytes(), name))
+        analysis = analyze_text(text, args.language or "auto", set())
+        store.save_analysis(analysis, name, args.language or "auto")
+        print(f"✅ Stored {name}: {analysis['total_words']:,} words ({time.time() - start:.1f}s)")
+
+    stats = store.stats()
+    print(f"📊 {args.db}: {stats['documents']:,} documents, {stats['total_words']:,} words, "
+          f"{stats['lemmas']:,} lemmas")
+
+    since = time.time() - args.days * 86400 if args.days else None
+
+    if args.list:
+        print()
+        for document_id, name, doc_language, analyzed_at, total_words, unique_lemmas in store.list_documents(
+            since, args.language, args.top
+        ):
+            print(f"  #{document_id:<6} {format_time(analyzed_at)}  {doc_language:<4} "
+                  f"{total_words:>10,} words  {unique_lemmas:>8,} lemmas  {name}")
+
+    if args.lemma:
+        lemma = normalize_query(args.lemma)
+        start = time.perf_counter()
+        frequency = store.lemma_frequency(lemma, since, args.language)
+        rows = store.top_documents(lemma, args.top, since, args.language, args.order)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        print()
+        print(f"🔎 {lemma}: {frequency['count']:,} occurrences in {frequency['documents']:,} "
+              f"of {frequency['total_documents']:,} documents ({elapsed:.1f} ms)")
+        for document_id, name, analyzed_at, count, total_words, ipm in rows:
+            print(f"  #{document_id:<6} {format_time(analyzed_at)}  {count:>8,}  {ipm:>10.1f} ipm  {name}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
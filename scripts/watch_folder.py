@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Watch a directory and keep its lemma frequencies up to date
+Polls the directory, analyzes only new or changed files, subtracts
+removed ones and can publish the corpus totals as a keyness reference
+list (see src/watch_folder.py for the incremental state)
+
+Usage:
+    python scripts/watch_folder.py incoming/ --language auto --interval 10
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Make src/ modules importable (ahead of this script's own directory)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from analysis_pipeline import get_default_stop_words
+from atomic_files import atomic_open
+from external_counts import DEFAULT_MEMORY_BUDGET
+from keyness import REFERENCE_DIR
+from watch_folder import WatchFolder, STATE_ROOT
+
+
+def warm_up(lang_code):
+    """Load the lemmatizers once, before the first batch"""
+    if lang_code in ("ru", "auto"):
+        from ru_support import get_russian_analyzer
+        get_russian_analyzer()
+    if lang_code in ("be", "auto"):
+        from belarusian.be_support import get_belarusian_analyzer
+        get_belarusian_analyzer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep lemma frequencies of a directory up to date")
+    parser.add_argument("directory", help="Directory to watch (scanned recursively)")
+    parser.add_argument("--language", choices=("ru", "be", "auto"), default="auto", help="Document language")
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between polls (default: 10)")
+    parser.add_argument("--state-dir", help="State directory (default: data/watch/<directory name>)")
+    parser.add_argument("--reference-name",
+                        help="Also publish the aggregate as data/reference/<name>.npz for keyness comparison")
+    parser.add_argument("--top", type=int, default=10, help="Lemmas shown after each update (default: 10)")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        help="Memory budget of the lemma counts; larger vocabularies are counted on disk")
+    parser.add_argument("--once", action="store_true", help="Poll once and exit")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    state_dir = args.state_dir or os.path.join(STATE_ROOT, os.path.basename(os.path.abspath(args.directory)))
+
+    print("=" * 70)
+    print("Watch Folder")
+    print("=" * 70)
+    print()
+    print("🔄 Loading lemmatizers...")
+    warm_up(args.language)
+    watcher = WatchFolder(args.directory, state_dir, args.language, memory_budget=args.memory_mb * 1024 * 1024)
+    stop_words = get_default_stop_words(args.language)
+    print(f"✅ Watching {args.directory} ({len(watcher.files):,} known files, state in {state_dir})")
+
+    try:
+        while True:
+            started = time.perf_counter()
+            changes = watcher.poll()
+            for kind, icon in (('added', "➕"), ('changed', "✏️"), ('removed', "➖")):
+                for rel in changes[kind]:
+                    seconds = changes['seconds'].get(rel)
+                    timing = f" ({seconds * 1000:.0f} ms)" if seconds is not None else ""
+                    failed = " ⚠️ " + watcher.files[rel]['error'] if rel in changes['failed'] else ""
+                    print(f"{icon} {rel}{timing}{failed}")
+
+            if changes['added'] or changes['changed'] or changes['removed']:
+                print(f"📊 {len(watcher.files):,} files, {watcher.tokens:,} tokens, {watcher.num_lemmas:,} lemmas "
+                      f"(update {time.perf_counter() - started:.2f}s)")
+                if args.top:
+                    print("   " + ", ".join(f"{lemma} {count:,}" for lemma, count in watcher.top(args.top, stop_words)))
+                if args.reference_name:
+                    target = os.path.join(REFERENCE_DIR, f"{args.reference_name}.npz")
+                    with atomic_open(target) as f:
+                        watcher.write_aggregate(f, args.reference_name, language=args.language,
+                                                sources=[os.path.abspath(args.directory)])
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping watcher...")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+Background Analysis Jobs
+Runs analysis of large texts in a background thread, chunk by chunk,
+with progress reporting, cancellation and partial top-K results.
+Jobs live in a process-wide manager, so they survive Streamlit reruns.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from analysis_pipeline import tokenize_text, lemmatize_words, count_lemmas
+from language_detection import detect_language, route_tokens
+from ru_support import lemmatize_russian
+from belarusian.be_support import lemmatize_belarusian
+from text_input_handler import iter_file_chunks, split_text_chunks
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+STATUS_LABELS = {
+    QUEUED: "⏳ В очереди",
+    RUNNING: "⚙️ Выполняется",
+    DONE: "✅ Готово",
+    CANCELLED: "🛑 Отменено",
+    FAILED: "❌ Ошибка"
+}
+
+# Refresh interval of the progress view while a job is running (seconds)
+REFRESH_INTERVAL = 1.0
+
+
+class AnalysisJob:
+    """
+    One background analysis of a text or file
+
+    Progress fields and partial counts are updated by the worker thread
+    under self.lock; readers take snapshots through progress() and
+    partial_top().
+    """
+
+    def __init__(self, key, source_name, lang_code, stop_words, data=None, text=None):
+        """
+        Initialize job
+
+        Args:
+            key: Identity of the input (hash, language, stop words)
+            source_name: File name or description of the source
+            lang_code: Language code ('ru', 'be' or 'auto')
+            stop_words: Set of stop words to exclude from counts
+            data: Raw file bytes (for uploaded files)
+            text: Text to analyze (for direct input)
+        """
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.source_name = source_name
+        self.lang_code = lang_code
+        self.stop_words = stop_words
+        self.data = data
+        self.text = text
+
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.status = QUEUED
+        self.error = None
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.tokens = 0
+        self.started = None
+        self.finished = None
+        self.preview = ""
+        self.partial_counts = Counter()
+        self.result = None
+
+    @property
+    def is_pdf(self):
+        """True if progress is counted in PDF pages"""
+        return self.data is not None and self.source_name.split('.')[-1].lower() == 'pdf'
+
+    def cancel(self):
+        """Request cancellation; the job stops after the current chunk"""
+        self.cancel_event.set()
+
+    def _iter_chunks(self):
+        """Yield (chunk_text, total_chunks) from the file bytes or the text"""
+        if self.data is not None:
+            yield from iter_file_chunks(self.data, self.source_name)
+        else:
+            chunks = split_text_chunks(self.text)
+            for chunk in chunks:
+                yield chunk, len(chunks)
+
+    def run(self):
+        """Process the input chunk by chunk (called in a worker thread)"""
+        with self.lock:
+            self.status = RUNNING
+            self.started = time.time()
+
+        words = []
+        lemmas = []
+        form_to_lemma = {}
+        form_tags = {}
+        belarusian_forms = set()
+        be_tokens = 0
+        lemmatizer_stats = {}
+        document_language, confidence = None, 0.0
+
+        try:
+            for chunk, total in self._iter_chunks():
+                if self.cancel_event.is_set():
+                    break
+
+                chunk_words = tokenize_text(chunk)
+
+                # Lemmatize only forms not seen in earlier chunks
+                new_forms = [form for form in dict.fromkeys(chunk_words) if form not in form_to_lemma]
+                if self.lang_code == "auto":
+                    if document_language is None and chunk_words:
+                        # The first non-empty chunk decides the document language
+                        document_language, confidence = detect_language(chunk)
+                    routes = route_tokens(new_forms, document_language or "ru")
+                    form_to_lemma.update(zip(routes['ru'], lemmatize_russian(routes['ru'], form_tags)))
+                    form_to_lemma.update(zip(
+                        routes['be'], lemmatize_belarusian(routes['be'], lemmatizer_stats, form_tags)
+                    ))
+                    belarusian_forms.update(routes['be'])
+                    be_tokens += sum(1 for word in chunk_words if word in belarusian_forms)
+                else:
+                    form_to_lemma.update(zip(
+                        new_forms, lemmatize_words(new_forms, self.lang_code, stats=lemmatizer_stats, tags=form_tags)
+                    ))
+                chunk_lemmas = [form_to_lemma[word] for word in chunk_words]
+
+                words.extend(chunk_words)
+                lemmas.extend(chunk_lemmas)
+
+                with self.lock:
+                    if not self.preview:
+                        self.preview = chunk[:501]
+                    self.chunks_done += 1
+                    self.chunks_total = total
+                    self.tokens += len(chunk_words)
+                    self.partial_counts.update(
+                        lemma for lemma in chunk_lemmas if lemma not in self.stop_words
+                    )
+
+            if self.cancel_event.is_set():
+                with self.lock:
+                    self.status = CANCELLED
+                    self.finished = time.time()
+                return
+
+            # Same result shape as analyze_text()
+            result = {'lemmatizer_stats': lemmatizer_stats}
+            if self.lang_code == "auto":
+                result.update({
+                    'detected_lang': document_language or "ru",
+                    'confidence': confidence,
+                    'token_counts': {'ru': len(words) - be_tokens, 'be': be_tokens}
+                })
+            result.update(count_lemmas(words, lemmas, self.stop_words, form_tags))
+            result['collocation_cache'] = {}
+            result['dynamics_cache'] = {}
+
+            with self.lock:
+                self.result = result
+                self.status = DONE
+                self.finished = time.time()
+        except Exception as e:
+            with self.lock:
+                self.status = FAILED
+                self.error = str(e)
+                self.finished = time.time()
+        finally:
+            # Input is no longer needed once processed
+            self.data = None
+            self.text = None
+
+    def progress(self):
+        """
+        Get a consistent snapshot of the job progress
+
+        Returns:
+            dict: status, chunks_done, chunks_total, tokens, tokens_per_sec,
+                  elapsed and error
+        """
+        with self.lock:
+            end = self.finished or time.time()
+            elapsed = end - self.started if self.started else 0.0
+            return {
+                'status': self.status,
+                'chunks_done': self.chunks_done,
+                'chunks_total': self.chunks_total,
+                'tokens': self.tokens,
+                'tokens_per_sec': self.tokens / elapsed if elapsed > 0 else 0.0,
+                'elapsed': elapsed,
+                'error': self.error
+            }
+
+    def partial_top(self, n=50):
+        """
+        Get the current top-n lemmas from the chunks processed so far
+
+        Args:
+            n: Number of lemmas
+
+        Returns:
+            list: Tuples of (lemma, frequency)
+        """
+        with self.lock:
+            return self.partial_counts.most_common(n)
+
+
+class JobManager:
+    """Process-wide registry and executor for background analysis jobs"""
+
+    def __init__(self, max_workers=2, max_jobs=20):
+        """
+        Initialize job manager
+
+        Args:
+            max_workers: Number of jobs processed concurrently
+            max_jobs: Number of jobs kept in memory (oldest finished dropped first)
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def submit(self, job):
+        """
+        Queue a job for background processing
+
+        Args:
+            job: AnalysisJob to run
+
+        Returns:
+            str: Job ID
+        """
+        with self.lock:
+            self._evict()
+            self.jobs[job.id] = job
+        self.executor.submit(job.run)
+        return job.id
+
+    def get(self, job_id):
+        """
+        Look up a job by ID
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            AnalysisJob or None if unknown (e.g. evicted)
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond max_jobs"""
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job.status in (DONE, CANCELLED, FAILED)]
+        while len(self.jobs) >= self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+
+@st.cache_resource
+def get_job_manager():
+    """Initialize and cache the process-wide job manager"""
+    return JobManager()
+
+
+def _job_key(payload, lang_code, stop_words):
+    """Identity of a job input, used to reuse a job across reruns"""
+    return (hashlib.sha1(payload).hexdigest(), lang_code, frozenset(stop_words))
+
+
+def render_background_job_ui(text_content, source_name, uploaded_file, lang_code, stop_words, top_n=50):
+    """
+    Submit (or reattach to) a background job and show its progress
+
+    While the job runs this shows progress, a cancel button and the partial
+    top-N table, and reruns the page periodically to refresh them. A
+    cancelled or failed job can be started again for the same input.
+
+    Args:
+        text_content: Text to analyze (direct input) or None
+        source_name: File name or description of the source
+        uploaded_file: Streamlit UploadedFile or None
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words to exclude from counts
+        top_n: Size of the partial results table
+
+    Returns:
+        tuple: (analysis, preview_text) - analysis is the finished result
+               (as from analyze_text) or None while the job is not done
+    """
+    manager = get_job_manager()
+
+    if uploaded_file is not None:
+        data = uploaded_file.getvalue()
+        key = _job_key(data, lang_code, stop_words)
+        text = None
+    else:
+        data = None
+        key = _job_key(text_content.encode('utf-8'), lang_code, stop_words)
+        text = text_content
+
+    def start_job():
+        new_job = AnalysisJob(key, source_name, lang_code, stop_words, data=data, text=text)
+        st.session_state.analysis_job_id = manager.submit(new_job)
+        return new_job
+
+    # Reattach to this session's job for the same input, or start a new one
+    job = manager.get(st.session_state.get('analysis_job_id'))
+    if job is None or job.key != key:
+        if job is not None and job.status in (QUEUED, RUNNING):
+            job.cancel()
+        job = start_job()
+
+    progress = job.progress()
+    status = progress['status']
+    if status == DONE:
+        return job.result, job.preview
+
+    st.markdown("---")
+    st.subheader(f"⏳ Фоновый анализ: {job.source_name}")
+    st.caption(STATUS_LABELS[status])
+
+    fraction = progress['chunks_done'] / progress['chunks_total'] if progress['chunks_total'] else 0.0
+    st.progress(min(fraction, 1.0))
+
+    unit = "Страниц" if job.is_pdf else "Фрагментов"
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(unit, f"{progress['chunks_done']:,} / {progress['chunks_total'] or '?'}")
+    with col2:
+        st.metric("Токенов", f"{progress['tokens']:,}")
+    with col3:
+        st.metric("Токенов/сек", f"{progress['tokens_per_sec']:,.0f}")
+
+    if status == FAILED:
+        st.error(f"❌ Ошибка обработки текста: {progress['error']}")
+    if status in (CANCELLED, FAILED):
+        # The stopped job stays attached (with its partial results) until
+        # the same input is submitted again
+        if st.button("🔄 Запустить анализ заново", key="restart_analysis_job"):
+            start_job()
+            st.rerun()
+    else:
+        if st.button("🛑 Отменить анализ", key="cancel_analysis_job"):
+            job.cancel()
+            st.rerun()
+
+    partial = job.partial_top(top_n)
+    if partial:
+        st.markdown(f"**Промежуточный топ-{top_n}** (по обработанной части текста)")
+        st.table({
+            "Ранг": list(range(1, len(partial) + 1)),
+            "Лемма": [lemma for lemma, _ in partial],
+            "Частота": [freq for _, freq in partial]
+        })
+
+    if status in (QUEUED, RUNNING):
+        time.sleep(REFRESH_INTERVAL)
+        st.rerun()
+
+    return None, job.preview
@@ -0,0 +1,270 @@
+"""
+Analysis Pipeline
+Tokenization, lemmatization and frequency counting shared by the
+Streamlit app and the HTTP analysis service
+"""
+
+import re
+
+import numpy as np
+
+# Language support modules
+from ru_support import lemmatize_russian, get_russian_stop_words
+from belarusian.be_support import lemmatize_belarusian, get_belarusian_stop_words
+from language_detection import detect_language, lemmatize_mixed
+from lemma_vocabulary import encode_lemmas, stop_word_mask
+from frequency_table import LemmaFrequencyTable
+from lexical_richness import lexical_richness
+from pos_tags import token_pos_ids, lemma_pos_ids
+from analysis_profiler import profiled_stage
+from text_normalization import (
+    get_normalizer, active_profile, LETTERS, SOFT_HYPHEN, STRESS_MARKS, APOSTROPHE, APOSTROPHE_VARIANTS
+)
+
+
+# Forms kept in the form -> lemma caches of chunked counting; a cache that
+# reaches this size is cleared, and forms seen again are lemmatized again
+FORM_CACHE_LIMIT = 500000
+
+# Word: Cyrillic (а-я, ё, Belarusian і, ў) and Latin letters, soft hyphens and
+# stress marks inside the word, and apostrophes between letters (сям'я)
+_WORD_CHARS = f"[{LETTERS}{SOFT_HYPHEN}{STRESS_MARKS}]"
+TOKEN_PATTERN = re.compile(f"{_WORD_CHARS}+(?:[{APOSTROPHE}{APOSTROPHE_VARIANTS}]{_WORD_CHARS}+)*")
+
+
+@profiled_stage('tokenize')
+def tokenize_text(text, profile=None):
+    """
+    Tokenize text into words
+    Removes punctuation and keeps only Cyrillic and Latin letters
+
+    Args:
+        text: Raw text string to tokenize
+        profile: Normalization profile (see text_normalization.PROFILES);
+                 None = the active profile of the process
+
+    Returns:
+        list: List of normalized lowercase words (Cyrillic and Latin only)
+    """
+    # Extract words using the precompiled token regex
+    words = TOKEN_PATTERN.findall(text)
+    # Lowercase and normalize each unique word type once
+    words = get_normalizer(profile or active_profile()).normalize_tokens(words)
+    # Tokens made only of marks normalize to empty strings
+    return [word for word in words if word]
+
+
+def iter_token_spans(text, profile=None):
+    """
+    Iterate over the tokens of a text with their character offsets
+
+    Yields exactly the tokens of tokenize_text() in the same order, so
+    the n-th span belongs to the n-th entry of an analysis' lemma_ids.
+    Each unique token type is normalized once.
+
+    Args:
+        text: Raw text string
+        profile: Normalization profile (see text_normalization.PROFILES);
+                 None = the active profile of the process
+
+    Yields:
+        tuple: (start, end, normalized_form) with text[start:end] being
+               the token as written
+    """
+    normalizer = get_normalizer(profile or active_profile())
+    cache = {}
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        form = cache.get(token)
+        if form is None:
+            form = cache[token] = normalizer.normalize(token)
+        if form:
+            yield match.start(), match.end(), form
+
+
+def filter_stop_words(lemmas, stop_words):
+    """
+    Filter out stop words from the list of lemmas
+
+    Args:
+        lemmas: List of lemmatized words
+        stop_words: Set of stop words to filter out
+
+    Returns:
+        list: Filtered list with stop words removed
+    """
+    return [lemma for lemma in lemmas if lemma not in stop_words]
+
+
+def get_default_stop_words(lang_code):
+    """
+    Get the built-in stop words for a language
+
+    Args:
+        lang_code: Language code ('ru', 'be' or 'auto' for both lists)
+
+    Returns:
+        set: Default stop words
+    """
+    if lang_code == "ru":
+        return get_russian_stop_words()
+    if lang_code == "be":
+        return get_belarusian_stop_words()
+    # Automatic detection: text may mix both languages
+    return get_russian_stop_words() | get_belarusian_stop_words()
+
+
+@profiled_stage('lemmatize')
+def lemmatize_words(words, lang_code, document_language=None, stats=None, tags=None):
+    """
+    Lemmatize words with the lemmatizer for the given language
+
+    Args:
+        words: List of words to lemmatize
+        lang_code: Language code ('ru', 'be' or 'auto')
+        document_language: Detected document language, used by 'auto'
+                           for words without a clear language signature
+        stats: Optional dict for Belarusian lemmatizer counters
+        tags: Optional dict that receives word form -> native part-of-speech
+              tag of every distinct form (see pos_tags)
+
+    Returns:
+        list: Lemmas aligned with words
+    """
+    if lang_code == "ru":
+        # Russian: use pymorphy3 for morphological analysis
+        return lemmatize_russian(words, tags)
+    if lang_code == "be":
+        # Belarusian: use lemmatizer_be based on Bnkorpus
+        return lemmatize_belarusian(words, stats, tags)
+    # Auto: route each word form to the Russian or Belarusian lemmatizer
+    lemmas, _ = lemmatize_mixed(words, document_language or "ru", stats, tags)
+    return lemmas
+
+
+@profiled_stage('aggregation')
+def count_lemmas(words, lemmas, stop_words, form_tags=None):
+    """
+    Encode lemmas as IDs and build the frequency table
+
+    Args:
+        words: List of tokens
+        lemmas: List of lemmas aligned with words
+        stop_words: Set of stop words to exclude from counts
+        form_tags: Optional word form -> native part-of-speech tag
+                   collected during lemmatization
+
+    Returns:
+        dict: vocabulary, lemma_ids, stop_mask, freq_table, total_words,
+              lexical richness measures ('richness') and, with form_tags,
+              a part-of-speech ID per lemma ('pos_ids')
+    """
+    # Encode lemmas as integer IDs and mark stop words
+    # (prepositions, conjunctions, etc.)
+    vocabulary, lemma_ids = encode_lemmas(lemmas)
+    stop_mask = stop_word_mask(vocabulary, stop_words)
+
+    # Full frequency table over lemma IDs (stop words get zero count); the
+    # raw counts are shared with the richness measures
+    token_counts = np.bincount(lemma_ids, minlength=len(vocabulary))
+    freq_table = LemmaFrequencyTable.from_lemma_ids(
+        vocabulary, lemma_ids, stop_mask, words, token_counts=token_counts
+    )
+
+    result = {
+        'vocabulary': vocabulary,
+        'lemma_ids': lemma_ids,
+        'stop_mask': stop_mask,
+        'freq_table': freq_table,
+        'total_words': len(words),
+        'richness': lexical_richness(lemma_ids, len(vocabulary), token_counts)
+    }
+    if form_tags is not None:
+        result['pos_ids'] = lemma_pos_ids(lemma_ids, token_pos_ids(words, form_tags), len(vocabulary))
+    return result
+
+
+def count_chunk_lemmas(chunks, lang_code, counts, form_cache=None):
+    """
+    Add the lemma counts of a document that arrives in text chunks
+
+    Only one chunk's tokens are held at a time: the unique forms of each
+    chunk that are not in form_cache are lemmatized, then the chunk's lemma
+    counts are added. The first non-empty chunk decides the document
+    language for 'auto'. form_cache is cleared once it holds
+    FORM_CACHE_LIMIT forms, so the memory of counting a large corpus is
+    bounded by the chunk size, the cache and the counter's own budget.
+
+    Args:
+        chunks: Iterable of text chunks of one document
+        lang_code: Language code ('ru', 'be' or 'auto')
+        counts: Counter with add(lemma, count), e.g. a SpillingCounter
+        form_cache: Optional dict (document language, form) -> lemma shared
+                    by the documents of one run
+
+    Returns:
+        int: Number of tokens in the document
+    """
+    if form_cache is None:
+        form_cache = {}
+    document_language = None
+    tokens = 0
+    for chunk in chunks:
+        form_counts = {}
+        for word in tokenize_text(chunk):
+            form_counts[word] = form_counts.get(word, 0) + 1
+        if not form_counts:
+            continue
+        if document_language is None:
+            document_language = detect_language(chunk)[0] if lang_code == "auto" else lang_code
+
+        if len(form_cache) >= FORM_CACHE_LIMIT:
+            form_cache.clear()
+        new_forms = [form for form in form_counts if (document_language, form) not in form_cache]
+        if new_forms:
+            lemmas = lemmatize_words(new_forms, lang_code, document_language)
+            form_cache.update(((document_language, form), lemma) for form, lemma in zip(new_forms, lemmas))
+        for form, count in form_counts.items():
+            counts.add(form_cache[(document_language, form)], count)
+            tokens += count
+    return tokens
+
+
+def analyze_text(text_content, lang_code, stop_words):
+    """
+    Run tokenization, lemmatization and counting for a text
+
+    Args:
+        text_content: Text to analyze
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words to exclude from counts
+
+    Returns:
+        dict: Analysis result (vocabulary, lemma_ids, stop_mask, freq_table,
+              total_words, part-of-speech IDs, Belarusian lemmatizer
+              counters of this request and language detection info for 'auto')
+    """
+    # Step 1: Tokenize text into individual words
+    words = tokenize_text(text_content)
+
+    # Step 2: Lemmatize words based on selected language
+    lemmatizer_stats = {}
+    form_tags = {}
+    result = {'lemmatizer_stats': lemmatizer_stats}
+    if lang_code == "auto":
+        # Detect document language, then route each word form
+        detected_lang, confidence = detect_language(text_content)
+        lemmas, token_counts = lemmatize_mixed(words, detected_lang, lemmatizer_stats, form_tags)
+        result.update({
+            'detected_lang': detected_lang,
+            'confidence': confidence,
+            'token_counts': token_counts
+        })
+    else:
+        lemmas = lemmatize_words(words, lang_code, stats=lemmatizer_stats, tags=form_tags)
+
+    # Steps 3-4: Lemma IDs, stop words, parts of speech and frequency table
+    result.update(count_lemmas(words, lemmas, stop_words, form_tags))
+    result['collocation_cache'] = {}
+    result['dynamics_cache'] = {}
+    return result
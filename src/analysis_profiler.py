@@ -0,0 +1,384 @@
+"""
+Analysis Profiler
+Opt-in capture of one analysis run: cProfile for function hotspots,
+tracemalloc for memory, and per-stage time and peak memory of reading,
+language detection, tokenization, lemmatization and counting. The result
+is shown in the app and can be downloaded as a .prof file (pstats,
+snakeviz) and a text report
+"""
+
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+
+# Environment variable that turns profiling on by default for all sessions
+PROFILE_ENV = "TEXT_ANALYZER_PROFILE"
+
+# Stages marked with @profiled_stage: key -> display name
+PROFILE_STAGES = {
+    'reading': "Чтение файла",
+    'detection': "Определение языка",
+    'tokenize': "Токенизация",
+    'lemmatize': "Лемматизация",
+    'aggregation': "Подсчёт частот"
+}
+
+# Rows of the hotspot and allocation summaries
+HOTSPOT_COUNT = 20
+ALLOCATION_COUNT = 10
+
+# Functions listed in the text report
+REPORT_FUNCTIONS = 60
+
+# tracemalloc and cProfile are process-wide, so one capture runs at a time
+_capture_lock = threading.Lock()
+
+
+class _ActiveCapture(threading.local):
+    """Capture of the current thread (other sessions are not recorded)"""
+    capture = None
+
+
+_active = _ActiveCapture()
+
+
+def profiling_default():
+    """
+    Whether profiling is on by default
+
+    Returns:
+        bool: True if the TEXT_ANALYZER_PROFILE environment variable is set
+              to 1/true/yes/on
+    """
+    return os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def profiled_stage(stage):
+    """
+    Decorator that records a function as an analysis stage
+
+    Without an active capture in the current thread the wrapper only
+    checks a thread-local attribute. Nested stages (e.g. lemmatize_words
+    calling lemmatize_mixed) are recorded once, by the outermost call.
+
+    Args:
+        stage: Key of PROFILE_STAGES
+
+    Returns:
+        function: Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            capture = _active.capture
+            if capture is None or capture.current_stage is not None:
+                return func(*args, **kwargs)
+            return capture.run_stage(stage, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+class AnalysisProfile:
+    """
+    Profile of one analysis run in the current thread
+
+    Times include the overhead of cProfile and tracemalloc (the run is
+    typically 2-3 times slower), so the shares of stages and functions
+    matter more than absolute seconds. Memory is traced process-wide and
+    may include concurrent sessions.
+    """
+
+    def __init__(self):
+        """Initialize an empty profile"""
+        self.stages = {}
+        self.current_stage = None
+        self.report = None
+        self._profiler = cProfile.Profile()
+        self._peak = 0
+        self._baseline = 0
+        self._started_tracing = False
+        self._start_time = None
+
+    def start(self):
+        """Start cProfile and tracemalloc for the current thread"""
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self._start_time = time.perf_counter()
+        _active.capture = self
+        self._profiler.enable()
+
+    def stop(self):
+        """
+        Stop profiling and build the report
+
+        Returns:
+            dict: Report (see _build_report)
+        """
+        self._profiler.disable()
+        _active.capture = None
+        seconds = time.perf_counter() - self._start_time
+        self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+        if self._started_tracing:
+            tracemalloc.stop()
+        self.report = self._build_report(seconds, snapshot)
+        return self.report
+
+    def run_stage(self, stage, func, args, kwargs):
+        """
+        Call a stage function, recording its time and memory
+
+        Args:
+            stage: Key of PROFILE_STAGES
+            func: Function to call
+            args: Positional arguments
+            kwargs: Keyword arguments
+
+        Returns:
+            Result of func
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        tracemalloc.reset_peak()
+        self.current_stage = stage
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            self.current_stage = None
+            end, peak = tracemalloc.get_traced_memory()
+            self._peak = max(self._peak, peak)
+            record = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'peak': 0, 'retained': 0})
+            record['calls'] += 1
+            record['seconds'] += seconds
+            record['peak'] = max(record['peak'], peak - current)
+            record['retained'] += end - current
+
+    def _build_report(self, seconds, snapshot):
+        """
+        Summaries and downloadable artifacts of the capture
+
+        Args:
+            seconds: Wall time of the capture
+            snapshot: tracemalloc snapshot taken at the end
+
+        Returns:
+            dict: created, seconds, peak (bytes above the start), stages
+                  (key, calls, seconds, peak, retained), hotspots (function,
+                  calls, self seconds, cumulative seconds), allocations
+                  (code line, bytes, blocks), prof (pstats file bytes) and
+                  text (readable report)
+        """
+        stats = pstats.Stats(self._profiler)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        hotspots = [
+            (_function_label(func), calls, self_seconds, cumulative)
+            for func, (_, calls, self_seconds, cumulative, _) in functions[:HOTSPOT_COUNT]
+        ]
+        allocations = [
+            (f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size, stat.count)
+            for stat in snapshot.statistics('lineno')[:ALLOCATION_COUNT]
+        ]
+        stages = [
+            (key, record['calls'], record['seconds'], record['peak'], record['retained'])
+            for key, record in ((key, self.stages.get(key)) for key in PROFILE_STAGES)
+            if record is not None
+        ]
+        report = {
+            'created': time.time(),
+            'seconds': seconds,
+            'peak': max(self._peak - self._baseline, 0),
+            'stages': stages,
+            'hotspots': hotspots,
+            'allocations': allocations,
+            # Same format as pstats.Stats.dump_stats()
+            'prof': marshal.dumps(stats.stats)
+        }
+        report['text'] = _format_report(report, stats)
+        return report
+
+
+@contextmanager
+def capture_profile(enabled):
+    """
+    Profile the analysis run inside the block
+
+    Args:
+        enabled: Whether profiling is on for this session
+
+    Yields:
+        AnalysisProfile or None (profiling off, or another session is
+        being profiled right now)
+    """
+    if not enabled or not _capture_lock.acquire(blocking=False):
+        yield None
+        return
+    try:
+        profile = AnalysisProfile()
+        profile.start()
+        try:
+            yield profile
+        finally:
+            profile.stop()
+    finally:
+        _capture_lock.release()
+
+
+def _short_path(filename):
+    """Last two components of a source path"""
+    return "/".join(Path(filename).parts[-2:])
+
+
+def _function_label(func):
+    """Readable name of a pstats function key"""
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{_short_path(filename)}:{lineno}({name})"
+
+
+def _format_megabytes(size):
+    """Format a byte count in MB"""
+    return f"{size / (1024 * 1024):,.1f} MB"
+
+
+def _format_report(report, stats):
+    """
+    Text report: stages, hotspots, allocations and the pstats listing
+
+    Args:
+        report: Report dict without 'text'
+        stats: pstats.Stats of the capture
+
+    Returns:
+        str: Report text
+    """
+    lines = [
+        f"Analysis profile, {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(report['created']))}",
+        f"Total: {report['seconds']:.3f} s under profiler, peak memory {_format_megabytes(report['peak'])}",
+        "",
+        "Stages:"
+    ]
+    for key, calls, seconds, peak, retained in report['stages']:
+        lines.append(f"  {key:<12} {calls:>6} calls {seconds:>9.3f} s  peak {_format_megabytes(peak):>12}  "
+                     f"retained {_format_megabytes(retained):>12}")
+    lines += ["", "Hotspots (self time):"]
+    for label, calls, self_seconds, cumulative in report['hotspots']:
+        lines.append(f"  {self_seconds:>9.3f} s {cumulative:>9.3f} s cum {calls:>10,} calls  {label}")
+    lines += ["", "Retained allocations:"]
+    for label, size, count in report['allocations']:
+        lines.append(f"  {_format_megabytes(size):>12} {count:>10,} blocks  {label}")
+
+    listing = io.StringIO()
+    stats.stream = listing
+    stats.sort_stats('cumulative').print_stats(REPORT_FUNCTIONS)
+    lines += ["", listing.getvalue()]
+    return "\n".join(lines)
+
+
+def render_profiling_toggle():
+    """
+    Render the per-session profiling switch
+
+    Returns:
+        bool: Whether the next analysis run is profiled
+    """
+    return st.checkbox(
+        "🩺 Профилирование анализа",
+        value=profiling_default(),
+        help="Записывает профиль нового анализа: время и память по этапам (чтение, "
+             "токенизация, лемматизация, подсчёт) и самые затратные функции. Включено для всех, "
+             f"если задана переменная окружения {PROFILE_ENV}=1. Анализ под профилировщиком медленнее"
+    )
+
+
+def render_profile_ui(profile):
+    """
+    Render the last analysis profile of the session
+
+    Args:
+        profile: AnalysisProfile of this run (a new report is kept only if
+                 an analysis stage ran) or None
+    """
+    fresh = profile is not None and profile.report is not None and bool(profile.stages)
+    if fresh:
+        st.session_state.analysis_profile = profile.report
+    report = st.session_state.get('analysis_profile')
+    if report is None:
+        if profile is None:
+            st.caption("🩺 Профилирование сейчас выполняется в другой сессии")
+        return
+
+    with st.expander("🩺 Профиль анализа", expanded=fresh):
+        st.caption(
+            f"Записан {time.strftime('%H:%M:%S', time.localtime(report['created']))}: "
+            f"{report['seconds']:.2f} с под профилировщиком, пик памяти {_format_megabytes(report['peak'])}. "
+            "Повторный показ того же текста берётся из кэша и не профилируется"
+        )
+        staged = sum(seconds for _, _, seconds, _, _ in report['stages'])
+        rows = [
+            (PROFILE_STAGES[key], f"{calls:,}", seconds, _format_megabytes(peak), _format_megabytes(retained))
+            for key, calls, seconds, peak, retained in report['stages']
+        ]
+        rows.append(("Прочее", "", max(report['seconds'] - staged, 0), "", ""))
+        st.table({
+            "Этап": [row[0] for row in rows],
+            "Вызовов": [row[1] for row in rows],
+            "Время, с": [f"{row[2]:.3f}" for row in rows],
+            "Доля": [f"{row[2] / (report['seconds'] or 1) * 100:.1f}%" for row in rows],
+            "Пик памяти": [row[3] for row in rows],
+            "Осталось в памяти": [row[4] for row in rows]
+        })
+
+        st.markdown("**Самые затратные функции** (собственное время)")
+        st.table({
+            "Функция": [label for label, _, _, _ in report['hotspots']],
+            "Вызовов": [f"{calls:,}" for _, calls, _, _ in report['hotspots']],
+            "Собственное, с": [f"{self_seconds:.3f}" for _, _, self_seconds, _ in report['hotspots']],
+            "Всего, с": [f"{cumulative:.3f}" for _, _, _, cumulative in report['hotspots']]
+        })
+
+        st.markdown("**Память, оставшаяся после анализа**, по строкам кода")
+        st.table({
+            "Строка": [label for label, _, _ in report['allocations']],
+            "Объём": [_format_megabytes(size) for _, size, _ in report['allocations']],
+            "Блоков": [f"{count:,}" for _, _, count in report['allocations']]
+        })
+
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(report['created']))
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "📥 Профиль (.prof)",
+                data=report['prof'],
+                file_name=f"analysis_{stamp}.prof",
+                mime="application/octet-stream",
+                help="Открывается через pstats или snakeviz"
+            )
+        with col2:
+            st.download_button(
+                "📥 Отчёт (.txt)",
+                data=report['text'].encode('utf-8'),
+                file_name=f"analysis_{stamp}.txt",
+                mime="text/plain"
+            )
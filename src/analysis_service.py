@@ -0,0 +1,523 @@
+"""
+Text Analyzer - HTTP Analysis Service
+Local JSON API for the analysis pipeline, without the Streamlit UI
+
+Endpoints:
+    POST /analyze   - JSON {"text": ..., "language": "ru|be|auto", "top_n": 50}
+                      or raw file bytes with ?filename=doc.pdf&language=ru
+                      (add "full": true / &full=1 to stream all lemmas as JSONL)
+    GET  /metrics   - Latency percentiles, throughput and batching statistics
+    GET  /health    - Liveness check and the active normalization profile
+
+Lemmatizers are kept warm in a pool of worker processes. Small requests
+arriving close together are micro-batched: their unique word forms are
+lemmatized in one worker call per language.
+
+Usage:
+    python src/analysis_service.py --port 8765 --workers 2
+    (TEXT_ANALYZER_NORMALIZATION=fold_yo selects another normalization profile)
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from analysis_pipeline import tokenize_text, lemmatize_words, count_lemmas, get_default_stop_words
+from language_detection import detect_language
+from frequency_export import iter_jsonl_export
+from text_input_handler import extract_text
+from text_cache import get_text_cache
+from text_normalization import active_profile
+
+
+SUPPORTED_LANGUAGES = ('ru', 'be', 'auto')
+
+
+# ---------------------------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------------------------
+
+def _init_worker():
+    """Load lemmatizers once per worker process so requests hit warm models"""
+    from ru_support import get_russian_analyzer
+    from belarusian.be_support import get_belarusian_analyzer
+    get_russian_analyzer()
+    get_belarusian_analyzer()
+
+
+def _lemmatize_forms(lang_code, document_language, forms):
+    """
+    Lemmatize a batch of unique word forms inside a worker process
+
+    Args:
+        lang_code: Language code ('ru', 'be' or 'auto')
+        document_language: Detected document language for 'auto'
+        forms: List of unique word forms
+
+    Returns:
+        list: Lemmas aligned with forms
+    """
+    return lemmatize_words(forms, lang_code, document_language)
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+class ServiceMetrics:
+    """Thread-safe latency/throughput counters for the service"""
+
+    def __init__(self, window=10000):
+        """
+        Initialize metrics
+
+        Args:
+            window: Number of most recent requests kept for percentiles
+        """
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.latencies = deque(maxlen=window)
+        self.finished = deque(maxlen=window)
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+        self.words = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_forms = 0
+
+    def record_request(self, latency, words):
+        """Record a completed request"""
+        with self.lock:
+            self.requests += 1
+            self.words += words
+            self.latencies.append(latency)
+            self.finished.append(time.time())
+
+    def record_rejected(self):
+        """Record a request rejected by backpressure"""
+        with self.lock:
+            self.rejected += 1
+
+    def record_error(self):
+        """Record a failed request"""
+        with self.lock:
+            self.errors += 1
+
+    def record_batch(self, num_requests, num_forms):
+        """Record one worker batch"""
+        with self.lock:
+            self.batches += 1
+            self.batched_requests += num_requests
+            self.batched_forms += num_forms
+
+    def snapshot(self, queue_depth=0):
+        """
+        Get current metrics
+
+        Args:
+            queue_depth: Number of requests waiting for lemmatization
+
+        Returns:
+            dict: Metrics suitable for JSON output
+        """
+        with self.lock:
+            latencies = sorted(self.latencies)
+            now = time.time()
+            recent = sum(1 for t in self.finished if now - t <= 60)
+            uptime = now - self.started
+
+            def percentile(p):
+                if not latencies:
+                    return 0.0
+                return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+            return {
+                'uptime_sec': round(uptime, 1),
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'errors': self.errors,
+                'queue_depth': queue_depth,
+                'latency_ms': {
+                    'p50': round(percentile(50), 2),
+                    'p95': round(percentile(95), 2),
+                    'p99': round(percentile(99), 2)
+                },
+                'throughput': {
+                    'requests_per_sec_1m': round(recent / min(60.0, max(uptime, 1e-9)), 2),
+                    'words_per_sec': round(self.words / max(uptime, 1e-9), 1)
+                },
+                'batching': {
+                    'batches': self.batches,
+                    'avg_requests_per_batch': round(self.batched_requests / self.batches, 2) if self.batches else 0,
+                    'avg_forms_per_batch': round(self.batched_forms / self.batches, 1) if self.batches else 0
+                }
+            }
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching
+# ---------------------------------------------------------------------------
+
+class LemmatizationBatcher:
+    """
+    Collects lemmatization requests and sends them to the worker pool in batches
+
+    Requests that arrive within batch_window seconds of each other are
+    grouped by language; the union of their unique word forms is
+    lemmatized in one worker call. The bounded queue provides backpressure.
+    """
+
+    def __init__(self, executor, metrics, max_queue=64, batch_window=0.01,
+                 max_batch_forms=20000, max_inflight=4):
+        """
+        Initialize batcher
+
+        Args:
+            executor: ProcessPoolExecutor with warm lemmatizers
+            metrics: ServiceMetrics instance
+            max_queue: Maximum number of waiting requests
+            batch_window: Seconds to wait for more requests after the first one
+            max_batch_forms: Upper bound on unique forms per batch
+            max_inflight: Maximum number of batches running in the pool
+        """
+        self.executor = executor
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_window = batch_window
+        self.max_batch_forms = max_batch_forms
+        self.inflight = threading.Semaphore(max_inflight)
+        self.thread = threading.Thread(target=self._run, name="lemmatization-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, lang_code, document_language, forms):
+        """
+        Queue unique word forms for lemmatization
+
+        Args:
+            lang_code: Language code ('ru', 'be' or 'auto')
+            document_language: Detected document language for 'auto'
+            forms: List of unique word forms
+
+        Returns:
+            Future: Resolves to a dict form -> lemma
+
+        Raises:
+            queue.Full: If the service is overloaded
+        """
+        future = Future()
+        self.queue.put_nowait((lang_code, document_language, forms, future))
+        return future
+
+    def _collect(self):
+        """Block for the first request, then gather more for batch_window seconds"""
+        batch = [self.queue.get()]
+        num_forms = len(batch[0][2])
+        deadline = time.monotonic() + self.batch_window
+        while num_forms < self.max_batch_forms:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            num_forms += len(item[2])
+        return batch
+
+    def _run(self):
+        """Batcher thread: group queued requests and dispatch them to the pool"""
+        while True:
+            batch = self._collect()
+
+            # Group requests by language so each group is one worker call
+            groups = {}
+            for lang_code, document_language, forms, future in batch:
+                groups.setdefault((lang_code, document_language), []).append((forms, future))
+
+            for (lang_code, document_language), items in groups.items():
+                unique_forms = list(dict.fromkeys(form for forms, _ in items for form in forms))
+                self.metrics.record_batch(len(items), len(unique_forms))
+                self.inflight.acquire()
+                try:
+                    pool_future = self.executor.submit(_lemmatize_forms, lang_code, document_language, unique_forms)
+                except Exception as e:
+                    self.inflight.release()
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                pool_future.add_done_callback(
+                    lambda done, forms=unique_forms, items=items: self._resolve(done, forms, items)
+                )
+
+    def _resolve(self, done, forms, items):
+        """Pool callback: hand each waiting request the shared form -> lemma map"""
+        self.inflight.release()
+        try:
+            form_to_lemma = dict(zip(forms, done.result()))
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for _, future in items:
+            future.set_result(form_to_lemma)
+
+
+# ---------------------------------------------------------------------------
+# HTTP layer
+# ---------------------------------------------------------------------------
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """Request handler; the server instance carries batcher, metrics and limits"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TextAnalyzer/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, chunks, content_type):
+        """Send byte chunks with chunked transfer encoding"""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(f"{len(chunk):X}\r\n".encode('ascii') + chunk + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, {'status': 'ok', 'normalization': active_profile()})
+        elif path == "/metrics":
+            self._send_json(200, self.server.metrics.snapshot(self.server.batcher.queue.qsize()))
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/analyze":
+            self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+            return
+
+        started = time.perf_counter()
+        try:
+            text, options = self._parse_request(url)
+        except ValueError as e:
+            self.server.metrics.record_error()
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            result = self._analyze(text, options)
+        except queue.Full:
+            self.server.metrics.record_rejected()
+            self._send_json(503, {'error': "Service overloaded, retry later"})
+            return
+        except Exception as e:
+            self.server.metrics.record_error()
+            self._send_json(500, {'error': str(e)})
+            return
+
+        if options['full']:
+            self._send_stream(iter_jsonl_export(result['freq_table']), "application/x-ndjson; charset=utf-8")
+        else:
+            self._send_json(200, self._summarize(result, options))
+        self.server.metrics.record_request(time.perf_counter() - started, result['total_words'])
+
+    def _parse_request(self, url):
+        """
+        Read text and options from a JSON body or a raw file upload
+
+        Raises:
+            ValueError: For invalid requests and unreadable files (HTTP 400);
+                        the connection is closed if the body was not read
+        """
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0 or length > self.server.max_body_bytes:
+            # The body stays unread, so the connection cannot be reused
+            self.close_connection = True
+            if length < 0:
+                raise ValueError("Invalid Content-Length")
+            raise ValueError(f"Request body too large (limit {self.server.max_body_bytes:,} bytes)")
+        body = self.rfile.read(length)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/json"):
+            try:
+                payload = json.loads(body.decode('utf-8'))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Invalid JSON: {e}")
+            if not isinstance(payload, dict) or not isinstance(payload.get('text'), str):
+                raise ValueError("JSON body must contain a \"text\" string")
+            text = payload['text']
+            params.update({key: value for key, value in payload.items() if key != 'text'})
+        else:
+            # Raw file upload: the reader is chosen by ?filename= extension;
+            # known files come from the extracted-text cache
+            filename = params.get('filename', 'upload.txt')
+            try:
+                text = get_text_cache().get_or_extract(body, filename, extract_text)
+            except Exception as e:
+                # Corrupt PDF/DOCX/archives raise reader-specific errors
+                # (PyPDF2 errors, BadZipFile, KeyError, ...)
+                raise ValueError(f"Cannot read {filename}: {e}") from e
+
+        language = params.get('language', 'ru')
+        if language not in SUPPORTED_LANGUAGES:
+            raise ValueError(f"Unsupported language: {language}")
+        try:
+            top_n = int(params.get('top_n', 50))
+        except (TypeError, ValueError):
+            raise ValueError("top_n must be an integer")
+
+        options = {
+            'language': language,
+            'top_n': top_n,
+            'full': str(params.get('full', '')).lower() in ('1', 'true', 'yes'),
+            'stop_words': str(params.get('stop_words', 'true')).lower() not in ('0', 'false', 'no')
+        }
+        return text, options
+
+    def _analyze(self, text, options):
+        """Tokenize locally, lemmatize unique forms in the pool, count locally"""
+        words = tokenize_text(text)
+        language = options['language']
+        document_language = detect_language(text)[0] if language == "auto" else None
+
+        unique_forms = list(dict.fromkeys(words))
+        form_to_lemma = {}
+        if unique_forms:
+            future = self.server.batcher.submit(language, document_language, unique_forms)
+            form_to_lemma = future.result(timeout=self.server.request_timeout)
+        lemmas = [form_to_lemma[word] for word in words]
+
+        stop_words = get_default_stop_words(language) if options['stop_words'] else set()
+        result = count_lemmas(words, lemmas, stop_words)
+        result['document_language'] = document_language
+        return result
+
+    def _summarize(self, result, options):
+        freq_table = result['freq_table']
+        top = freq_table.top(options['top_n'] if options['top_n'] > 0 else freq_table.num_lemmas)
+        summary = {
+            'language': options['language'],
+            'total_words': result['total_words'],
+            'counted_words': freq_table.total,
+            'unique_lemmas': freq_table.num_lemmas,
+            'richness': result['richness'],
+            'lemmas': [
+                {'rank': rank, 'lemma': lemma, 'frequency': freq}
+                for rank, (lemma, freq) in enumerate(top, 1)
+            ]
+        }
+        if result['document_language']:
+            summary['document_language'] = result['document_language']
+        return summary
+
+
+def create_server(host="127.0.0.1", port=8765, workers=2, max_queue=64, batch_window_ms=10,
+                  max_batch_forms=20000, request_timeout=300, max_body_mb=50, verbose=False):
+    """
+    Create the analysis HTTP server with a warm worker pool
+
+    Args:
+        host: Interface to bind (local only by default)
+        port: TCP port
+        workers: Number of lemmatizer worker processes
+        max_queue: Waiting requests before new ones get HTTP 503
+        batch_window_ms: Micro-batching window in milliseconds
+        max_batch_forms: Upper bound on unique forms per batch
+        request_timeout: Seconds to wait for lemmatization of one request
+        max_body_mb: Maximum request body size in megabytes
+        verbose: Log every request to stderr
+
+    Returns:
+        ThreadingHTTPServer: Server ready for serve_forever()
+    """
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    metrics = ServiceMetrics()
+
+    server = ThreadingHTTPServer((host, port), AnalysisRequestHandler)
+    server.daemon_threads = True
+    server.executor = executor
+    server.metrics = metrics
+    server.batcher = LemmatizationBatcher(
+        executor, metrics,
+        max_queue=max_queue,
+        batch_window=batch_window_ms / 1000,
+        max_batch_forms=max_batch_forms,
+        max_inflight=workers * 2
+    )
+    server.request_timeout = request_timeout
+    server.max_body_bytes = int(max_body_mb * 1024 * 1024)
+    server.verbose = verbose
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text Analyzer HTTP analysis service")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765)")
+    parser.add_argument("--workers", type=int, default=2, help="Lemmatizer worker processes (default: 2)")
+    parser.add_argument("--max-queue", type=int, default=64, help="Waiting requests before HTTP 503 (default: 64)")
+    parser.add_argument("--batch-window-ms", type=float, default=10, help="Micro-batching window (default: 10 ms)")
+    parser.add_argument("--max-batch-forms", type=int, default=20000, help="Unique forms per batch (default: 20000)")
+    parser.add_argument("--max-body-mb", type=float, default=50, help="Maximum request size (default: 50 MB)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = create_server(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        batch_window_ms=args.batch_window_ms,
+        max_batch_forms=args.max_batch_forms,
+        max_body_mb=args.max_body_mb,
+        verbose=args.verbose
+    )
+
+    # Warm up all workers before accepting traffic
+    print(f"🔄 Starting {args.workers} worker(s)...")
+    for future in [server.executor.submit(_lemmatize_forms, 'ru', None, []) for _ in range(args.workers)]:
+        future.result()
+
+    print(f"✅ Text Analyzer service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping service...")
+    finally:
+        server.server_close()
+        server.executor.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
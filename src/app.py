@@ -7,76 +7,267 @@ Uses pymorphy3 (Russian) and lemmatizer_be (Belarusian)
 
 # Core Streamlit and data processing imports
 import streamlit as st
-from collections import Counter
-import re
 import io
 import csv
+import hashlib
 
-# Language support modules
-from ru_support import lemmatize_russian, get_russian_stop_words
-from belarusian.be_support import lemmatize_belarusian, get_belarusian_stop_words
+# Analysis pipeline (tokenization, lemmatization, counting)
+from analysis_pipeline import analyze_text
+
+# UI modules
 from stop_words_manager import render_stop_words_ui
 from text_input_handler import render_text_input_ui
+from analysis_jobs import render_background_job_ui
+from collocations import render_collocations_ui
+from frequency_export import render_export_ui
+from token_export import render_token_export_ui
+from results_browser import render_results_browser
+from keyness import render_keyness_ui
+from dispersion import render_dynamics_ui
+from lexical_richness import render_richness_ui
+from pos_tags import render_pos_filter_ui, render_pos_frequencies_ui
+from results_store import render_save_result_ui, render_results_query_ui
+from document_collection import render_collection_input_ui, get_collection_analysis, render_duplicates_report
+from analysis_profiler import render_profiling_toggle, capture_profile, render_profile_ui
+from language_detection import LANGUAGE_NAMES
+from text_normalization import active_profile, DEFAULT_PROFILE, NORMALIZATION_ENV
+from belarusian.lacinka import to_lacinka, SCRIPTS
 
 
-def tokenize_text(text):
+def create_csv_download(freq_data, filename):
     """
-    Tokenize text into words
-    Removes punctuation and keeps only Cyrillic and Latin letters
+    Create CSV data for download
     
     Args:
-        text: Raw text string to tokenize
+        freq_data: Dictionary of columns (e.g. Ранг, Лемма, Частота);
+                   keys become the header row
+        filename: Name for the downloaded file
         
     Returns:
-        list: List of lowercase words (Cyrillic and Latin only)
+        CSV data as bytes
     """
-    # Extract words using regex: Cyrillic (а-я, ё) and Latin (a-z) letters only
-    words = re.findall(r'[а-яёА-ЯЁa-zA-Z]+', text)
-    # Convert all words to lowercase for consistency
-    words = [word.lower() for word in words]
-    return words
+    output = io.StringIO()
+    writer = csv.writer(output)
+    
+    # Write header
+    writer.writerow(list(freq_data.keys()))
+    
+    # Write data rows
+    writer.writerows(zip(*freq_data.values()))
+    
+    return output.getvalue().encode('utf-8-sig')  # BOM for Excel compatibility
 
 
-def filter_stop_words(lemmas, stop_words):
+def get_analysis(text_content, lang_code, stop_words):
     """
-    Filter out stop words from the list of lemmas
+    Get analysis result, reusing the previous one for the same input
+    
+    Streamlit reruns the script on every widget interaction; keeping the
+    last result in session state means paging or sorting the results
+    does not tokenize and lemmatize the text again.
     
     Args:
-        lemmas: List of lemmatized words
-        stop_words: Set of stop words to filter out
+        text_content: Text to analyze
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words to exclude from counts
         
     Returns:
-        list: Filtered list with stop words removed
+        dict: Analysis result from analyze_text()
     """
-    return [lemma for lemma in lemmas if lemma not in stop_words]
+    key = (
+        hashlib.sha1(text_content.encode('utf-8')).hexdigest(),
+        lang_code,
+        frozenset(stop_words)
+    )
+    cached = st.session_state.get('analysis_cache')
+    if cached is not None and cached['key'] == key:
+        return cached['result']
+    
+    result = analyze_text(text_content, lang_code, stop_words)
+    st.session_state.analysis_cache = {'key': key, 'result': result}
+    return result
 
 
-def create_csv_download(freq_data, filename):
+def render_results(analysis, lang_code, source_name, preview_text, stop_words=frozenset(), text=None):
     """
-    Create CSV data for download
+    Render metrics, tables and downloads for a finished analysis
     
     Args:
-        freq_data: Dictionary with Ранг, Лемма, Частота
-        filename: Name for the downloaded file
-        
-    Returns:
-        CSV data as bytes
+        analysis: Analysis result (from analyze_text() or a background job)
+        lang_code: Language code ('ru', 'be' or 'auto')
+        source_name: File name or description of the source
+        preview_text: Beginning of the original text
+        stop_words: Stop words used for the analysis (applied to the
+                    keyness comparison side as well)
+        text: Full text if available (enables chapter/page dynamics and
+              the token export)
     """
-    output = io.StringIO()
-    writer = csv.writer(output)
+    lemma_ids = analysis['lemma_ids']
+    stop_mask = analysis['stop_mask']
+    freq_table = analysis['freq_table']
+    total_words = analysis['total_words']  # Total word count
+    unique_lemmas = freq_table.num_lemmas  # Count of unique lemmas
     
-    # Write header
-    writer.writerow(['Ранг', 'Лемма', 'Частота'])
+    if total_words == 0:
+        st.warning("⚠️ В тексте не найдено слов для анализа")
+        return
     
-    # Write data rows
-    for i in range(len(freq_data['Ранг'])):
-        writer.writerow([
-            freq_data['Ранг'][i],
-            freq_data['Лемма'][i],
-            freq_data['Частота'][i]
-        ])
+    # Display results section
+    st.markdown("---")
+    st.header("📊 Результаты анализа")
     
-    return output.getvalue().encode('utf-8-sig')  # BOM for Excel compatibility
+    if lang_code == "auto":
+        token_counts = analysis['token_counts']
+        st.info(
+            f"🔎 Определён язык документа: **{LANGUAGE_NAMES[analysis['detected_lang']]}** "
+            f"(уверенность {analysis['confidence'] * 100:.0f}%). "
+            f"Слов по языкам: русский — {token_counts['ru']:,}, "
+            f"белорусский — {token_counts['be']:,}"
+        )
+    
+    # Show how many stop words were filtered out
+    filtered_count = total_words - freq_table.total
+    st.info(f"🔍 Отфильтровано {filtered_count} стоп-слов ({(filtered_count/total_words*100):.1f}% от общего числа)")
+    if active_profile() != DEFAULT_PROFILE:
+        st.caption(f"🔡 Профиль нормализации словоформ: {active_profile()} (переменная окружения {NORMALIZATION_ENV})")
+    
+    # Belarusian lemmatizer tiers used for this text (enhanced mode only)
+    be_stats = analysis.get('lemmatizer_stats') or {}
+    be_total = be_stats.get('total_words', 0)
+    if be_total:
+        st.caption(
+            f"⚙️ Белорусская лемматизация ({be_total:,} форм): "
+            f"GrammarDB — {be_stats['grammardb_hits'] / be_total * 100:.1f}%, "
+            f"суффиксные правила — {be_stats['suffix_hits'] / be_total * 100:.1f}%, "
+            f"lemmatizer_be — {be_stats['lemmatizer_be_fallbacks'] / be_total * 100:.1f}%"
+        )
+    
+    # Belarusian results can be shown in Cyrillic or Łacinka; Łacinka forms
+    # were transliterated to Cyrillic for lemmatization
+    lacinka_forms = be_stats.get('lacinka_forms', 0)
+    if lacinka_forms:
+        st.caption(f"🔤 Латинка (łacinka): {lacinka_forms:,} форм транслитерировано в кириллицу для лемматизации")
+    script = 'cyrillic'
+    display_table = freq_table
+    if lang_code == "be" or lacinka_forms:
+        script = st.radio(
+            "Письменность результатов:",
+            options=list(SCRIPTS),
+            format_func=SCRIPTS.get,
+            horizontal=True,
+            key="results_script"
+        )
+        if script == 'lacinka':
+            if 'lacinka_table' not in analysis:
+                analysis['lacinka_table'] = freq_table.relabeled(to_lacinka)
+            display_table = analysis['lacinka_table']
+    
+    # Part-of-speech filter (tags come from the lemmatizers' own parses)
+    script_table = display_table
+    if 'pos_ids' in analysis:
+        display_table = render_pos_filter_ui(analysis, display_table, script)
+    top_50_lemmas = display_table.top(50)  # Top 50 most frequent
+    
+    # Display three key metrics in columns
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(
+            label="Всего слов",
+            value=f"{total_words:,}",
+            help="Общее количество слов в тексте"
+        )
+    with col2:
+        st.metric(
+            label="Уникальных лемм",
+            value=f"{unique_lemmas:,}",
+            help="Количество уникальных лемматизированных форм"
+        )
+    with col3:
+        # Lexical diversity = ratio of unique lemmas to total words
+        st.metric(
+            label="Лексическое разнообразие",
+            value=f"{(unique_lemmas / total_words * 100):.1f}%",
+            help="Отношение уникальных лемм к общему количеству слов"
+        )
+    
+    # Length-robust diversity measures (MTLD, HD-D, Yule's K, ...)
+    if 'richness' in analysis:
+        render_richness_ui(analysis['richness'])
+    
+    # Lemma and token counts per part of speech
+    if 'pos_ids' in analysis:
+        render_pos_frequencies_ui(script_table, analysis['pos_ids'])
+    
+    st.markdown("---")
+    
+    # Prepare data for table display (rank, lemma, frequency)
+    freq_data = {
+        "Ранг": list(range(1, len(top_50_lemmas) + 1)),
+        "Лемма": [lemma for lemma, _ in top_50_lemmas],
+        "Частота": [freq for _, freq in top_50_lemmas]
+    }
+    
+    # Top lemmas and top collocations side by side
+    col_lemmas, col_collocations = st.columns(2)
+    with col_lemmas:
+        # Display top 50 most frequent lemmas
+        st.subheader("🔝 Топ-50 наиболее частых лемм")
+        st.table(freq_data)
+    with col_collocations:
+        colloc_data = render_collocations_ui(
+            display_table.vocabulary, lemma_ids, stop_mask, cache=analysis['collocation_cache']
+        )
+    
+    # Full table: server-side search, sorting and pagination
+    render_results_browser(display_table)
+    
+    # Create CSV download buttons for exporting results
+    csv_data = create_csv_download(freq_data, "results.csv")
+    # Generate filename from source (remove extension if present)
+    safe_filename = source_name.rsplit('.', 1)[0] if '.' in source_name else source_name
+    safe_filename = safe_filename.replace(' ', '_')
+    col_dl1, col_dl2 = st.columns(2)
+    with col_dl1:
+        st.download_button(
+            label="📥 Скачать результаты (CSV)",
+            data=csv_data,
+            file_name=f"text_analysis_{safe_filename}.csv",
+            mime="text/csv",
+            help="Загрузить таблицу частот в формате CSV для Excel"
+        )
+    with col_dl2:
+        st.download_button(
+            label="📥 Скачать словосочетания (CSV)",
+            data=create_csv_download(colloc_data, "collocations.csv"),
+            file_name=f"collocations_{safe_filename}.csv",
+            mime="text/csv",
+            help="Загрузить таблицу словосочетаний в формате CSV для Excel"
+        )
+    
+    # Export of the complete table (all lemmas, optional word forms)
+    render_export_ui(display_table, safe_filename)
+    
+    # Token-level export: form, lemma, offsets and lemmatizer per token
+    render_token_export_ui(text, analysis, lang_code, safe_filename)
+    
+    # Lemma counts kept in the local results store for later queries
+    render_save_result_ui(analysis, lang_code, source_name)
+    
+    # Lemma frequencies across windows, chapters or pages (lemma names are
+    # cached with the counts, so per display script)
+    render_dynamics_ui(
+        lemma_ids, display_table, len(lemma_ids), safe_filename,
+        text=text, cache=analysis['dynamics_cache'].setdefault(script, {})
+    )
+    
+    # Keywords against a second text or a reference corpus
+    render_keyness_ui(freq_table, lang_code, stop_words, safe_filename)
+    
+    # Optional: Show preview of original text in expandable section
+    with st.expander("📄 Просмотр оригинального текста (первые 500 символов)"):
+        if len(preview_text) > 500:
+            preview_text = preview_text[:500] + "..."
+        st.text(preview_text)
 
 
 def main():
@@ -100,9 +291,10 @@ def main():
     st.markdown("### 🌍 Выберите язык текста")
     language = st.radio(
         "Выберите язык вашего документа:",
-        options=["🇷🇺 Русский", "🇧🇾 Белорусский"],
+        options=["🇷🇺 Русский", "🇧🇾 Белорусский", "🔎 Автоопределение"],
         horizontal=True,
-        help="⚠️ ВАЖНО: Выберите правильный язык ПЕРЕД анализом текста!"
+        help="⚠️ ВАЖНО: Выберите правильный язык ПЕРЕД анализом текста! "
+             "Автоопределение распознаёт язык документа и отдельных слов (для смешанных текстов)"
     )
     
     # Determine language code and display information
@@ -110,10 +302,14 @@ def main():
         lang_code = "ru"
         lang_emoji = "🇷🇺"
         lang_name = "Русский"
-    else:
+    elif "Белорусский" in language:
         lang_code = "be"
         lang_emoji = "🇧🇾"
         lang_name = "Белорусский"
+    else:
+        lang_code = "auto"
+        lang_emoji = "🔎"
+        lang_name = "Автоопределение (русский/белорусский)"
     
     st.info(f"{lang_emoji} **Язык анализа:** {lang_name}")
     
@@ -121,104 +317,84 @@ def main():
     # This returns the combined set of default + custom stop words
     current_stop_words = render_stop_words_ui(lang_code)
     
-    # Text input UI (file upload or direct paste)
-    text_content, source_name = render_text_input_ui()
+    # Lemma queries across previously saved analyses
+    render_results_query_ui()
     
-    # Process text if available
-    if text_content is not None and text_content.strip():
-        # Display spinner during processing
-        with st.spinner("Обработка текста..."):
-            try:
-                # Step 1: Text is already extracted from render_text_input_ui()
-                
-                # Step 2: Tokenize text into individual words
-                words = tokenize_text(text_content)
-                
-                # Step 3: Lemmatize words based on selected language
-                if lang_code == "ru":
-                    # Russian: use pymorphy3 for morphological analysis
-                    lemmas = lemmatize_russian(words)
-                else:
-                    # Belarusian: use lemmatizer_be based on Bnkorpus
-                    lemmas = lemmatize_belarusian(words)
-                
-                # Step 4: Remove stop words (prepositions, conjunctions, etc.)
-                # Use stop words from the UI (includes custom additions)
-                filtered_lemmas = filter_stop_words(lemmas, current_stop_words)
-                
-                # Step 5: Calculate statistics for analysis
-                total_words = len(words)  # Total word count
-                unique_lemmas = len(set(filtered_lemmas))  # Count of unique lemmas
-                lemma_freq = Counter(filtered_lemmas)  # Frequency distribution
-                top_50_lemmas = lemma_freq.most_common(50)  # Top 50 most frequent
-                
-                # Display results section
-                st.markdown("---")
-                st.header("📊 Результаты анализа")
-                
-                # Show how many stop words were filtered out
-                filtered_count = len(lemmas) - len(filtered_lemmas)
-                st.info(f"🔍 Отфильтровано {filtered_count} стоп-слов ({(filtered_count/len(lemmas)*100):.1f}% от общего числа)")
-                
-                # Display three key metrics in columns
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric(
-                        label="Всего слов",
-                        value=f"{total_words:,}",
-                        help="Общее количество слов в тексте"
-                    )
-                with col2:
-                    st.metric(
-                        label="Уникальных лемм",
-                        value=f"{unique_lemmas:,}",
-                        help="Количество уникальных лемматизированных форм"
+    # Several files analyzed together, with near-duplicate detection
+    collection = st.checkbox(
+        "📚 Коллекция документов",
+        help="Анализ нескольких файлов вместе; почти одинаковые документы "
+             "(перепечатки, копии) исключаются или учитываются с пониженным весом"
+    )
+    
+    if collection:
+        uploaded_files, policy, threshold = render_collection_input_ui()
+        if uploaded_files:
+            with st.spinner(f"Обработка документов: {len(uploaded_files):,}..."):
+                try:
+                    analysis, skipped = get_collection_analysis(
+                        uploaded_files, lang_code, current_stop_words, policy, threshold
                     )
-                with col3:
-                    # Lexical diversity = ratio of unique lemmas to total words
-                    st.metric(
-                        label="Лексическое разнообразие",
-                        value=f"{(unique_lemmas / total_words * 100):.1f}%",
-                        help="Отношение уникальных лемм к общему количеству слов"
+                    render_duplicates_report(analysis, skipped)
+                    render_results(
+                        analysis, lang_code, f"{len(uploaded_files)} файлов", analysis['preview'], current_stop_words
                     )
-                
-                st.markdown("---")
-                
-                # Display top 50 most frequent lemmas
-                st.subheader("🔝 Топ-50 наиболее частых лемм")
-                
-                # Prepare data for table display (rank, lemma, frequency)
-                freq_data = {
-                    "Ранг": list(range(1, len(top_50_lemmas) + 1)),
-                    "Лемма": [lemma for lemma, _ in top_50_lemmas],
-                    "Частота": [freq for _, freq in top_50_lemmas]
-                }
-                st.table(freq_data)
-                
-                # Create CSV download button for exporting results
-                csv_data = create_csv_download(freq_data, "results.csv")
-                # Generate filename from source (remove extension if present)
-                safe_filename = source_name.rsplit('.', 1)[0] if '.' in source_name else source_name
-                safe_filename = safe_filename.replace(' ', '_')
-                st.download_button(
-                    label="📥 Скачать результаты (CSV)",
-                    data=csv_data,
-                    file_name=f"text_analysis_{safe_filename}.csv",
-                    mime="text/csv",
-                    help="Загрузить таблицу частот в формате CSV для Excel"
-                )
-                
-                # Optional: Show preview of original text in expandable section
-                with st.expander("📄 Просмотр оригинального текста (первые 500 символов)"):
-                    preview_text = text_content[:500]
-                    if len(text_content) > 500:
-                        preview_text += "..."
-                    st.text(preview_text)
-                
+                except Exception as e:
+                    st.error(f"❌ Ошибка обработки текста: {str(e)}")
+                    st.exception(e)
+        return
+    
+    # Large uploads can be analyzed in the background with progress
+    background = st.checkbox(
+        "⏳ Фоновая обработка",
+        help="Для больших файлов: анализ идёт по частям с индикатором прогресса, "
+             "промежуточными результатами и возможностью отмены"
+    )
+    
+    # Opt-in profile of reading and analysis (not of background jobs)
+    profiling = render_profiling_toggle() and not background
+    
+    with capture_profile(profiling) as profile:
+        # Text input UI (file upload or direct paste)
+        text_content, source_name, uploaded_file = render_text_input_ui(read_files=not background)
+        
+        analysis = None
+        if not background and text_content is not None and text_content.strip():
+            # Display spinner during processing
+            with st.spinner("Обработка текста..."):
+                try:
+                    # Tokenization, lemmatization and counting run once per
+                    # text/language/stop words; widget reruns reuse the result
+                    analysis = get_analysis(text_content, lang_code, current_stop_words)
+                except Exception as e:
+                    # Display error message if something goes wrong during processing
+                    st.error(f"❌ Ошибка обработки текста: {str(e)}")
+                    st.exception(e)
+    
+    if profiling:
+        render_profile_ui(profile)
+    
+    if background and source_name is not None and (uploaded_file is not None or (text_content or "").strip()):
+        # Chunked analysis in a worker thread; the page reruns until it is done
+        analysis, preview_text = render_background_job_ui(
+            text_content, source_name, uploaded_file, lang_code, current_stop_words
+        )
+        if analysis is not None:
+            try:
+                render_results(analysis, lang_code, source_name, preview_text, current_stop_words)
             except Exception as e:
-                # Display error message if something goes wrong during processing
                 st.error(f"❌ Ошибка обработки текста: {str(e)}")
                 st.exception(e)
+    
+    # Show results of the analyzed text
+    elif analysis is not None:
+        try:
+            render_results(
+                analysis, lang_code, source_name, text_content[:501], current_stop_words, text=text_content
+            )
+        except Exception as e:
+            st.error(f"❌ Ошибка обработки текста: {str(e)}")
+            st.exception(e)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+Archive Input
+Iterates over the members of .zip/.tar archives and single compressed
+files (.gz, .bz2, .xz) as decompressing streams, so corpus dumps are read
+member by member without extracting them to disk
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+
+
+# Compound suffixes first: '.tar.gz' must not be taken for a gzip file
+ARCHIVE_SUFFIXES = {
+    '.tar.gz': 'tar', '.tgz': 'tar', '.tar.bz2': 'tar', '.tbz2': 'tar',
+    '.tar.xz': 'tar', '.txz': 'tar', '.tar': 'tar', '.zip': 'zip',
+    '.gz': 'gz', '.bz2': 'bz2', '.xz': 'xz'
+}
+
+# Extensions for upload widgets (Streamlit checks only the last suffix)
+ARCHIVE_EXTENSIONS = ['zip', 'tar', 'gz', 'tgz', 'bz2', 'tbz2', 'xz', 'txz']
+
+COMPRESSED_OPENERS = {'gz': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+
+# Guards against archive bombs: decompressed bytes per member, number of
+# members and nesting depth (an archive inside an archive)
+MAX_MEMBER_SIZE = 512 * 1024 * 1024
+MAX_MEMBERS = 100000
+MAX_DEPTH = 3
+
+
+def archive_kind(filename):
+    """
+    Detect an archive or compressed file by its name
+
+    Args:
+        filename: File or member name
+
+    Returns:
+        str: 'zip', 'tar', 'gz', 'bz2', 'xz' or None for plain files
+    """
+    name = filename.lower()
+    for suffix, kind in ARCHIVE_SUFFIXES.items():
+        if name.endswith(suffix):
+            return kind
+    return None
+
+
+def strip_compression_suffix(filename):
+    """
+    Name of the file inside a single compressed file ('a.txt.gz' -> 'a.txt')
+
+    Args:
+        filename: Name of a .gz, .bz2 or .xz file
+
+    Returns:
+        str: Name without the compression suffix
+    """
+    return os.path.splitext(filename)[0]
+
+
+class LimitedReader(io.RawIOBase):
+    """
+    Read-only stream that fails once more than limit bytes were read
+
+    Decompressed sizes in archive headers can lie, so the limit is
+    enforced on the bytes actually produced.
+    """
+
+    def __init__(self, stream, limit, name):
+        """
+        Initialize reader
+
+        Args:
+            stream: Binary stream to read from
+            limit: Maximum number of bytes
+            name: Member name for the error message
+        """
+        self.stream = stream
+        self.limit = limit
+        self.name = name
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(min(len(buffer), self.limit - self.consumed + 1))
+        self.consumed += len(data)
+        if self.consumed > self.limit:
+            raise ValueError(f"{self.name}: more than {self.limit // (1024 * 1024)} MB after decompression")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _skip_member(name):
+    """True for directories and system entries (__MACOSX/, dotfiles)"""
+    base = os.path.basename(name.rstrip('/'))
+    return name.endswith('/') or name.startswith('__MACOSX/') or base.startswith('.') or not base
+
+
+def iter_archive_members(fileobj, filename, depth=0):
+    """
+    Iterate over the files in an archive or compressed file
+
+    Members are yielded in archive order as decompressing streams; a
+    stream is only valid until the next member is requested (tar archives
+    are read strictly sequentially). Nested archives are expanded in place
+    with member names like 'outer.zip/inner.tar/doc.txt'. Zip files need a
+    seekable input, so a nested zip is buffered in memory (up to
+    MAX_MEMBER_SIZE).
+
+    Args:
+        fileobj: Binary file object of the archive
+        filename: Archive name (the suffix selects the format)
+        depth: Current nesting depth
+
+    Yields:
+        tuple: (member_name, stream) for every regular file
+
+    Raises:
+        ValueError: If the file is not an archive, nesting is too deep or
+                    the archive has too many members
+    """
+    kind = archive_kind(filename)
+    if kind is None:
+        raise ValueError(f"Not an archive: {filename}")
+    if depth >= MAX_DEPTH:
+        raise ValueError(f"Archives nested deeper than {MAX_DEPTH} levels: {filename}")
+
+    if kind in COMPRESSED_OPENERS:
+        members = [(strip_compression_suffix(os.path.basename(filename)), COMPRESSED_OPENERS[kind](fileobj))]
+    elif kind == 'zip':
+        archive = zipfile.ZipFile(fileobj)
+        members = (
+            (info.filename, archive.open(info))
+            for info in archive.infolist() if not info.is_dir()
+        )
+    else:
+        archive = tarfile.open(fileobj=fileobj, mode='r|*')
+        members = (
+            (member.name, archive.extractfile(member))
+            for member in archive if member.isfile()
+        )
+
+    count = 0
+    for name, stream in members:
+        if _skip_member(name):
+            continue
+        count += 1
+        if count > MAX_MEMBERS:
+            raise ValueError(f"{filename}: more than {MAX_MEMBERS:,} files")
+
+        stream = io.BufferedReader(LimitedReader(stream, MAX_MEMBER_SIZE, name))
+        if archive_kind(name) is not None:
+            if archive_kind(name) == 'zip':
+                stream = io.BytesIO(stream.read())
+            for inner_name, inner_stream in iter_archive_members(stream, name, depth + 1):
+                yield f"{name}/{inner_name}", inner_stream
+        else:
+            yield name, stream
@@ -0,0 +1,70 @@
+"""
+Atomic File Writes
+Files that other sessions or processes read (GrammarDB artifacts, the
+text cache, watch-folder state, reference lists) are written to a
+temporary file in the same directory, flushed to disk and renamed over the
+target, so readers see either the old or the complete new file
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def atomic_open(path, mode='wb', encoding=None):
+    """
+    Open a temporary file that replaces path when the block succeeds
+
+    If the block raises, the temporary file is removed and the target is
+    left untouched.
+
+    Args:
+        path: Target file path (its directory is created if missing)
+        mode: 'wb' or 'w'
+        encoding: Text encoding for mode 'w'
+
+    Yields:
+        file: Open temporary file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates private files; these are shared like normal files
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write bytes atomically
+
+    Args:
+        path: Target file path
+        data: File content
+    """
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def atomic_write_json(path, data):
+    """
+    Write compact UTF-8 JSON atomically
+
+    Args:
+        path: Target file path
+        data: JSON-serializable data
+    """
+    with atomic_open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
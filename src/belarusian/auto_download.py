@@ -3,52 +3,81 @@ Auto-download GrammarDB on first run
 Designed for Streamlit Cloud deployment
 """
 
-import os
-import sys
 import json
+import os
 import tempfile
-import xml.etree.ElementTree as ET
+import time
 from pathlib import Path
 from urllib.request import urlopen, Request
-from zipfile import ZipFile
 
+from atomic_files import atomic_write_json
+from text_normalization import active_profile
+from .grammardb_artifacts import (
+    GRAMMARDB_RELEASE, GRAMMARDB_URL, build_grammardb_artifacts, check_artifacts, read_manifest, manifest_path
+)
 
-# GrammarDB release URL
-GRAMMARDB_URL = "https://github.com/Belarus/GrammarDB/releases/download/RELEASE-202601/RELEASE-202601.zip"
 
+# A failed setup is not retried on later starts until the GrammarDB files
+# or the archive change, or this many hours have passed (e.g. offline)
+SETUP_RETRY_HOURS = 24
 
-def parse_grammardb_xml(xml_content):
-    """Parse GrammarDB XML and extract word→lemma mappings"""
-    word_to_lemma = {}
-    
+
+def failure_marker_path(grammardb_path):
+    """Path of the marker that records a failed setup of a GrammarDB JSON file"""
+    base, _ = os.path.splitext(str(grammardb_path))
+    return f"{base}.setup_failed.json"
+
+
+def _setup_inputs(grammardb_path, archive_path):
+    """
+    State of everything a setup depends on: the installed files, the local
+    archive, the expected release and the key profile
+    """
+    files = {}
+    for path in (grammardb_path, manifest_path(grammardb_path), archive_path):
+        try:
+            stat = os.stat(path)
+            files[str(path)] = [stat.st_size, stat.st_mtime_ns]
+        except OSError:
+            files[str(path)] = None
+    return {'release': GRAMMARDB_RELEASE, 'key_profile': active_profile(), 'files': files}
+
+
+def _failed_before(grammardb_path, inputs):
+    """
+    Check for a recent failed setup with the same inputs
+
+    Returns:
+        str: Reason recorded for that failure, or None if setup should run
+    """
     try:
-        root = ET.fromstring(xml_content)
-        
-        for paradigm in root.findall('.//Paradigm'):
-            lemma_raw = paradigm.get('lemma')
-            if not lemma_raw:
-                continue
-            
-            # Clean lemma (remove stress marks)
-            lemma = lemma_raw.replace('+', '').replace('́', '').strip().lower()
-            
-            if not lemma:
-                continue
-            
-            # Add lemma itself
-            word_to_lemma[lemma] = lemma
-            
-            # Get all forms
-            for form_elem in paradigm.findall('.//Form'):
-                if form_elem.text:
-                    word_form = form_elem.text.replace('+', '').replace('́', '').strip().lower()
-                    if word_form and word_form not in word_to_lemma:
-                        word_to_lemma[word_form] = lemma
-        
-    except Exception as e:
-        print(f"⚠️ Error parsing XML: {e}")
-    
-    return word_to_lemma
+        with open(failure_marker_path(grammardb_path), 'r', encoding='utf-8') as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if marker.get('inputs') != inputs or time.time() - marker.get('failed_at', 0) > SETUP_RETRY_HOURS * 3600:
+        return None
+    return marker.get('reason')
+
+
+def _clear_failure(grammardb_path):
+    """Remove the failure marker once GrammarDB is ready"""
+    try:
+        os.remove(failure_marker_path(grammardb_path))
+    except OSError:
+        pass
+
+
+def _record_failure(grammardb_path, inputs, reason):
+    """Write the failure marker (best effort: a read-only data/ only means retrying)"""
+    try:
+        atomic_write_json(failure_marker_path(grammardb_path), {
+            'inputs': inputs,
+            'reason': reason,
+            'failed_at': time.time()
+        })
+    except OSError as e:
+        print(f"⚠️ Could not record the failed GrammarDB setup: {e}")
 
 
 def download_and_setup_grammardb(target_path):
@@ -72,44 +101,10 @@ def download_and_setup_grammardb(target_path):
         
         print(f"✅ Downloaded {len(zip_data) / (1024*1024):.1f} MB")
         
-        # Extract and parse
-        print("📂 Extracting and parsing XML files...")
-        
-        all_words = {}
-        
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Extract ZIP to temp directory
-            zip_path = Path(temp_dir) / "grammardb.zip"
+            zip_path = Path(temp_dir) / f"{GRAMMARDB_RELEASE}.zip"
             zip_path.write_bytes(zip_data)
-            
-            with ZipFile(zip_path, 'r') as zip_file:
-                zip_file.extractall(temp_dir)
-            
-            # Parse all XML files
-            xml_files = list(Path(temp_dir).glob("*.xml"))
-            print(f"📄 Found {len(xml_files)} XML files")
-            
-            for xml_file in xml_files:
-                try:
-                    xml_content = xml_file.read_text(encoding='utf-8')
-                    words = parse_grammardb_xml(xml_content)
-                    all_words.update(words)
-                    print(f"   ✅ {xml_file.name}: {len(words):,} forms")
-                except Exception as e:
-                    print(f"   ⚠️ {xml_file.name}: {e}")
-        
-        # Save to JSON
-        print(f"💾 Saving {len(all_words):,} word forms to JSON...")
-        
-        # Create parent directory if needed
-        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(target_path, 'w', encoding='utf-8') as f:
-            json.dump(all_words, f, ensure_ascii=False, indent=2)
-        
-        file_size = Path(target_path).stat().st_size / (1024 * 1024)
-        print(f"✅ GrammarDB saved: {target_path} ({file_size:.1f} MB)")
-        print(f"📊 Total: {len(all_words):,} word forms, {len(set(all_words.values())):,} unique lemmas")
+            build_grammardb_artifacts(zip_path, target_path, GRAMMARDB_RELEASE)
         
         return True
         
@@ -120,41 +115,92 @@ def download_and_setup_grammardb(target_path):
         return False
 
 
+def rebuild_from_archive(archive_path, target_path):
+    """
+    Build GrammarDB from a local release archive (no network needed)
+    
+    Args:
+        archive_path: Path to the GrammarDB release .zip
+        target_path: Path where to save grammardb.json
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    print(f"📦 Building GrammarDB from local archive: {archive_path}")
+    try:
+        build_grammardb_artifacts(archive_path, target_path, GRAMMARDB_RELEASE)
+        return True
+    except Exception as e:
+        print(f"❌ Error building from archive: {e}")
+        return False
+
+
 def ensure_grammardb_ready():
     """
     Ensure GrammarDB is available
-    Downloads and sets up if not present
+    Builds it if the installed artifacts are missing, incomplete or were
+    built from another release or format version
+    
+    The artifacts are rebuilt offline from a local archive if one exists
+    (GRAMMARDB_ARCHIVE environment variable or data/RELEASE-*.zip),
+    otherwise the release is downloaded. A failed setup is recorded next to
+    the files and not attempted again until its inputs change or
+    SETUP_RETRY_HOURS pass, so an offline start with legacy files does not
+    wait for a download every time.
     
     Returns:
-        bool: True if GrammarDB is ready, False if setup failed
+        bool: True if GrammarDB is ready (enhanced mode may use it), False
+              if setup failed and no complete build is installed
     """
     # Determine path to grammardb.json
     # Go up from src/belarusian/ to project root
     project_root = Path(__file__).parent.parent.parent
     grammardb_path = project_root / "data" / "grammardb.json"
     
-    # Check if already exists
-    if grammardb_path.exists():
-        file_size = grammardb_path.stat().st_size / (1024 * 1024)
-        print(f"✅ GrammarDB already exists: {grammardb_path} ({file_size:.1f} MB)")
+    # Cheap check against the manifest (no JSON parse of the dictionary)
+    ready, reason = check_artifacts(grammardb_path)
+    if ready:
+        manifest = read_manifest(grammardb_path)
+        print(f"✅ GrammarDB ready: {manifest['source_release']}, {manifest['forms']:,} word forms")
+        _clear_failure(grammardb_path)
         return True
     
-    print(f"⚠️ GrammarDB not found at: {grammardb_path}")
-    print("🔄 Starting automatic download and setup...")
-    
-    # Download and setup
-    success = download_and_setup_grammardb(str(grammardb_path))
+    archive_path = os.environ.get("GRAMMARDB_ARCHIVE") or project_root / "data" / f"{GRAMMARDB_RELEASE}.zip"
+    inputs = _setup_inputs(grammardb_path, archive_path)
+    previous_failure = _failed_before(grammardb_path, inputs)
+    if previous_failure is not None:
+        print(f"⚠️ GrammarDB setup failed before ({previous_failure}); not retrying until the files change "
+              f"or {SETUP_RETRY_HOURS} h pass (delete {failure_marker_path(grammardb_path)} to retry now)")
+        success = False
+    else:
+        print(f"⚠️ GrammarDB needs setup at {grammardb_path}: {reason}")
+        if Path(archive_path).exists():
+            success = rebuild_from_archive(archive_path, str(grammardb_path))
+        else:
+            print("🔄 Starting automatic download and setup...")
+            success = download_and_setup_grammardb(str(grammardb_path))
     
     if success:
         print("🎉 GrammarDB setup completed successfully!")
+        _clear_failure(grammardb_path)
         return True
-    else:
-        print("⚠️ GrammarDB setup failed. Falling back to basic mode.")
-        return False
+    
+    if previous_failure is None:
+        # Recorded with the inputs after the attempt, so a build that
+        # failed halfway is not retried either
+        _record_failure(grammardb_path, _setup_inputs(grammardb_path, archive_path), reason)
+    
+    # A failed build leaves previous artifacts in place only if it failed
+    # before writing; use them if they are a complete build (of any release)
+    usable, _ = check_artifacts(grammardb_path, release=None)
+    if usable:
+        manifest = read_manifest(grammardb_path)
+        print(f"⚠️ GrammarDB setup failed. Using the existing GrammarDB files ({manifest['source_release']}).")
+        return True
+    print("⚠️ GrammarDB setup failed. Falling back to basic mode.")
+    return False
 
 
 if __name__ == "__main__":
-    # Can be run standalone for testing
+    # Can be run from src/ for testing: python -m belarusian.auto_download
     ensure_grammardb_ready()
-
-
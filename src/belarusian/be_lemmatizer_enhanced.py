@@ -4,15 +4,30 @@ Combines GrammarDB (fast dictionary lookup) with lemmatizer_be (smart analysis)
 Optimized for speed and accuracy
 """
 
+import threading
+
 from lemmatizer_be import BnkorpusLemmatizer
+from .bnkorpus import lemmatize_tagged
 from .grammardb_handler import get_grammardb_handler
+from .suffix_guesser import SuffixGuesser, build_suffix_rules_file, suffix_rules_path
+
+
+# Counters kept per lemmatization call, per caller (session/request) and
+# process-wide
+STAT_KEYS = ('total_words', 'grammardb_hits', 'suffix_hits', 'lemmatizer_be_fallbacks')
 
 
 class EnhancedBelarusianLemmatizer:
     """
-    Enhanced Belarusian lemmatizer using two-stage approach:
+    Enhanced Belarusian lemmatizer using three-stage approach:
     1. GrammarDB lookup (fast, accurate for known words)
-    2. lemmatizer_be fallback (handles unknown/new words)
+    2. Suffix rules learned from GrammarDB (fast, confident guesses only)
+    3. lemmatizer_be fallback (handles ambiguous unknown/new words)
+    
+    One instance is shared by all Streamlit sessions. GrammarDB and the
+    suffix rules are read-only; lemmatizer_be shares one SQLite connection,
+    so its calls are serialized. Counters are collected per call and merged
+    under a lock into the process totals and the caller's own stats dict.
     """
     
     def __init__(self, grammardb_path=None):
@@ -25,52 +40,162 @@ class EnhancedBelarusianLemmatizer:
         # Stage 1: GrammarDB handler (fast dictionary lookup)
         self.grammardb = get_grammardb_handler(grammardb_path)
         
-        # Stage 2: lemmatizer_be (smart morphological analysis)
+        # Stage 2: suffix rules (ending rewrites learned from GrammarDB)
+        self.suffix_guesser = self._load_suffix_guesser(grammardb_path)
+        
+        # Stage 3: lemmatizer_be (smart morphological analysis)
         self.lemmatizer_be = BnkorpusLemmatizer()
         
-        # Statistics tracking
-        self.stats = {
-            'total_words': 0,
-            'grammardb_hits': 0,
-            'lemmatizer_be_fallbacks': 0
-        }
+        # lemmatizer_be keeps one SQLite connection for all threads
+        self._fallback_lock = threading.Lock()
+        
+        # Statistics tracking (process-wide totals)
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+    
+    def _load_suffix_guesser(self, grammardb_path):
+        """
+        Load suffix rules built at GrammarDB conversion time
+        
+        Rules are built here once if the file is missing (e.g. GrammarDB
+        converted by an older version) or belongs to another GrammarDB build.
+        
+        Args:
+            grammardb_path: Path to GrammarDB data file
+            
+        Returns:
+            SuffixGuesser or None if GrammarDB is not loaded
+        """
+        if not grammardb_path or not self.grammardb.loaded:
+            return None
+        
+        rules_path = suffix_rules_path(grammardb_path)
+        source_forms = len(self.grammardb)
+        guesser = SuffixGuesser.from_file(rules_path, source_forms)
+        if guesser is None:
+            print("🔄 Building suffix rules from GrammarDB...")
+            build_suffix_rules_file(self.grammardb, rules_path)
+            guesser = SuffixGuesser.from_file(rules_path, source_forms)
+        return guesser
     
-    def lemmatize(self, word):
+    def lemmatize(self, word, stats=None):
         """
-        Lemmatize a single word using optimized two-stage approach
+        Lemmatize a single word using optimized three-stage approach
         
         Args:
             word: Word to lemmatize
+            stats: Optional dict that receives this call's counters
+                   (e.g. per-session statistics)
             
         Returns:
             str: Lemmatized form (base form)
         """
-        self.stats['total_words'] += 1
+        return self.lemmatize_batch([word], stats)[0]
+    
+    def lemmatize_batch(self, words, stats=None, tags=None):
+        """
+        Lemmatize multiple words efficiently
         
-        # Stage 1: Try GrammarDB first (fast path - microseconds)
-        lemma = self.grammardb.lookup(word)
+        Each distinct form is looked up once (GrammarDB, suffix rules and
+        lemmatizer_be alike) and the results are expanded back to the token
+        positions. Counters still count tokens; they are kept locally and
+        merged once per batch, so concurrent sessions do not contend on
+        every word.
         
-        if lemma is not None:
-            self.stats['grammardb_hits'] += 1
-            return lemma
+        Args:
+            words: List of words to lemmatize
+            stats: Optional dict that receives this batch's counters
+                   (e.g. per-session statistics)
+            tags: Optional dict that receives word form -> GrammarDB
+                  part-of-speech letter (or None) from the same lookups
+            
+        Returns:
+            list: List of lemmatized forms
+        """
+        type_counts = {}
+        for word in words:
+            type_counts[word] = type_counts.get(word, 0) + 1
         
-        # Stage 2: Fallback to lemmatizer_be (slow path - milliseconds)
-        self.stats['lemmatizer_be_fallbacks'] += 1
-        lemma = self.lemmatizer_be.lemmatize(word)
+        grammardb_hits = suffix_hits = fallback_tokens = 0
+        resolved = {}  # form -> lemma
+        fallbacks = []
+        for word, count in type_counts.items():
+            lemma, source, pos = self._fast_lemma(word)
+            if source == 'grammardb':
+                grammardb_hits += count
+            elif source == 'suffix_rules':
+                suffix_hits += count
+            else:
+                # Stage 3: lemmatizer_be (slow path - milliseconds), done below
+                fallbacks.append(word)
+                fallback_tokens += count
+                continue
+            resolved[word] = lemma
+            if tags is not None:
+                tags[word] = pos
         
-        return lemma
+        if fallbacks:
+            with self._fallback_lock:
+                entries = [(word, lemmatize_tagged(self.lemmatizer_be, word)) for word in fallbacks]
+            for word, (lemma, pos) in entries:
+                resolved[word] = lemma
+                if tags is not None:
+                    tags[word] = pos
+        
+        lemmas = [resolved[word] for word in words]
+        
+        self._record({
+            'total_words': len(words),
+            'grammardb_hits': grammardb_hits,
+            'suffix_hits': suffix_hits,
+            'lemmatizer_be_fallbacks': fallback_tokens
+        }, stats)
+        return lemmas
     
-    def lemmatize_batch(self, words):
+    def _fast_lemma(self, word):
         """
-        Lemmatize multiple words efficiently
+        Stages 1-2: GrammarDB lookup, then a confident suffix rule
         
         Args:
-            words: List of words to lemmatize
+            word: Word to lemmatize
             
         Returns:
-            list: List of lemmatized forms
+            tuple: (lemma, source, pos) with source 'grammardb' or
+                   'suffix_rules' and the GrammarDB part of speech of the
+                   lemma (None if unknown), or (None, None, None) if the
+                   word needs lemmatizer_be
         """
-        return [self.lemmatize(word) for word in words]
+        # Stage 1: Try GrammarDB first (fast path - microseconds)
+        lemma, pos = self.grammardb.lookup_tagged(word)
+        if lemma is not None:
+            return lemma, 'grammardb', pos
+        # Stage 2: Confident suffix rule (fast path - microseconds); the
+        # guessed lemma is usually a GrammarDB lemma with a known tag
+        if self.suffix_guesser is not None:
+            lemma = self.suffix_guesser.guess(word)
+            if lemma is not None:
+                return lemma, 'suffix_rules', self.grammardb.lemma_pos(lemma)
+        return None, None, None
+    
+    def lemma_source(self, word):
+        """
+        Name the stage that lemmatizes a word, without lemmatizing it
+        
+        Args:
+            word: Word form (Cyrillic)
+            
+        Returns:
+            str: 'grammardb', 'suffix_rules' or 'lemmatizer_be'
+        """
+        return self._fast_lemma(word)[1] or 'lemmatizer_be'
+    
+    def _record(self, counts, stats=None):
+        """Add one call's counters to the process totals and the caller's stats"""
+        with self._stats_lock:
+            for key, value in counts.items():
+                self.stats[key] += value
+                if stats is not None:
+                    stats[key] = stats.get(key, 0) + value
     
     def validate_lemma(self, word, lemma):
         """
@@ -85,14 +210,22 @@ class EnhancedBelarusianLemmatizer:
         """
         return self.grammardb.is_in_dictionary(lemma)
     
-    def get_performance_stats(self):
+    def get_performance_stats(self, stats=None):
         """
         Get performance statistics
         
+        Args:
+            stats: Counters collected for one session or request; the
+                   process-wide totals are used if omitted
+        
         Returns:
             dict: Statistics including hit rate and performance metrics
         """
-        total = self.stats['total_words']
+        if stats is None:
+            with self._stats_lock:
+                stats = dict(self.stats)
+        stats = {key: stats.get(key, 0) for key in STAT_KEYS}
+        total = stats['total_words']
         
         if total == 0:
             return {
@@ -101,36 +234,40 @@ class EnhancedBelarusianLemmatizer:
                 'performance': 'No words processed'
             }
         
-        hit_rate = (self.stats['grammardb_hits'] / total) * 100
-        fallback_rate = (self.stats['lemmatizer_be_fallbacks'] / total) * 100
+        hit_rate = (stats['grammardb_hits'] / total) * 100
+        suffix_rate = (stats['suffix_hits'] / total) * 100
+        fallback_rate = (stats['lemmatizer_be_fallbacks'] / total) * 100
         
         return {
             'total_words': total,
-            'grammardb_hits': self.stats['grammardb_hits'],
-            'lemmatizer_be_fallbacks': self.stats['lemmatizer_be_fallbacks'],
+            'grammardb_hits': stats['grammardb_hits'],
+            'suffix_hits': stats['suffix_hits'],
+            'lemmatizer_be_fallbacks': stats['lemmatizer_be_fallbacks'],
             'grammardb_hit_rate': f"{hit_rate:.1f}%",
+            'suffix_hit_rate': f"{suffix_rate:.1f}%",
             'fallback_rate': f"{fallback_rate:.1f}%",
             'grammardb_loaded': self.grammardb.loaded,
-            'grammardb_size': len(self.grammardb.word_to_lemma) if self.grammardb.loaded else 0
+            'grammardb_size': len(self.grammardb) if self.grammardb.loaded else 0,
+            'suffix_rules': len(self.suffix_guesser) if self.suffix_guesser is not None else 0
         }
     
     def reset_stats(self):
-        """Reset statistics counters"""
-        self.stats = {
-            'total_words': 0,
-            'grammardb_hits': 0,
-            'lemmatizer_be_fallbacks': 0
-        }
+        """Reset process-wide statistics counters"""
+        with self._stats_lock:
+            self.stats = dict.fromkeys(STAT_KEYS, 0)
 
 
 # Singleton instance for caching
 _enhanced_lemmatizer_instance = None
+_enhanced_lemmatizer_lock = threading.Lock()
 
 
 def get_enhanced_lemmatizer(grammardb_path=None):
     """
     Get or create enhanced lemmatizer instance (singleton pattern)
     
+    Safe to call from several sessions at once (created only once).
+    
     Args:
         grammardb_path: Optional path to GrammarDB data file
         
@@ -140,7 +277,9 @@ def get_enhanced_lemmatizer(grammardb_path=None):
     global _enhanced_lemmatizer_instance
     
     if _enhanced_lemmatizer_instance is None:
-        _enhanced_lemmatizer_instance = EnhancedBelarusianLemmatizer(grammardb_path)
+        with _enhanced_lemmatizer_lock:
+            if _enhanced_lemmatizer_instance is None:
+                _enhanced_lemmatizer_instance = EnhancedBelarusianLemmatizer(grammardb_path)
     
     return _enhanced_lemmatizer_instance
 
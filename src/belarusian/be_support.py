@@ -7,17 +7,25 @@ Supports two modes:
 2. Enhanced mode: GrammarDB + lemmatizer_be (faster, more accurate)
 """
 
+import functools
 import streamlit as st
 import os
+import threading
 from lemmatizer_be import BnkorpusLemmatizer  # noqa: E402
 
 # Auto-download GrammarDB if not present (for Streamlit Cloud)
 try:
     from .auto_download import ensure_grammardb_ready
     # This runs once on module import (first app startup)
-    ensure_grammardb_ready()
+    GRAMMARDB_READY = ensure_grammardb_ready()
 except Exception as e:
     print(f"⚠️ Auto-download skipped: {e}")
+    GRAMMARDB_READY = False
+
+from .bnkorpus import lemmatize_tagged
+from .grammardb_artifacts import read_manifest
+from .lacinka import is_lacinka, is_latin, to_cyrillic, transliterate_forms
+from text_normalization import normalize_word, active_profile
 
 # Try to import enhanced lemmatizer (optional)
 try:
@@ -27,12 +35,17 @@ except ImportError:
     ENHANCED_AVAILABLE = False
 
 
-# Configuration: Enable enhanced mode if GrammarDB is available
+# Configuration: Enable enhanced mode only if setup found a complete,
+# verified GrammarDB build (rejected or legacy files are not loaded)
 GRAMMARDB_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "grammardb.json")
-USE_ENHANCED = ENHANCED_AVAILABLE and os.path.exists(GRAMMARDB_PATH)
+USE_ENHANCED = ENHANCED_AVAILABLE and GRAMMARDB_READY
+
+# Basic mode: lemmatizer_be shares one SQLite connection between sessions
+_basic_lemmatizer_lock = threading.Lock()
 
 
 @st.cache_resource
+@functools.cache  # also cached outside the Streamlit runtime
 def get_belarusian_analyzer():
     """
     Initialize and cache the Belarusian lemmatizer
@@ -48,30 +61,117 @@ def get_belarusian_analyzer():
         return BnkorpusLemmatizer()
 
 
-def lemmatize_belarusian(words):
+def lemmatize_belarusian(words, stats=None, tags=None):
     """
     Lemmatize Belarusian words
     
     Automatically uses enhanced lemmatizer if GrammarDB is available,
-    otherwise falls back to basic lemmatizer_be
+    otherwise falls back to basic lemmatizer_be. Safe to call from
+    several sessions at once. Łacinka (Latin-script) forms are
+    transliterated to Cyrillic before the lookup, so their lemmas are
+    Cyrillic (see transliterate_lacinka()).
     
     Args:
         words: List of words to lemmatize
+        stats: Optional dict that receives per-tier counters of this call
+               (enhanced mode only), e.g. per-request statistics, and the
+               number of transliterated Łacinka forms ('lacinka_forms')
+        tags: Optional dict that receives word form -> GrammarDB
+              part-of-speech letter (or None) of every distinct form, from
+              the same lookups as the lemmas
         
     Returns:
         List of lemmas
     """
     analyzer = get_belarusian_analyzer()
-    lemmas = []
     
-    for word in words:
-        # Get the lemma (both basic and enhanced have .lemmatize() method)
-        lemma = analyzer.lemmatize(word)
-        lemmas.append(lemma)
+    original_words = words
+    lacinka = transliterate_lacinka(words)
+    if lacinka:
+        words = [lacinka.get(word, word) for word in words]
+        if stats is not None:
+            stats['lacinka_forms'] = stats.get('lacinka_forms', 0) + len(lacinka)
+    
+    form_tags = {} if tags is not None else None
+    if USE_ENHANCED:
+        lemmas = analyzer.lemmatize_batch(words, stats, form_tags)
+    else:
+        # Each distinct form is looked up once
+        with _basic_lemmatizer_lock:
+            entries = {word: lemmatize_tagged(analyzer, word) for word in dict.fromkeys(words)}
+        lemmas = [entries[word][0] for word in words]
+        if form_tags is not None:
+            form_tags.update((word, pos) for word, (_, pos) in entries.items())
     
+    if tags is not None:
+        # Tags are reported under the forms as given (Łacinka included)
+        tags.update((word, form_tags[lacinka.get(word, word)]) for word in dict.fromkeys(original_words))
     return lemmas
 
 
+def transliterate_lacinka(words):
+    """
+    Find the Łacinka forms among words and map them to Cyrillic
+    
+    Forms with Łacinka-only letters (ł, ŭ, č, ś, ...) are always
+    transliterated. Plain Latin forms (mova, kniha) are ambiguous with
+    foreign words, so they are transliterated only if the same call has
+    Łacinka-only forms and the Cyrillic spelling is in GrammarDB. The
+    Cyrillic spelling is normalized with the active profile, like a
+    Cyrillic token (lon -> лён -> лен with ё folded).
+    
+    Args:
+        words: List of lowercase word forms
+        
+    Returns:
+        dict: Łacinka form -> Cyrillic form, each unique type mapped once
+    """
+    profile = active_profile()
+    lacinka = {word: normalize_word(cyrillic, profile) for word, cyrillic in transliterate_forms(words).items()}
+    if lacinka and USE_ENHANCED:
+        for word in dict.fromkeys(words):
+            if word not in lacinka and is_latin(word):
+                cyrillic = normalize_word(to_cyrillic(word), profile)
+                if is_known_belarusian(cyrillic):
+                    lacinka[word] = cyrillic
+    return lacinka
+
+
+def belarusian_lemma_source(word):
+    """
+    Name the lemmatizer tier that handles a Belarusian word form
+    
+    Łacinka forms are looked up by their Cyrillic spelling, as in
+    lemmatize_belarusian().
+    
+    Args:
+        word: Lowercase word form
+        
+    Returns:
+        str: 'grammardb', 'suffix_rules' or 'lemmatizer_be'
+    """
+    if not USE_ENHANCED:
+        return 'lemmatizer_be'
+    if is_lacinka(word):
+        word = normalize_word(to_cyrillic(word), active_profile())
+    return get_belarusian_analyzer().lemma_source(word)
+
+
+def is_known_belarusian(word):
+    """
+    Check if a word form is in GrammarDB
+    
+    Args:
+        word: Word form to check
+        
+    Returns:
+        bool: True if GrammarDB is loaded and contains the word
+    """
+    if not USE_ENHANCED:
+        return False
+    return get_belarusian_analyzer().grammardb.is_in_dictionary(word)
+
+
 def get_lemmatizer_info():
     """
     Get information about current lemmatizer configuration
@@ -79,11 +179,14 @@ def get_lemmatizer_info():
     Returns:
         dict: Configuration info
     """
+    manifest = read_manifest(GRAMMARDB_PATH)
     return {
         'mode': 'enhanced' if USE_ENHANCED else 'basic',
         'enhanced_available': ENHANCED_AVAILABLE,
         'grammardb_path': GRAMMARDB_PATH if USE_ENHANCED else None,
-        'grammardb_exists': os.path.exists(GRAMMARDB_PATH)
+        'grammardb_exists': os.path.exists(GRAMMARDB_PATH),
+        'grammardb_release': manifest.get('source_release') if manifest else None,
+        'grammardb_built_at': manifest.get('built_at') if manifest else None
     }
 
 
@@ -92,30 +195,36 @@ def get_belarusian_stop_words():
     Returns a set of common Belarusian stop words
     (prepositions, conjunctions, particles, pronouns)
     
-    Note: Includes both Cyrillic and Latin variants of lookalike letters
-    to handle mixed-alphabet texts and keyboard layout typos
+    Note: Latin lookalike letters inside Cyrillic words and single-letter
+    tokens are folded to Cyrillic by text_normalization; tokens spelled
+    entirely with Latin lookalikes stay Latin, so those spellings of short
+    function words are listed as well
     """
     return {
         # Prepositions (прыназоўнікі)
-        'у', 'y', 'ў', 'на', 'з', 'да', 'па', 'пра', 'для', 'з-за', 'з-пад', 'праз',
+        'у', 'ў', 'на', 'з', 'да', 'па', 'пра', 'для', 'з-за', 'з-пад', 'праз',
         'над', 'пад', 'перад', 'каля', 'ля', 'пасля', 'без', 'ад', 'за', 'аб',
         'пры', 'між', 'сярод', 'ля', 'праз',
         
         # Conjunctions (злучнікі)
-        'і', 'i', 'й', 'а', 'a', 'але', 'ці', 'ci', 'альбо', 'што', 'каб', 'калі', 'як', 'хаця',
+        'і', 'й', 'а', 'але', 'ці', 'альбо', 'што', 'каб', 'калі', 'як', 'хаця',
         'таму', 'бо', 'таксама', 'жа',
         
         # Particles (часціцы)
-        'не', 'ne', 'ні', 'б', 'бы', 'ж', 'жа', 'ці', 'ci', 'вось', 'ажно', 'нават', 'толькі',
+        'не', 'ні', 'б', 'бы', 'ж', 'жа', 'ці', 'вось', 'ажно', 'нават', 'толькі',
         'хоць', 'ледзь', 'амаль',
         
         # Pronouns (займеннікі)
         'я', 'ты', 'ён', 'яна', 'яно', 'мы', 'вы', 'яны', 'мой', 'твой', 'свой',
-        'наш', 'ваш', 'яго', 'яе', 'іх', 'ix', 'гэты', 'той', 'такі', 'увесь',
+        'наш', 'ваш', 'яго', 'яе', 'іх', 'гэты', 'той', 'такі', 'увесь',
         'сам', 'самы', 'які', 'чый', 'хто', 'што', 'гэта',
         
         # Common verbs and words
         'быць', 'усё', 'ўсё', 'яшчэ', 'ужо', 'там', 'тут', 'дзе', 'куды',
-        'тады', 'потым', 'цяпер', 'вельмі', 'больш', 'так', 'ды', 'не', 'ne'
+        'тады', 'потым', 'цяпер', 'вельмі', 'больш', 'так', 'ды', 'не',
+        
+        # All-Latin lookalike spellings of ці, іх, не (single-letter tokens
+        # such as a Latin y, i or a are folded to Cyrillic and match у, і, а)
+        'ci', 'ix', 'ne'
     }
 
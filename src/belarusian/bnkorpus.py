@@ -0,0 +1,34 @@
+"""
+lemmatizer_be Lookup With Part of Speech
+lemmatizer_be stores every form as 'lemma|POS' entries but its lemmatize()
+returns only the lemma; this reads the entry once and returns both
+"""
+
+
+def lemmatize_tagged(lemmatizer, word):
+    """
+    Lemmatize a word with lemmatizer_be and keep the part of speech
+
+    Picks the lemma like BnkorpusLemmatizer.lemmatize() (the shortest
+    candidate, the word itself if unknown) from the same single query;
+    equally short candidates are resolved by their stored order instead
+    of set iteration order, so the result is stable between runs. The
+    caller serializes access to the lemmatizer's SQLite connection.
+
+    Args:
+        lemmatizer: BnkorpusLemmatizer instance
+        word: Word form (Cyrillic)
+
+    Returns:
+        tuple: (lemma, pos) with the GrammarDB part-of-speech letter of the
+               chosen lemma, or (word, None) if the form is unknown
+    """
+    row = lemmatizer._conn.execute("SELECT * FROM lemma_data WHERE form = ?", (word,)).fetchone()
+    if not row:
+        return word, None
+
+    candidates = []
+    for entry in row[1].split(";"):
+        lemma, _, pos = entry.partition("|")
+        candidates.append((lemma or word, pos or None))
+    return min(candidates, key=lambda candidate: len(candidate[0]))
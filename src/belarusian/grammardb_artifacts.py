@@ -0,0 +1,275 @@
+"""
+GrammarDB Artifacts
+Builds data/grammardb.json and its suffix rules from a GrammarDB release
+archive, writes them atomically and records a manifest (source release,
+checksums, entry counts, format versions) that is checked at startup
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from zipfile import ZipFile
+
+from atomic_files import atomic_write_json
+from text_normalization import normalize_word, active_profile, DEFAULT_PROFILE
+from .grammardb_handler import GrammarDBIndexBuilder, INDEX_FORMAT
+from .suffix_guesser import build_suffix_rules, save_suffix_rules, suffix_rules_path, SUFFIX_RULES_FORMAT
+
+
+# GrammarDB release the app expects (artifacts of other releases are rebuilt)
+GRAMMARDB_RELEASE = "RELEASE-202601"
+GRAMMARDB_URL = f"https://github.com/Belarus/GrammarDB/releases/download/{GRAMMARDB_RELEASE}/{GRAMMARDB_RELEASE}.zip"
+
+# Manifest layout version
+MANIFEST_FORMAT = 1
+
+def manifest_path(grammardb_path):
+    """Path of the manifest that belongs to a GrammarDB JSON file"""
+    base, _ = os.path.splitext(str(grammardb_path))
+    return f"{base}.manifest.json"
+
+
+def file_sha256(path):
+    """
+    Compute the SHA-256 checksum of a file
+
+    Args:
+        path: File path
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_entry(path):
+    """Size and checksum of an artifact file for the manifest"""
+    return {'size': os.path.getsize(path), 'sha256': file_sha256(path)}
+
+
+def read_manifest(grammardb_path):
+    """
+    Read the manifest of installed GrammarDB artifacts
+
+    Args:
+        grammardb_path: Path to grammardb.json
+
+    Returns:
+        dict: Manifest, or None if missing or unreadable
+    """
+    try:
+        with open(manifest_path(grammardb_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def check_artifacts(grammardb_path, release=GRAMMARDB_RELEASE, verify_checksums=False):
+    """
+    Check installed artifacts against their manifest
+
+    The default check is cheap (manifest, format versions, release and file
+    sizes) and never parses grammardb.json; verify_checksums also hashes the
+    files.
+
+    Args:
+        grammardb_path: Path to grammardb.json
+        release: Expected GrammarDB release (None accepts any complete
+                 build of the current formats)
+        verify_checksums: Compare SHA-256 checksums as well
+
+    Returns:
+        tuple: (ok, reason) - reason describes the first problem found
+    """
+    manifest = read_manifest(grammardb_path)
+    if manifest is None:
+        return False, "manifest missing"
+    if manifest.get('manifest_format') != MANIFEST_FORMAT or \
+            manifest.get('index_format') != INDEX_FORMAT or \
+            manifest.get('suffix_rules_format') != SUFFIX_RULES_FORMAT or \
+            manifest.get('key_profile') != active_profile():
+        return False, "artifact format changed"
+    if release is not None and manifest.get('source_release') != release:
+        return False, f"built from {manifest.get('source_release')}, expected {release}"
+
+    directory = Path(grammardb_path).parent
+    for name, entry in manifest.get('files', {}).items():
+        path = directory / name
+        if not path.exists():
+            return False, f"{name} missing"
+        if path.stat().st_size != entry['size']:
+            return False, f"{name} size mismatch (incomplete write?)"
+        if verify_checksums and file_sha256(path) != entry['sha256']:
+            return False, f"{name} checksum mismatch"
+    return True, "ok"
+
+
+def _clean_form(text, profile=DEFAULT_PROFILE):
+    """
+    GrammarDB spelling normalized like a token
+
+    The '+' stress notation is removed; text_normalization then lowercases,
+    removes combining stress marks and soft hyphens and unifies apostrophe
+    variants (сям’я -> сям'я), as tokenize_text() does. Index keys use the
+    active profile of tokenize_text(), so the handler looks tokens up as
+    they are (artifacts built with another profile are rebuilt); lemmas
+    keep the default spelling that stop lists are written in.
+    """
+    return normalize_word(text.replace('+', ''), profile)
+
+
+def parse_grammardb_xml(xml_content, builder):
+    """
+    Parse GrammarDB XML and add all form→lemma pairs to the index builder
+
+    The part of speech of a paradigm is the first letter of its tag (of
+    the variant tag if the paradigm has none), as in lemmatizer_be.
+    """
+    pairs = 0
+    key_profile = active_profile()
+
+    root = ET.fromstring(xml_content)
+    for paradigm in root.findall('.//Paradigm'):
+        lemma_raw = paradigm.get('lemma')
+        if not lemma_raw:
+            continue
+
+        # Clean lemma (remove stress marks)
+        lemma = _clean_form(lemma_raw)
+        if not lemma:
+            continue
+        headword = _clean_form(lemma_raw, key_profile)
+
+        headword_listed = False
+        paradigm_tag = paradigm.get('tag')
+        variants = paradigm.findall('Variant') or [paradigm]
+        for variant in variants:
+            tag = paradigm_tag or variant.get('tag')
+            if tag:
+                builder.add_pos(lemma, tag[0])
+
+            # Get all forms (ambiguous forms keep every candidate lemma)
+            for form_elem in variant.iter('Form'):
+                if form_elem.text:
+                    word_form = _clean_form(form_elem.text, key_profile)
+                    if word_form:
+                        builder.add(word_form, lemma)
+                        headword_listed = headword_listed or word_form == headword
+                        pairs += 1
+
+        # The headword is a form of its own paradigm; add it only if the
+        # paradigm does not list it, so it gets no extra candidate vote
+        if not headword_listed:
+            builder.add(headword, lemma)
+            pairs += 1
+
+    return pairs
+
+
+def _collect_pairs(xml_dir, builder):
+    """
+    Parse every XML file under a directory into the builder
+
+    Raises:
+        ValueError: If there are no XML files or any file fails to parse
+                    (a dictionary with missing parts is not installed)
+    """
+    xml_files = sorted(Path(xml_dir).glob("**/*.xml"))
+    if not xml_files:
+        raise ValueError(f"No XML files found in {xml_dir}")
+
+    print(f"📄 Found {len(xml_files)} XML files")
+    failed = []
+    for xml_file in xml_files:
+        try:
+            pairs = parse_grammardb_xml(xml_file.read_text(encoding='utf-8'), builder)
+            print(f"   ✅ {xml_file.name}: {pairs:,} form-lemma pairs")
+        except (OSError, UnicodeDecodeError, ET.ParseError) as e:
+            print(f"   ❌ {xml_file.name}: {e}")
+            failed.append(xml_file.name)
+    if failed:
+        raise ValueError(f"{len(failed)} of {len(xml_files)} XML files failed to parse: {', '.join(failed[:5])}")
+
+
+def build_grammardb_artifacts(source, grammardb_path, release=GRAMMARDB_RELEASE, lemma_priors=None):
+    """
+    Build grammardb.json, its suffix rules and the manifest
+
+    Works offline from a local release archive (.zip) or a directory of
+    extracted XML files. Each file is written atomically and the manifest
+    goes last, so an interrupted build never looks like a valid install.
+
+    Args:
+        source: Path to a GrammarDB .zip archive or XML directory
+        grammardb_path: Target path of grammardb.json
+        release: Release name recorded in the manifest
+        lemma_priors: Optional dict of lemma -> frequency for candidate ranking
+
+    Returns:
+        dict: The written manifest
+
+    Raises:
+        ValueError: If the source contains no XML files or one of them
+                    cannot be parsed (nothing is written then)
+    """
+    source = Path(source)
+    builder = GrammarDBIndexBuilder()
+
+    if source.is_dir():
+        source_sha256 = None
+        _collect_pairs(source, builder)
+    else:
+        source_sha256 = file_sha256(source)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            print("📂 Extracting and parsing XML files...")
+            with ZipFile(source, 'r') as zip_file:
+                zip_file.extractall(temp_dir)
+            _collect_pairs(temp_dir, builder)
+
+    index = builder.build(lemma_priors)
+
+    # Invalidate the old manifest first: until the new one is written the
+    # install counts as incomplete
+    Path(manifest_path(grammardb_path)).unlink(missing_ok=True)
+    print(f"💾 Saving {len(index['forms']):,} word forms to JSON...")
+    atomic_write_json(grammardb_path, index)
+
+    # Learn suffix rules for out-of-dictionary words while the forms are in memory
+    rules_path = suffix_rules_path(str(grammardb_path))
+    rules = build_suffix_rules(builder.best_lemmas())
+    save_suffix_rules(rules_path, rules, len(index['forms']))
+
+    manifest = {
+        'manifest_format': MANIFEST_FORMAT,
+        'source_release': release,
+        'source_sha256': source_sha256,
+        'index_format': INDEX_FORMAT,
+        'suffix_rules_format': SUFFIX_RULES_FORMAT,
+        'key_profile': active_profile(),
+        'built_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'forms': len(index['forms']),
+        'lemmas': len(index['lemmas']),
+        'candidates': len(index['candidates']),
+        'suffix_rules': len(rules),
+        'has_priors': index['priors'] is not None,
+        'has_pos': index['pos'] is not None,
+        'files': {
+            Path(grammardb_path).name: _file_entry(grammardb_path),
+            Path(rules_path).name: _file_entry(rules_path)
+        }
+    }
+    atomic_write_json(manifest_path(grammardb_path), manifest)
+
+    file_size = manifest['files'][Path(grammardb_path).name]['size'] / (1024 * 1024)
+    print(f"✅ GrammarDB saved: {grammardb_path} ({file_size:.1f} MB)")
+    print(f"📊 Total: {manifest['forms']:,} word forms, {manifest['lemmas']:,} unique lemmas, "
+          f"{manifest['suffix_rules']:,} suffix rules ({release})")
+    return manifest
@@ -5,13 +5,163 @@ Handles loading and lookup from GrammarDB Belarusian grammar database
 
 import json
 import os
+import threading
+from array import array
+from collections import Counter
 from pathlib import Path
 
 
+# Index file format written by GrammarDBIndexBuilder; older index formats
+# that can still be read (without parts of speech)
+INDEX_FORMAT = "grammardb-index/3"
+READABLE_INDEX_FORMATS = (INDEX_FORMAT, "grammardb-index/2")
+
+# Part-of-speech placeholder for lemmas without a paradigm tag
+NO_POS = '-'
+
+
+class GrammarDBIndexBuilder:
+    """
+    Collects form -> lemma pairs from GrammarDB paradigms and builds the
+    multi-candidate index (all lemmas of each form, best candidate first)
+    with the part of speech of each lemma
+    """
+    
+    def __init__(self):
+        """Initialize empty builder"""
+        # form -> Counter of lemma -> number of paradigms/variants with this pair
+        # (Counter keeps first-seen order for equal counts)
+        self.pairs = {}
+        # lemma -> Counter of part-of-speech letters of its paradigms
+        self.lemma_pos = {}
+    
+    def add(self, form, lemma):
+        """
+        Add one form -> lemma pair
+        
+        Args:
+            form: Normalized word form
+            lemma: Its lemma
+        """
+        candidates = self.pairs.get(form)
+        if candidates is None:
+            candidates = self.pairs[form] = Counter()
+        candidates[lemma] += 1
+    
+    def add_pos(self, lemma, pos):
+        """
+        Record the part of speech of one paradigm of a lemma
+        
+        Args:
+            lemma: Lemma
+            pos: GrammarDB part-of-speech letter ('N', 'V', ...)
+        """
+        tags = self.lemma_pos.get(lemma)
+        if tags is None:
+            tags = self.lemma_pos[lemma] = Counter()
+        tags[pos] += 1
+    
+    def __len__(self):
+        return len(self.pairs)
+    
+    def build(self, lemma_priors=None):
+        """
+        Build the CSR index data
+        
+        Candidates of each form are ordered by prior (if given), then by the
+        number of paradigms that produce the pair, then by first occurrence.
+        
+        Args:
+            lemma_priors: Optional dict of lemma -> corpus frequency; stored
+                          per candidate as the share among the form's lemmas
+            
+        Returns:
+            dict: JSON-serializable index (format, lemmas, forms, offsets,
+                  candidates, priors, pos). 'pos' holds one letter per lemma
+                  (the tag of most of its paradigms, NO_POS if untagged), or
+                  None if no paradigm was tagged.
+        """
+        lemma_ids = {}
+        forms = []
+        offsets = [0]
+        candidates = []
+        priors = [] if lemma_priors is not None else None
+        
+        for form, counts in self.pairs.items():
+            ranked = list(counts)
+            if lemma_priors is not None:
+                ranked.sort(key=lambda lemma: (lemma_priors.get(lemma, 0), counts[lemma]), reverse=True)
+                total = sum(lemma_priors.get(lemma, 0) for lemma in ranked)
+                priors.extend(
+                    round(lemma_priors.get(lemma, 0) / total, 4) if total else round(1 / len(ranked), 4)
+                    for lemma in ranked
+                )
+            else:
+                ranked.sort(key=counts.get, reverse=True)
+            
+            forms.append(form)
+            candidates.extend(lemma_ids.setdefault(lemma, len(lemma_ids)) for lemma in ranked)
+            offsets.append(len(candidates))
+        
+        pos = None
+        if self.lemma_pos:
+            pos = ''.join(
+                self.lemma_pos[lemma].most_common(1)[0][0] if lemma in self.lemma_pos else NO_POS
+                for lemma in lemma_ids
+            )
+        
+        return {
+            'format': INDEX_FORMAT,
+            'lemmas': list(lemma_ids),
+            'forms': forms,
+            'offsets': offsets,
+            'candidates': candidates,
+            'priors': priors,
+            'pos': pos
+        }
+    
+    def best_lemmas(self):
+        """
+        Get the single best lemma per form (without priors)
+        
+        Returns:
+            dict: form -> lemma
+        """
+        return {form: counts.most_common(1)[0][0] for form, counts in self.pairs.items()}
+
+
+def load_lemma_priors(path):
+    """
+    Read a lemma frequency list ("lemma count" per line)
+    
+    Args:
+        path: Frequency list file
+        
+    Returns:
+        dict: lemma -> frequency
+    """
+    priors = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2 and fields[1].isdigit():
+                priors[fields[0].lower()] = priors.get(fields[0].lower(), 0) + int(fields[1])
+    return priors
+
+
 class GrammarDBHandler:
     """
     Handler for GrammarDB - Belarusian grammar database
     Provides fast dictionary lookup for word lemmatization
+    
+    Storage is CSR-like: form -> row number, row offsets into one array of
+    lemma IDs (best candidate first) and an optional parallel array of
+    priors. Most forms have a single candidate, so memory stays close to
+    a plain form -> lemma map. Parts of speech are one string with a
+    letter per lemma ID.
+    
+    The index is never modified after loading, so one handler can serve
+    lookups from all sessions and threads without locking.
     """
     
     def __init__(self, grammardb_path=None):
@@ -22,12 +172,21 @@ class GrammarDBHandler:
             grammardb_path: Path to GrammarDB data file (JSON format)
                           If None, looks for default location
         """
-        self.word_to_lemma = {}
-        self.loaded = False
+        self._clear()
         
         if grammardb_path and os.path.exists(grammardb_path):
             self.load_database(grammardb_path)
     
+    def _clear(self):
+        """Reset to an empty, unloaded index"""
+        self.form_rows = {}
+        self.lemmas = []
+        self.offsets = array('I', [0])
+        self.candidates = array('I')
+        self.priors = None
+        self.lemma_tags = None
+        self.loaded = False
+    
     def load_database(self, grammardb_path):
         """
         Load GrammarDB dictionary into memory
@@ -35,62 +194,174 @@ class GrammarDBHandler:
         Args:
             grammardb_path: Path to GrammarDB JSON file
             
-        Expected JSON format:
+        Expected JSON format (index written by the converters):
+        {
+            "format": "grammardb-index/2",
+            "lemmas": ["хлопчык", ...],
+            "forms": ["хлопчык", "хлопчыка", ...],
+            "offsets": [0, 1, 2, ...],
+            "candidates": [0, 0, ...],
+            "priors": null,
+            "pos": "NN..."
+        }
+        
+        The legacy single-lemma format is still accepted:
         {
             "хлопчык": "хлопчык",
             "хлопчыка": "хлопчык",
-            "хлопчыкі": "хлопчык",
             ...
         }
         """
         try:
             with open(grammardb_path, 'r', encoding='utf-8') as f:
-                self.word_to_lemma = json.load(f)
+                data = json.load(f)
+            
+            if data.get('format') in READABLE_INDEX_FORMATS:
+                self._load_index(data)
+            else:
+                self._load_legacy(data)
             self.loaded = True
-            print(f"✅ GrammarDB loaded: {len(self.word_to_lemma):,} word forms")
+            print(f"✅ GrammarDB loaded: {len(self.form_rows):,} word forms")
         except FileNotFoundError:
             print(f"⚠️ GrammarDB file not found: {grammardb_path}")
-            self.loaded = False
+            self._clear()
         except json.JSONDecodeError as e:
             print(f"❌ Error parsing GrammarDB file: {e}")
-            self.loaded = False
+            self._clear()
         except Exception as e:
             print(f"❌ Error loading GrammarDB: {e}")
-            self.loaded = False
+            self._clear()
+    
+    def _load_index(self, data):
+        """Load the multi-candidate index format"""
+        forms = data['forms']
+        self.form_rows = dict(zip(forms, range(len(forms))))
+        self.lemmas = data['lemmas']
+        self.offsets = array('I', data['offsets'])
+        self.candidates = array('I', data['candidates'])
+        self.priors = array('f', data['priors']) if data.get('priors') is not None else None
+        self.lemma_tags = data.get('pos')
+    
+    def _load_legacy(self, word_to_lemma):
+        """Load the legacy form -> lemma map (one candidate per form)"""
+        lemma_ids = {}
+        self.form_rows = dict(zip(word_to_lemma, range(len(word_to_lemma))))
+        self.candidates = array('I', (lemma_ids.setdefault(lemma, len(lemma_ids)) for lemma in word_to_lemma.values()))
+        self.offsets = array('I', range(len(word_to_lemma) + 1))
+        self.lemmas = list(lemma_ids)
+        self.priors = None
+        self.lemma_tags = None
     
     def lookup(self, word):
         """
         Look up word in GrammarDB dictionary
         
         Args:
-            word: Word form to look up
+            word: Normalized word form (lowercase, see text_normalization);
+                  tokenize_text() already normalizes every token type once
             
         Returns:
-            str: Lemma if found, None if not found
+            str: Best lemma if found, None if not found
         """
-        if not self.loaded:
+        row = self.form_rows.get(word)
+        if row is None:
             return None
         
-        # Normalize word (lowercase)
-        word_normalized = word.lower().strip()
+        # Best candidate is stored first in the row
+        return self.lemmas[self.candidates[self.offsets[row]]]
+    
+    def lookup_tagged(self, word):
+        """
+        Look up the best lemma of a word form with its part of speech
         
-        # Fast dictionary lookup - O(1)
-        return self.word_to_lemma.get(word_normalized)
+        Args:
+            word: Normalized word form (lowercase, see text_normalization)
+            
+        Returns:
+            tuple: (lemma, pos) with the GrammarDB part-of-speech letter
+                   (None if the index has no tags), or (None, None) if the
+                   form is not in GrammarDB
+        """
+        row = self.form_rows.get(word)
+        if row is None:
+            return None, None
+        
+        lemma_id = self.candidates[self.offsets[row]]
+        return self.lemmas[lemma_id], self._pos_of(lemma_id)
+    
+    def lemma_pos(self, lemma):
+        """
+        Part of speech of a lemma (e.g. one guessed by the suffix rules)
+        
+        Args:
+            lemma: Lemma
+            
+        Returns:
+            str: GrammarDB part-of-speech letter, or None if the lemma is
+                 not a GrammarDB lemma or the index has no tags
+        """
+        row = self.form_rows.get(lemma)
+        if row is None or self.lemma_tags is None:
+            return None
+        for i in range(self.offsets[row], self.offsets[row + 1]):
+            if self.lemmas[self.candidates[i]] == lemma:
+                return self._pos_of(self.candidates[i])
+        return None
+    
+    def _pos_of(self, lemma_id):
+        """Part-of-speech letter of a lemma ID (None if untagged)"""
+        if self.lemma_tags is None:
+            return None
+        pos = self.lemma_tags[lemma_id]
+        return None if pos == NO_POS else pos
+    
+    def lookup_candidates(self, word):
+        """
+        Look up all candidate lemmas of a word form
+        
+        Args:
+            word: Normalized word form (lowercase, see text_normalization)
+            
+        Returns:
+            list: Tuples of (lemma, prior), best first; prior is None when
+                  the index was built without frequency priors. Empty list
+                  if the form is not in GrammarDB.
+        """
+        row = self.form_rows.get(word)
+        if row is None:
+            return []
+        
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return [
+            (self.lemmas[self.candidates[i]], round(self.priors[i], 4) if self.priors is not None else None)
+            for i in range(start, end)
+        ]
     
     def is_in_dictionary(self, word):
         """
         Check if word exists in GrammarDB
         
         Args:
-            word: Word to check
+            word: Normalized word form (lowercase, see text_normalization)
             
         Returns:
             bool: True if word is in dictionary, False otherwise
         """
-        if not self.loaded:
-            return False
+        return word in self.form_rows
+    
+    def items(self):
+        """
+        Iterate over (form, best lemma) pairs
         
-        return word.lower().strip() in self.word_to_lemma
+        Yields:
+            tuple: (form, lemma)
+        """
+        lemmas, candidates, offsets = self.lemmas, self.candidates, self.offsets
+        for form, row in self.form_rows.items():
+            yield form, lemmas[candidates[offsets[row]]]
+    
+    def __len__(self):
+        return len(self.form_rows)
     
     def get_stats(self):
         """
@@ -101,19 +372,28 @@ class GrammarDBHandler:
         """
         return {
             'loaded': self.loaded,
-            'total_forms': len(self.word_to_lemma),
-            'unique_lemmas': len(set(self.word_to_lemma.values())) if self.loaded else 0
+            'total_forms': len(self.form_rows),
+            'unique_lemmas': len(self.lemmas),
+            'ambiguous_forms': sum(
+                1 for row in range(len(self.form_rows)) if self.offsets[row + 1] - self.offsets[row] > 1
+            ),
+            'has_priors': self.priors is not None,
+            'has_pos': self.lemma_tags is not None
         }
 
 
 # Singleton instance for caching
 _grammardb_instance = None
+_grammardb_lock = threading.Lock()
 
 
 def get_grammardb_handler(grammardb_path=None):
     """
     Get or create GrammarDB handler instance (singleton pattern)
     
+    Safe to call from several sessions at once: the index is loaded only
+    once even if the first calls race.
+    
     Args:
         grammardb_path: Path to GrammarDB data file
         
@@ -123,7 +403,9 @@ def get_grammardb_handler(grammardb_path=None):
     global _grammardb_instance
     
     if _grammardb_instance is None:
-        _grammardb_instance = GrammarDBHandler(grammardb_path)
+        with _grammardb_lock:
+            if _grammardb_instance is None:
+                _grammardb_instance = GrammarDBHandler(grammardb_path)
     
     return _grammardb_instance
 
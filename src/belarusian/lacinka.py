@@ -0,0 +1,182 @@
+"""
+Belarusian Łacinka (Latin Script)
+Transliteration between Łacinka and Cyrillic (narkamaŭka spelling, as in
+GrammarDB and lemmatizer_be), so Latin-script word forms can be looked
+up in the Cyrillic dictionaries and results shown in either script
+"""
+
+import re
+
+
+# Scripts for displaying results: key -> display name
+SCRIPTS = {
+    'cyrillic': "Кириллица",
+    'lacinka': "Łacinka (латинка)"
+}
+
+# Letters that occur in Belarusian Łacinka but not in English
+LACINKA_LETTERS = "ćčłńśšŭźž"
+LACINKA_SIGNATURE = re.compile(f"[{LACINKA_LETTERS}]")
+LATIN_WORD = re.compile(f"^[a-z{LACINKA_LETTERS}]+(?:'[a-z{LACINKA_LETTERS}]+)*$")
+
+# Łacinka -> Cyrillic, single letters ('l' and the soft-vowel
+# combinations with i/j are handled by the scanner)
+_TO_CYRILLIC = {
+    'a': 'а', 'b': 'б', 'c': 'ц', 'ć': 'ць', 'č': 'ч', 'd': 'д', 'e': 'э',
+    'f': 'ф', 'g': 'г', 'h': 'г', 'i': 'і', 'j': 'й', 'k': 'к', 'l': 'ль',
+    'ł': 'л', 'm': 'м', 'n': 'н', 'ń': 'нь', 'o': 'о', 'p': 'п', 'r': 'р',
+    's': 'с', 'ś': 'сь', 'š': 'ш', 't': 'т', 'u': 'у', 'ŭ': 'ў', 'v': 'в',
+    'w': 'в', 'y': 'ы', 'z': 'з', 'ź': 'зь', 'ž': 'ж', "'": "'"
+}
+# Vowel after i/j/l (soft): a -> я, e -> е, o -> ё, u -> ю
+_SOFT_VOWELS = {'a': 'я', 'e': 'е', 'o': 'ё', 'u': 'ю'}
+_LATIN_VOWELS = set("aeiouyŭ")
+# ć ś ź ń lose the soft sign before a softened consonant (assimilative
+# softness is not written in narkamaŭka: śviet -> свет)
+_SOFT_CONSONANTS = set("ćśźń")
+
+# Cyrillic -> Łacinka
+_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'ж': 'ž',
+    'з': 'z', 'і': 'i', 'и': 'i', 'й': 'j', 'к': 'k', 'л': 'ł', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ў': 'ŭ', 'ф': 'f', 'х': 'ch', 'ц': 'c', 'ч': 'č', 'ш': 'š', 'ы': 'y',
+    'э': 'e', 'ь': '', "'": '', 'щ': 'šč', 'ъ': ''
+}
+_CYRILLIC_SOFT_VOWELS = {'я': 'a', 'е': 'e', 'ё': 'o', 'ю': 'u'}
+_CYRILLIC_VOWELS = set("аеёіиоуыэюяў")
+_SOFTENED_LATIN = {'л': 'l', 'с': 'ś', 'з': 'ź', 'ц': 'ć', 'н': 'ń'}
+
+
+def is_lacinka(word):
+    """
+    True if a lowercase token is written in Łacinka letters and contains
+    at least one letter that is specific to Belarusian Łacinka
+
+    Args:
+        word: Lowercase token
+
+    Returns:
+        bool: True for words like 'biełaruskaja' or 'ŭsio'
+    """
+    return LACINKA_SIGNATURE.search(word) is not None and LATIN_WORD.match(word) is not None
+
+
+def is_latin(word):
+    """True if a lowercase token consists of Latin (incl. Łacinka) letters only"""
+    return LATIN_WORD.match(word) is not None
+
+
+def to_cyrillic(word):
+    """
+    Transliterate a lowercase Łacinka word to Cyrillic in one pass
+
+    Args:
+        word: Lowercase Łacinka word
+
+    Returns:
+        str: Cyrillic spelling (unknown characters are kept)
+    """
+    out = []
+    i = 0
+    n = len(word)
+    while i < n:
+        char = word[i]
+        following = word[i + 1] if i + 1 < n else ''
+        previous_consonant = i > 0 and word[i - 1] not in _LATIN_VOWELS and word[i - 1] != "'"
+
+        if char == 'c' and following == 'h':
+            out.append('х')
+            i += 2
+        elif char == 'l' and following in _SOFT_VOWELS:
+            out.append('л' + _SOFT_VOWELS[following])
+            i += 2
+        elif char == 'l' and following == 'i':
+            out.append('л')
+            i += 1
+        elif char == 'i' and following in _SOFT_VOWELS and previous_consonant:
+            # biełaruski: consonant + ie -> е
+            out.append(_SOFT_VOWELS[following])
+            i += 2
+        elif char == 'j' and following in _SOFT_VOWELS:
+            # Separating apostrophe after a consonant: siamja -> сям'я
+            out.append(("'" if previous_consonant else '') + _SOFT_VOWELS[following])
+            i += 2
+        elif char == 'j' and following == 'i' and not previous_consonant:
+            out.append('і')
+            i += 2
+        elif char in _SOFT_CONSONANTS and _softened(word, i + 1):
+            out.append(_TO_CYRILLIC[char][0])
+            i += 1
+        else:
+            out.append(_TO_CYRILLIC.get(char, char))
+            i += 1
+    return ''.join(out)
+
+
+def _softened(word, i):
+    """True if the consonant at position i is soft (followed by i, ia, ie...)"""
+    if i >= len(word) or word[i] in _LATIN_VOWELS or word[i] == "'":
+        return False
+    if word[i] in _SOFT_CONSONANTS or word[i] == 'l':
+        return True
+    following = word[i + 1] if i + 1 < len(word) else ''
+    return following == 'i'
+
+
+def to_lacinka(word):
+    """
+    Transliterate a lowercase Cyrillic Belarusian word to Łacinka
+
+    A consonant is written soft only before a softening letter, so a
+    word-final hard л stays ł: стол -> stoł, сакол -> sakoł, but
+    моладзь -> moładź; to_cyrillic() restores the Cyrillic spelling.
+
+    Args:
+        word: Lowercase Cyrillic word
+
+    Returns:
+        str: Łacinka spelling (unknown characters are kept)
+    """
+    out = []
+    n = len(word)
+    for i, char in enumerate(word):
+        previous = word[i - 1] if i > 0 else ''
+        following = word[i + 1] if i + 1 < n else ''
+
+        if char in _CYRILLIC_SOFT_VOWELS:
+            vowel = _CYRILLIC_SOFT_VOWELS[char]
+            if previous == 'л':
+                out.append(vowel)  # л was written as soft l
+            elif previous and previous not in _CYRILLIC_VOWELS and previous not in "'ь":
+                out.append('i' + vowel)
+            else:
+                out.append('j' + vowel)
+        elif char in _SOFTENED_LATIN and following and following in "ьяеёюі":
+            out.append(_SOFTENED_LATIN[char] if char == 'л' or following == 'ь' else _TO_LATIN[char])
+        elif char in _SOFTENED_LATIN and char != 'л' and _cyrillic_softened(word, i + 1):
+            # Assimilative softness: снег -> śnieh
+            out.append(_SOFTENED_LATIN[char])
+        else:
+            out.append(_TO_LATIN.get(char, char))
+    return ''.join(out)
+
+
+def _cyrillic_softened(word, i):
+    """True if the consonant at position i is followed by a softening letter"""
+    if i + 1 >= len(word) or word[i] in _CYRILLIC_VOWELS or word[i] in "'ь":
+        return False
+    return word[i + 1] in "ьяеёюі"
+
+
+def transliterate_forms(words):
+    """
+    Map the Łacinka forms of a word list to Cyrillic, each unique type once
+
+    Args:
+        words: List of lowercase word forms
+
+    Returns:
+        dict: Łacinka form -> Cyrillic form (only forms with Łacinka letters)
+    """
+    return {word: to_cyrillic(word) for word in dict.fromkeys(words) if is_lacinka(word)}
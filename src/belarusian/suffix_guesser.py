@@ -0,0 +1,207 @@
+"""
+Suffix Lemma Guesser
+Guesses lemmas of words missing from GrammarDB with ending-rewrite rules
+learned from the GrammarDB paradigms
+"""
+
+import json
+import os
+from collections import Counter, defaultdict
+
+from atomic_files import atomic_write_json
+
+
+# Rule file format version (bump when the layout changes)
+SUFFIX_RULES_FORMAT = 2
+
+# Longest word ending used as a rule key
+MAX_SUFFIX_LENGTH = 7
+
+# Extra stem letters kept in a key beyond the changed ending
+# (e.g. "а" + 2 -> "ыка" separates хлопчыка from other -а forms)
+CONTEXT_LENGTH = 4
+
+# A rule is used only if it explains this share of the dictionary forms
+# with the same ending and is backed by at least MIN_SUPPORT of them
+MIN_CONFIDENCE = 0.9
+MIN_SUPPORT = 5
+
+# Shortest stem left after stripping the ending
+MIN_STEM_LENGTH = 2
+
+
+def _rewrite_rule(form, lemma):
+    """
+    Describe form -> lemma as an ending rewrite
+
+    Returns:
+        tuple: (strip, append) - number of letters removed from the end of
+               the form and the ending added in their place
+    """
+    common = 0
+    for a, b in zip(form, lemma):
+        if a != b:
+            break
+        common += 1
+    return len(form) - common, lemma[common:]
+
+
+def build_suffix_rules(word_to_lemma, max_suffix_length=MAX_SUFFIX_LENGTH):
+    """
+    Learn ending-rewrite rules from a form -> lemma dictionary
+
+    Each form contributes its rewrite rule to every ending of the form from
+    the changed part plus CONTEXT_LENGTH letters up to max_suffix_length.
+    For each ending only the most frequent rule is kept, with its share
+    (confidence) of all dictionary forms that end with it (support), the
+    same forms guess() would apply the ending to. Forms whose own rewrite
+    falls outside the window still count against the rule.
+
+    Args:
+        word_to_lemma: Dictionary of word form -> lemma (e.g. GrammarDB)
+        max_suffix_length: Longest ending used as a key
+
+    Returns:
+        dict: ending -> [strip, append, confidence, support]
+    """
+    rule_counts = defaultdict(Counter)
+    ending_counts = Counter()
+    for form, lemma in word_to_lemma.items():
+        for length in range(1, min(max_suffix_length, len(form) - MIN_STEM_LENGTH) + 1):
+            ending_counts[form[-length:]] += 1
+        strip, append = _rewrite_rule(form, lemma)
+        if strip > max_suffix_length or len(form) - strip < MIN_STEM_LENGTH:
+            continue
+        shortest = max(strip, 1)
+        longest = min(strip + CONTEXT_LENGTH, max_suffix_length, len(form) - MIN_STEM_LENGTH)
+        for length in range(shortest, longest + 1):
+            rule_counts[form[-length:]][(strip, append)] += 1
+
+    rules = {}
+    for suffix, counts in rule_counts.items():
+        support = ending_counts[suffix]
+        if support < MIN_SUPPORT:
+            continue
+        (strip, append), best = counts.most_common(1)[0]
+        rules[suffix] = [strip, append, round(best / support, 4), support]
+    return rules
+
+
+def save_suffix_rules(path, rules, source_forms):
+    """
+    Write suffix rules as JSON
+
+    Args:
+        path: Output file path
+        rules: Result of build_suffix_rules()
+        source_forms: Number of dictionary forms the rules were learned from
+                      (used to detect a rebuilt dictionary)
+    """
+    atomic_write_json(path, {
+        'format': SUFFIX_RULES_FORMAT,
+        'max_suffix_length': MAX_SUFFIX_LENGTH,
+        'source_forms': source_forms,
+        'rules': rules
+    })
+
+
+def build_suffix_rules_file(word_to_lemma, path):
+    """
+    Learn suffix rules from a dictionary and save them next to it
+
+    Called when GrammarDB is converted, so the app only loads the result.
+
+    Args:
+        word_to_lemma: Dictionary of word form -> lemma
+        path: Output file path
+
+    Returns:
+        int: Number of rules written
+    """
+    rules = build_suffix_rules(word_to_lemma)
+    save_suffix_rules(path, rules, len(word_to_lemma))
+    print(f"✅ Suffix rules saved: {path} ({len(rules):,} endings)")
+    return len(rules)
+
+
+def suffix_rules_path(grammardb_path):
+    """Path of the suffix rule file that belongs to a GrammarDB JSON file"""
+    base, _ = os.path.splitext(grammardb_path)
+    return f"{base}_suffixes.json"
+
+
+class SuffixGuesser:
+    """
+    Lemma guesser for out-of-dictionary words
+
+    Rules are stored in a flat dict keyed by word ending (a hashed suffix
+    trie), so a guess costs at most MAX_SUFFIX_LENGTH dict lookups.
+    The longest known ending decides; if its rule is not confident enough
+    the word is left to the slower lemmatizer.
+    """
+
+    def __init__(self, rules=None, max_suffix_length=MAX_SUFFIX_LENGTH, min_confidence=MIN_CONFIDENCE):
+        """
+        Initialize guesser
+
+        Args:
+            rules: ending -> [strip, append, confidence, support]
+            max_suffix_length: Longest ending used as a key
+            min_confidence: Lowest rule confidence accepted as a guess
+        """
+        self.rules = rules or {}
+        self.max_suffix_length = max_suffix_length
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def from_file(cls, path, source_forms=None):
+        """
+        Load rules saved by save_suffix_rules()
+
+        Args:
+            path: Rule file path
+            source_forms: Expected number of dictionary forms; rules learned
+                          from another dictionary build are not used
+
+        Returns:
+            SuffixGuesser or None if the file is missing or outdated
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Error loading suffix rules {path}: {e}")
+            return None
+
+        if data.get('format') != SUFFIX_RULES_FORMAT or \
+                (source_forms is not None and data.get('source_forms') != source_forms):
+            print(f"⚠️ Suffix rules {path} do not match the dictionary, ignoring them")
+            return None
+        return cls(data['rules'], data.get('max_suffix_length', MAX_SUFFIX_LENGTH))
+
+    def guess(self, word):
+        """
+        Guess the lemma of a word from its ending
+
+        Args:
+            word: Lowercase word form
+
+        Returns:
+            str: Lemma, or None if no confident rule applies
+        """
+        rules = self.rules
+        for length in range(min(self.max_suffix_length, len(word) - MIN_STEM_LENGTH), 0, -1):
+            rule = rules.get(word[-length:])
+            if rule is None:
+                continue
+            strip, append, confidence, _ = rule
+            if confidence < self.min_confidence:
+                # Longest matching ending is ambiguous
+                return None
+            return (word[:-strip] if strip else word) + append
+        return None
+
+    def __len__(self):
+        return len(self.rules)
@@ -0,0 +1,282 @@
+"""
+Collocation Analysis
+Counts lemma bigrams/trigrams as packed integer keys and scores them
+with PMI, log-likelihood and t-score
+"""
+
+import numpy as np
+import streamlit as st
+
+
+# Supported association measures: key -> display name
+MEASURES = {
+    'log_likelihood': 'Log-likelihood',
+    'pmi': 'PMI',
+    't_score': 't-score'
+}
+
+
+def count_ngrams(lemma_ids, vocab_size, n=2, stop_mask=None):
+    """
+    Count n-grams of lemma IDs encoded as packed integer keys
+
+    Each n-gram (a, b, c) is packed into one int64 key
+    ((a * V) + b) * V + c, where V is the vocabulary size. Windows that
+    contain a stop word are dropped before counting, so stop words never
+    take part in an n-gram.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        vocab_size: Number of distinct lemma IDs
+        n: N-gram length (2 or more)
+        stop_mask: Optional boolean array over lemma IDs marking stop words
+
+    Returns:
+        tuple: (keys, counts) - sorted unique keys and their frequencies
+
+    Raises:
+        ValueError: If n < 2 or the keys would not fit into int64
+    """
+    if n < 2:
+        raise ValueError(f"N-gram length must be at least 2, got {n}")
+    if vocab_size ** n > np.iinfo(np.int64).max:
+        raise ValueError(f"Vocabulary of {vocab_size:,} lemmas is too large for {n}-gram keys")
+
+    ids = np.asarray(lemma_ids, dtype=np.int64)
+    num_windows = len(ids) - n + 1
+    if num_windows <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Pack each window into a single integer key
+    keys = ids[:num_windows].copy()
+    for offset in range(1, n):
+        keys *= vocab_size
+        keys += ids[offset:offset + num_windows]
+
+    # Apply the stop-word mask: keep only windows without stop words
+    if stop_mask is not None:
+        token_is_stop = stop_mask[ids]
+        valid = ~token_is_stop[:num_windows]
+        for offset in range(1, n):
+            valid &= ~token_is_stop[offset:offset + num_windows]
+        keys = keys[valid]
+
+    keys, counts = np.unique(keys, return_counts=True)
+    return keys, counts.astype(np.int64)
+
+
+def unpack_ngram_keys(keys, vocab_size, n):
+    """
+    Split packed n-gram keys back into their lemma ID components
+
+    Args:
+        keys: numpy array of packed n-gram keys
+        vocab_size: Vocabulary size used for packing
+        n: N-gram length
+
+    Returns:
+        list: n numpy arrays, one per position in the n-gram
+    """
+    components = []
+    rest = np.asarray(keys, dtype=np.int64)
+    for _ in range(n):
+        rest, component = np.divmod(rest, vocab_size)
+        components.append(component)
+    return components[::-1]
+
+
+def _log_likelihood(observed, row_total, col_total, total):
+    """
+    Dunning's log-likelihood (G2) for 2x2 contingency tables, vectorized
+
+    The sign is negative when the n-gram occurs less often than expected,
+    so repelling pairs sort below attracting ones.
+    """
+    table = np.stack([
+        observed,
+        row_total - observed,
+        col_total - observed,
+        total - row_total - col_total + observed
+    ]).astype(np.float64)
+    expected = np.stack([
+        row_total * col_total,
+        row_total * (total - col_total),
+        (total - row_total) * col_total,
+        (total - row_total) * (total - col_total)
+    ]).astype(np.float64) / total
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(table > 0, table * np.log(table / expected), 0.0)
+    g2 = 2.0 * terms.sum(axis=0)
+    return np.where(observed < expected[0], -g2, g2)
+
+
+def score_collocations(lemma_ids, vocab_size, n=2, stop_mask=None, min_count=1):
+    """
+    Count n-grams and compute association scores for each of them
+
+    PMI and t-score compare the observed count with the count expected
+    if all n lemmas were independent (unigram probabilities over
+    non-stop tokens). Log-likelihood uses the 2x2 table of the
+    (n-1)-gram prefix against the last lemma.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        vocab_size: Number of distinct lemma IDs
+        n: N-gram length (2 for bigrams, 3 for trigrams)
+        stop_mask: Optional boolean array over lemma IDs marking stop words
+        min_count: Drop n-grams seen fewer times than this (after counting
+                   marginals, so scores stay exact). Pruning only shrinks
+                   the result arrays: every window is counted first, so
+                   peak memory is still one int64 key per window.
+
+    Returns:
+        dict: 'n', 'keys', 'counts', 'total' and one score array per measure
+    """
+    ids = np.asarray(lemma_ids, dtype=np.int64)
+    keys, counts = count_ngrams(ids, vocab_size, n, stop_mask)
+    total = int(counts.sum())
+
+    result = {'n': n, 'keys': keys, 'counts': counts, 'total': total}
+    if total == 0:
+        empty = np.empty(0, dtype=np.float64)
+        result.update({measure: empty for measure in MEASURES})
+        return result
+
+    # Marginals over the counted windows: (n-1)-gram prefix and last lemma
+    prefixes, last = np.divmod(keys, vocab_size)
+    _, prefix_index = np.unique(prefixes, return_inverse=True)
+    prefix_totals = np.bincount(prefix_index, weights=counts)[prefix_index]
+    last_totals = np.bincount(last, weights=counts, minlength=vocab_size)[last]
+
+    # Unigram probabilities over non-stop tokens
+    unigram_ids = ids if stop_mask is None else ids[~stop_mask[ids]]
+    unigram_counts = np.bincount(unigram_ids, minlength=vocab_size).astype(np.float64)
+    unigram_probs = unigram_counts / max(len(unigram_ids), 1)
+
+    # Optional pruning of rare n-grams keeps the result arrays small (the
+    # full count above already set the peak)
+    if min_count > 1:
+        keep = counts >= min_count
+        keys, counts = keys[keep], counts[keep]
+        prefix_totals, last_totals = prefix_totals[keep], last_totals[keep]
+
+    expected = np.full(len(keys), float(total))
+    for component in unpack_ngram_keys(keys, vocab_size, n):
+        expected *= unigram_probs[component]
+
+    observed = counts.astype(np.float64)
+    result.update({
+        'keys': keys,
+        'counts': counts,
+        'pmi': np.log2(observed / expected),
+        't_score': (observed - expected) / np.sqrt(observed),
+        'log_likelihood': _log_likelihood(observed, prefix_totals, last_totals, float(total))
+    })
+    return result
+
+
+def top_collocations(scores, vocabulary, measure='log_likelihood', top_n=50):
+    """
+    Select the highest-scoring collocations
+
+    Args:
+        scores: Result of score_collocations()
+        vocabulary: List of unique lemmas (index = lemma ID)
+        measure: Key from MEASURES to rank by
+        top_n: Number of collocations to return
+
+    Returns:
+        list: Tuples of (phrase, frequency, score), best first
+    """
+    values = scores[measure]
+    if len(values) == 0:
+        return []
+
+    # argpartition keeps selection linear in the number of n-grams
+    k = min(top_n, len(values))
+    top = np.argpartition(-values, k - 1)[:k]
+    top = top[np.argsort(-values[top], kind='stable')]
+
+    components = unpack_ngram_keys(scores['keys'][top], len(vocabulary), scores['n'])
+    return [
+        (
+            ' '.join(vocabulary[component[i]] for component in components),
+            int(scores['counts'][i_top]),
+            float(values[i_top])
+        )
+        for i, i_top in enumerate(top)
+    ]
+
+
+def render_collocations_ui(vocabulary, lemma_ids, stop_mask, top_n=50, cache=None):
+    """
+    Render the collocations table with n-gram and measure controls
+
+    Args:
+        vocabulary: List of unique lemmas (index = lemma ID)
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        stop_mask: Boolean array over lemma IDs marking stop words
+        top_n: Number of collocations to show
+        cache: Optional dict kept with the analysis; scores are stored
+               there per (n, min_count) so reruns skip recounting
+
+    Returns:
+        dict: Table data (Ранг, Словосочетание, Частота, Оценка) for CSV export
+    """
+    st.subheader(f"🔗 Топ-{top_n} словосочетаний")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        ngram_label = st.radio(
+            "Длина:",
+            options=["Биграммы", "Триграммы"],
+            horizontal=True,
+            key="collocations_n"
+        )
+    with col2:
+        measure = st.selectbox(
+            "Мера связанности:",
+            options=list(MEASURES),
+            format_func=MEASURES.get,
+            key="collocations_measure"
+        )
+    with col3:
+        min_count = st.number_input(
+            "Мин. частота:",
+            min_value=1,
+            value=2,
+            step=1,
+            key="collocations_min_count",
+            help="Словосочетания с меньшей частотой отбрасываются"
+        )
+
+    n = 2 if ngram_label == "Биграммы" else 3
+    cache_key = (n, int(min_count))
+    if cache is not None and cache_key in cache:
+        scores = cache[cache_key]
+    else:
+        try:
+            scores = score_collocations(lemma_ids, len(vocabulary), n, stop_mask, int(min_count))
+        except ValueError as e:
+            # Packed keys overflow int64 for very large vocabularies
+            # (trigrams above about 2.1M lemmas)
+            st.warning(f"⚠️ Словосочетания не посчитаны: {e}")
+            return {"Ранг": [], "Словосочетание": [], "Частота": [], "Оценка": []}
+        if cache is not None:
+            cache[cache_key] = scores
+    collocations = top_collocations(scores, vocabulary, measure, top_n)
+
+    colloc_data = {
+        "Ранг": list(range(1, len(collocations) + 1)),
+        "Словосочетание": [phrase for phrase, _, _ in collocations],
+        "Частота": [freq for _, freq, _ in collocations],
+        "Оценка": [round(score, 3) for _, _, score in collocations]
+    }
+
+    if collocations:
+        st.table(colloc_data)
+    else:
+        st.info("Недостаточно данных для поиска словосочетаний")
+
+    return colloc_data
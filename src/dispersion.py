@@ -0,0 +1,324 @@
+"""
+Dispersion and Frequency Dynamics
+Lemma counts per section of a document (fixed or sliding windows of N
+tokens, chapters, pages) from prefix counts over the token sequence,
+with Juilland's D and range for the top lemmas
+"""
+
+import csv
+import io
+import re
+
+import numpy as np
+import streamlit as st
+
+from analysis_pipeline import tokenize_text
+
+
+# Section modes: key -> display name
+SECTION_MODES = {
+    'window': "Окна по N слов",
+    'sliding': "Скользящее окно",
+    'chapter': "Главы",
+    'page': "Страницы"
+}
+
+# Chapter headings: a line starting with a chapter word or a Roman numeral
+CHAPTER_PATTERN = re.compile(
+    r"^[ \t\f]*(?:(?:глава|часть|раздел|раздзел|разьдзел|частка|chapter|part)\b|(?-i:[IVXLC]+)\.?[ \t]*$)",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Page separator written by the PDF reader (form feed)
+PAGE_BREAK = "\f"
+
+# Relative frequencies in the time series are per this many tokens
+PER_TOKENS = 1000
+
+# Most windows in the UI; smaller steps (or windows) are widened so the
+# per-section arrays and the chart stay small on long texts
+MAX_SECTIONS = 1000
+
+
+def window_bounds(num_tokens, window, step=None, max_sections=None):
+    """
+    Start and end token offsets of fixed or sliding windows
+
+    Args:
+        num_tokens: Length of the token sequence
+        window: Window size in tokens
+        step: Offset between window starts (default: window, i.e. no
+              overlap); the last window is cut at the end of the text
+        max_sections: Optional limit on the number of windows; the step
+                      is increased to stay within it (and the window with
+                      it if the step would exceed the window)
+
+    Returns:
+        tuple: (starts, ends) - int64 arrays
+
+    Raises:
+        ValueError: If window or step is not positive
+    """
+    step = step or window
+    if window <= 0 or step <= 0:
+        raise ValueError(f"Window ({window}) and step ({step}) must be positive")
+    if num_tokens == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    if max_sections:
+        span = max(num_tokens - window, 0) + 1 if step < window else num_tokens
+        min_step = -(-span // max_sections)
+        if step < min_step:
+            step = min_step
+            window = max(window, step)
+
+    # Sliding windows stop once a window reaches the end of the text
+    last_start = max(num_tokens - window, 0) if step < window else num_tokens - 1
+    starts = np.arange(0, last_start + 1, step, dtype=np.int64)
+    ends = np.minimum(starts + window, num_tokens)
+    return starts, ends
+
+
+def text_section_bounds(text, mode):
+    """
+    Token offsets of chapters or pages in a text
+
+    Each section is tokenized the same way as the whole text, so offsets
+    match the analysis token sequence. Text before the first chapter
+    heading forms its own section.
+
+    Args:
+        text: Full document text
+        mode: 'chapter' or 'page'
+
+    Returns:
+        tuple: (starts, ends) - int64 arrays (empty sections are dropped)
+    """
+    if mode == 'page':
+        segments = text.split(PAGE_BREAK)
+    else:
+        cuts = [match.start() for match in CHAPTER_PATTERN.finditer(text)]
+        cuts = [0] + [cut for cut in cuts if cut > 0] + [len(text)]
+        segments = [text[start:end] for start, end in zip(cuts, cuts[1:])]
+
+    sizes = np.array([len(tokenize_text(segment)) for segment in segments], dtype=np.int64)
+    sizes = sizes[sizes > 0]
+    ends = np.cumsum(sizes)
+    return ends - sizes, ends
+
+
+def section_counts(lemma_ids, tracked_ids, starts, ends):
+    """
+    Count tracked lemmas in every section from prefix counts
+
+    Tracked tokens are sorted by (lemma, position) once; the number of
+    occurrences of a lemma before any offset is then a binary search, and
+    a section count is the difference of two prefix counts. Sliding the
+    window therefore adds the entering and removes the leaving tokens
+    instead of recounting the window, and the cost does not depend on the
+    window size.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        tracked_ids: Lemma IDs to count (matrix rows)
+        starts: Section start offsets
+        ends: Section end offsets (exclusive)
+
+    Returns:
+        numpy.ndarray: int32 matrix (len(tracked_ids) x len(starts))
+    """
+    lemma_ids = np.asarray(lemma_ids, dtype=np.int64)
+    tracked_ids = np.asarray(tracked_ids, dtype=np.int64)
+    num_tokens = len(lemma_ids)
+
+    # Row of every token (-1 for untracked lemmas)
+    vocab_size = int(np.concatenate([lemma_ids, tracked_ids, [0]]).max()) + 1
+    row_of = np.full(vocab_size, -1, dtype=np.int64)
+    row_of[tracked_ids] = np.arange(len(tracked_ids))
+    rows = row_of[lemma_ids]
+    positions = np.flatnonzero(rows >= 0)
+
+    # Packed (row, position) keys are sorted because positions already are
+    keys = np.sort(rows[positions] * (num_tokens + 1) + positions)
+
+    row_base = np.arange(len(tracked_ids), dtype=np.int64)[:, None] * (num_tokens + 1)
+    before_start = np.searchsorted(keys, row_base + np.asarray(starts)[None, :])
+    before_end = np.searchsorted(keys, row_base + np.asarray(ends)[None, :])
+    return (before_end - before_start).astype(np.int32)
+
+
+def dispersion_measures(counts, sizes):
+    """
+    Juilland's D and range of each row of a section count matrix
+
+    D = 1 - V / sqrt(n - 1), where V is the coefficient of variation of the
+    relative frequencies in the n sections (1 = perfectly even, 0 = all in
+    one section). Sections should not overlap.
+
+    Args:
+        counts: Count matrix (lemmas x sections)
+        sizes: Section sizes in tokens
+
+    Returns:
+        tuple: (juilland_d, range_count) - float and int arrays per lemma
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    num_sections = counts.shape[1]
+    range_count = np.count_nonzero(counts, axis=1)
+    if num_sections < 2:
+        return np.ones(len(counts)), range_count
+
+    relative = counts / np.maximum(np.asarray(sizes, dtype=np.float64), 1.0)[None, :]
+    mean = relative.mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variation = np.where(mean > 0, relative.std(axis=1) / mean, 0.0)
+    juilland_d = 1.0 - variation / np.sqrt(num_sections - 1)
+    return np.clip(juilland_d, 0.0, 1.0), range_count
+
+
+def analyze_dynamics(lemma_ids, freq_table, starts, ends, top_n=50):
+    """
+    Section counts, time series and dispersion for the top lemmas
+
+    Dispersion is measured over non-overlapping sections; for sliding
+    windows it uses consecutive windows of the same size instead.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        freq_table: LemmaFrequencyTable of the analysis (defines the top lemmas)
+        starts: Section start offsets
+        ends: Section end offsets (exclusive)
+        top_n: Number of lemmas to track
+
+    Returns:
+        dict: 'lemma_ids', 'lemmas', 'starts', 'ends', 'counts' (int32
+              lemmas x sections), 'relative' (float32 per PER_TOKENS
+              tokens), 'juilland_d' and 'range' (sections containing the
+              lemma, out of 'num_parts')
+    """
+    tracked = freq_table.ranked_ids()[:top_n]
+    counts = section_counts(lemma_ids, tracked, starts, ends)
+    sizes = ends - starts
+
+    overlapping = len(starts) > 1 and starts[1] < ends[0]
+    if overlapping:
+        part_starts, part_ends = window_bounds(len(lemma_ids), int(sizes[0]))
+        part_counts = section_counts(lemma_ids, tracked, part_starts, part_ends)
+        part_sizes = part_ends - part_starts
+    else:
+        part_counts, part_sizes = counts, sizes
+    juilland_d, range_count = dispersion_measures(part_counts, part_sizes)
+
+    return {
+        'lemma_ids': tracked,
+        'lemmas': [freq_table.vocabulary[i] for i in tracked],
+        'starts': starts,
+        'ends': ends,
+        'counts': counts,
+        'relative': (counts / np.maximum(sizes, 1)[None, :] * PER_TOKENS).astype(np.float32),
+        'juilland_d': juilland_d,
+        'range': range_count,
+        'num_parts': part_counts.shape[1]
+    }
+
+
+def _series_csv(dynamics):
+    """CSV of the time series: one row per section, one column per lemma"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Раздел', 'Начало', 'Конец'] + dynamics['lemmas'])
+    for j in range(len(dynamics['starts'])):
+        writer.writerow(
+            [j + 1, int(dynamics['starts'][j]), int(dynamics['ends'][j])] +
+            [int(value) for value in dynamics['counts'][:, j]]
+        )
+    return output.getvalue().encode('utf-8-sig')  # BOM for Excel compatibility
+
+
+def render_dynamics_ui(lemma_ids, freq_table, total_words, safe_filename, text=None, cache=None, top_n=50):
+    """
+    Render frequency dynamics across the document with dispersion table
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        freq_table: LemmaFrequencyTable of the analysis
+        total_words: Number of tokens
+        safe_filename: Base name for the downloaded file
+        text: Full text; enables chapter and page sections
+        cache: Optional dict kept with the analysis; results are stored
+               there per section settings so reruns skip recounting
+        top_n: Number of lemmas in the dispersion table
+    """
+    with st.expander("📈 Динамика частот по тексту", expanded=False):
+        modes = [mode for mode in SECTION_MODES if text is not None or mode in ('window', 'sliding')]
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mode = st.selectbox(
+                "Разделы:",
+                options=modes,
+                format_func=SECTION_MODES.get,
+                key="dynamics_mode"
+            )
+        default_window = max(100, total_words // 20)
+        window = step = None
+        with col2:
+            if mode in ('window', 'sliding'):
+                window = int(st.number_input(
+                    "Размер окна (слов):",
+                    min_value=10,
+                    value=default_window,
+                    step=50,
+                    key="dynamics_window"
+                ))
+        with col3:
+            if mode == 'sliding':
+                step = int(st.number_input(
+                    "Шаг (слов):",
+                    min_value=1,
+                    value=max(1, window // 4),
+                    step=10,
+                    key="dynamics_step"
+                ))
+            num_plotted = st.slider("Лемм на графике:", 1, 20, 5, key="dynamics_plotted")
+
+        cache_key = (mode, window, step, top_n)
+        if cache is not None and cache_key in cache:
+            dynamics = cache[cache_key]
+        else:
+            if mode in ('window', 'sliding'):
+                starts, ends = window_bounds(total_words, window, step, MAX_SECTIONS)
+            else:
+                starts, ends = text_section_bounds(text, mode)
+            dynamics = analyze_dynamics(lemma_ids, freq_table, starts, ends, top_n)
+            if cache is not None:
+                cache[cache_key] = dynamics
+
+        num_sections = len(dynamics['starts'])
+        if num_sections < 2 or not dynamics['lemmas']:
+            st.info("Недостаточно разделов для анализа динамики (нужно хотя бы два)")
+            return
+
+        note = ""
+        if mode in ('window', 'sliding'):
+            used_step = int(dynamics['starts'][1] - dynamics['starts'][0])
+            if used_step > (step or window):
+                note = f" Шаг увеличен до {used_step:,} слов (не больше {MAX_SECTIONS:,} разделов)."
+        st.caption(f"Разделов: {num_sections:,}. Частота на {PER_TOKENS:,} слов.{note}")
+        plotted = dynamics['lemmas'][:num_plotted]
+        st.line_chart({lemma: dynamics['relative'][i] for i, lemma in enumerate(plotted)})
+
+        st.table({
+            "Лемма": dynamics['lemmas'],
+            "Частота": [int(freq_table.counts[i]) for i in dynamics['lemma_ids']],
+            "Range": [f"{int(r)}/{dynamics['num_parts']}" for r in dynamics['range']],
+            "D Жюийана": [round(float(d), 3) for d in dynamics['juilland_d']]
+        })
+
+        st.download_button(
+            label="📥 Скачать частоты по разделам (CSV)",
+            data=_series_csv(dynamics),
+            file_name=f"dynamics_{safe_filename}.csv",
+            mime="text/csv",
+            key="dynamics_download"
+        )
@@ -0,0 +1,391 @@
+"""
+Document Collection Analysis
+Analyzes several files as one collection: lemmatizes each unique word
+form once, detects near-duplicate documents (reposts, syndicated copies)
+with MinHash/LSH and drops or down-weights them before counting
+"""
+
+import hashlib
+from collections import Counter
+
+import numpy as np
+import streamlit as st
+
+from analysis_pipeline import tokenize_text, lemmatize_words, FORM_CACHE_LIMIT
+from ru_support import lemmatize_russian
+from belarusian.be_support import lemmatize_belarusian
+from language_detection import detect_language, route_tokens
+from lemma_vocabulary import encode_with, stop_word_mask
+from frequency_table import LemmaFrequencyTable
+from lexical_richness import lexical_richness
+from pos_tags import pos_id, lemma_pos_ids
+from near_duplicates import (
+    MinHasher, lemma_shingles, find_duplicate_groups, document_weights,
+    DEFAULT_THRESHOLD, DUPLICATE_POLICIES
+)
+from text_input_handler import iter_input_documents
+from archive_input import archive_kind, ARCHIVE_EXTENSIONS
+
+
+def analyze_documents(documents, lang_code, stop_words, policy='drop', threshold=DEFAULT_THRESHOLD):
+    """
+    Analyze a document collection with near-duplicate handling
+
+    All documents share one lemma vocabulary, so MinHash signatures over
+    content-lemma shingles are comparable. Duplicates are found with LSH
+    banding and then dropped or down-weighted (see near_duplicates).
+
+    Args:
+        documents: Iterable of (name, text) tuples; text may also be an
+                   iterator of text chunks (streamed archive members)
+        lang_code: Language code ('ru', 'be' or 'auto'); 'auto' detects
+                   the language of every document
+        stop_words: Set of stop words to exclude from counts
+        policy: Duplicate policy from DUPLICATE_POLICIES
+        threshold: Estimated Jaccard similarity for near-duplicates
+
+    Returns:
+        dict: Analysis result with the same keys as analyze_text()
+              (token sequence of the documents that are counted), the
+              document frequency in the table, 'preview' (start of the
+              first document), 'document_lemma_ids' / 'document_offsets'
+              (token sequence of all documents, see document_table()) and
+              'documents' - one dict per document with name, tokens,
+              weight, duplicate_of and similarity
+    """
+    names = []
+    lengths = []
+    languages = []
+    be_tokens = []
+    preview = ""
+    lemmatizer_stats = {}
+    # Tokens are kept only as lemma, form and part-of-speech IDs, one array
+    # per chunk; the form cache is cleared at FORM_CACHE_LIMIT forms
+    lemma_index = {}  # lemma -> lemma ID
+    form_index = {}  # form -> form ID
+    lemma_chunks = []
+    form_chunks = []
+    pos_chunks = []
+    form_cache = {}  # (document language, form) -> (lemma, part-of-speech ID)
+    belarusian_forms = set()  # (document language, form) routed to Belarusian, same lifetime
+
+    for name, text in documents:
+        # Texts may arrive as chunk iterators (archive members)
+        document_language = None
+        doc_tokens = 0
+        doc_be_tokens = 0
+        for chunk in ([text] if isinstance(text, str) else text):
+            chunk_words = tokenize_text(chunk)
+            if not chunk_words:
+                continue
+            if document_language is None:
+                # The first non-empty chunk decides the document language
+                if not preview:
+                    preview = chunk[:501]
+                document_language = detect_language(chunk)[0] if lang_code == "auto" else lang_code
+
+            # Lemmatize only forms not seen in earlier chunks and documents
+            if len(form_cache) >= FORM_CACHE_LIMIT:
+                form_cache.clear()
+                belarusian_forms.clear()
+            chunk_forms = {}
+            local_ids = encode_with(chunk_forms, chunk_words)
+            new_forms = [form for form in chunk_forms if (document_language, form) not in form_cache]
+            new_tags = {}
+            if lang_code == "auto":
+                routes = route_tokens(new_forms, document_language)
+                new_lemmas = dict(zip(routes['ru'], lemmatize_russian(routes['ru'], new_tags)))
+                new_lemmas.update(zip(routes['be'], lemmatize_belarusian(routes['be'], lemmatizer_stats, new_tags)))
+                belarusian_forms.update((document_language, form) for form in routes['be'])
+            else:
+                new_lemmas = dict(zip(
+                    new_forms, lemmatize_words(new_forms, lang_code, stats=lemmatizer_stats, tags=new_tags)
+                ))
+            form_cache.update(
+                ((document_language, form), (lemma, pos_id(new_tags.get(form)))) for form, lemma in new_lemmas.items()
+            )
+
+            # IDs of the chunk's unique forms, expanded to its tokens
+            entries = [form_cache[(document_language, form)] for form in chunk_forms]
+            lemma_chunks.append(np.fromiter(
+                (lemma_index.setdefault(lemma, len(lemma_index)) for lemma, _ in entries),
+                dtype=np.int32, count=len(entries)
+            )[local_ids])
+            pos_chunks.append(np.fromiter((pos for _, pos in entries), dtype=np.uint8, count=len(entries))[local_ids])
+            form_chunks.append(encode_with(form_index, list(chunk_forms))[local_ids])
+            if lang_code == "auto":
+                is_belarusian = np.fromiter(
+                    ((document_language, form) in belarusian_forms for form in chunk_forms),
+                    dtype=bool, count=len(chunk_forms)
+                )
+                doc_be_tokens += int(np.count_nonzero(is_belarusian[local_ids]))
+            doc_tokens += len(chunk_words)
+
+        if document_language is None:
+            document_language = "ru" if lang_code == "auto" else lang_code
+        names.append(name)
+        lengths.append(doc_tokens)
+        languages.append(document_language)
+        be_tokens.append(doc_be_tokens)
+
+    vocabulary = list(lemma_index)
+    form_vocabulary = list(form_index)
+    lemma_ids = np.concatenate(lemma_chunks) if lemma_chunks else np.zeros(0, dtype=np.int32)
+    form_ids = np.concatenate(form_chunks) if form_chunks else np.zeros(0, dtype=np.int32)
+    token_pos = np.concatenate(pos_chunks) if pos_chunks else np.zeros(0, dtype=np.uint8)
+    del lemma_chunks, form_chunks, pos_chunks  # free the per-chunk copies
+    stop_mask = stop_word_mask(vocabulary, stop_words)
+    lengths = np.array(lengths, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+    # One signature per document over shingles of its content lemmas
+    hasher = MinHasher()
+    signatures = np.empty((len(names), hasher.num_perm), dtype=np.uint32)
+    for index in range(len(names)):
+        ids = lemma_ids[offsets[index]:offsets[index + 1]]
+        signatures[index] = hasher.signature(lemma_shingles(ids[~stop_mask[ids]]))
+    representative, similarity = find_duplicate_groups(signatures, threshold)
+    weights = document_weights(representative, policy)
+
+    # Token sequence of counted documents; weights only when down-weighting
+    token_weights = np.repeat(weights, lengths) if policy == 'downweight' else None
+    if (weights > 0).all():
+        kept_ids, kept_forms = lemma_ids, form_ids
+    else:
+        counted = np.repeat(weights > 0, lengths)
+        kept_ids, kept_forms = lemma_ids[counted], form_ids[counted]
+        if token_weights is not None:
+            token_weights = token_weights[counted]
+
+    freq_table = LemmaFrequencyTable.from_lemma_ids(
+        vocabulary, kept_ids, stop_mask, weights=token_weights, form_vocabulary=form_vocabulary, form_ids=kept_forms
+    )
+
+    # Document frequency: the distinct lemmas of each document, weighted
+    # like the counts
+    document_frequency = np.zeros(len(vocabulary), dtype=np.float64)
+    for index in range(len(names)):
+        if weights[index] > 0:
+            document_frequency[np.unique(lemma_ids[offsets[index]:offsets[index + 1]])] += weights[index]
+    document_frequency = np.rint(document_frequency).astype(np.int64)
+    document_frequency[stop_mask] = 0
+    freq_table.document_frequency = document_frequency
+
+    result = {
+        'vocabulary': vocabulary,
+        'lemma_ids': kept_ids,
+        'stop_mask': stop_mask,
+        'freq_table': freq_table,
+        'total_words': int(np.rint(token_weights.sum())) if token_weights is not None else len(kept_ids),
+        'richness': lexical_richness(kept_ids, len(vocabulary)),
+        'pos_ids': lemma_pos_ids(lemma_ids, token_pos, len(vocabulary)),
+        'lemmatizer_stats': lemmatizer_stats,
+        'collocation_cache': {},
+        'dynamics_cache': {},
+        'preview': preview,
+        'document_lemma_ids': lemma_ids,
+        'document_offsets': offsets,
+        'documents': [
+            {
+                'name': names[i],
+                'tokens': int(lengths[i]),
+                'weight': float(weights[i]),
+                'duplicate_of': names[representative[i]] if representative[i] != i else None,
+                'similarity': float(similarity[i])
+            }
+            for i in range(len(names))
+        ]
+    }
+
+    if lang_code == "auto":
+        # Collection language: the language of most counted tokens
+        language_tokens = Counter()
+        for i, language in enumerate(languages):
+            if weights[i] > 0:
+                language_tokens[language] += int(lengths[i])
+        detected_lang, tokens = language_tokens.most_common(1)[0] if language_tokens else ("ru", 0)
+        be_counted = int(np.array(be_tokens, dtype=np.int64)[weights > 0].sum())
+        result.update({
+            'detected_lang': detected_lang,
+            'confidence': tokens / max(sum(language_tokens.values()), 1),
+            'token_counts': {'ru': len(kept_ids) - be_counted, 'be': be_counted}
+        })
+    return result
+
+
+def document_table(analysis, index):
+    """
+    Frequency table of one document of a collection
+
+    Args:
+        analysis: Result of analyze_documents()
+        index: Document index (position in analysis['documents'])
+
+    Returns:
+        LemmaFrequencyTable: Unweighted counts of the document
+    """
+    offsets = analysis['document_offsets']
+    lemma_ids = analysis['document_lemma_ids'][offsets[index]:offsets[index + 1]]
+    return LemmaFrequencyTable.from_lemma_ids(analysis['vocabulary'], lemma_ids, analysis['stop_mask'])
+
+
+def iter_uploaded_documents(uploaded_files, skipped):
+    """
+    Stream the documents of uploaded files; archives and compressed files
+    contribute one document per member, named 'archive.zip/member.txt'.
+    Texts go through the extracted-text cache, so a rerun with other
+    settings does not extract known documents again.
+
+    Args:
+        uploaded_files: List of Streamlit UploadedFile objects
+        skipped: List collecting (name, reason) of unreadable files
+
+    Yields:
+        tuple: (name, chunks) for analyze_documents()
+    """
+    for uploaded_file in uploaded_files:
+        prefix = uploaded_file.name + "/" if archive_kind(uploaded_file.name) is not None else ""
+        member_skipped = []
+        try:
+            documents = iter_input_documents(
+                uploaded_file, uploaded_file.name, member_skipped, cache_data=uploaded_file.getvalue()
+            )
+            for name, chunks in documents:
+                yield prefix + name, chunks
+        except Exception as e:
+            member_skipped.append(("", str(e)))
+        skipped.extend((prefix + name if name else uploaded_file.name, reason) for name, reason in member_skipped)
+
+
+def get_collection_analysis(uploaded_files, lang_code, stop_words, policy, threshold):
+    """
+    Return the cached collection analysis or run it
+
+    Args:
+        uploaded_files: List of Streamlit UploadedFile objects
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words to exclude from counts
+        policy: Duplicate policy from DUPLICATE_POLICIES
+        threshold: Estimated Jaccard similarity for near-duplicates
+
+    Returns:
+        tuple: (analysis, skipped) - result of analyze_documents() and
+               (name, reason) of files that could not be read
+    """
+    digest = hashlib.sha1()
+    for uploaded_file in uploaded_files:
+        digest.update(uploaded_file.name.encode('utf-8'))
+        digest.update(hashlib.sha1(uploaded_file.getvalue()).digest())
+    key = (digest.hexdigest(), lang_code, frozenset(stop_words), policy, threshold)
+
+    cached = st.session_state.get('collection_cache')
+    if cached is not None and cached['key'] == key:
+        return cached['result'], cached['skipped']
+
+    for uploaded_file in uploaded_files:
+        uploaded_file.seek(0)
+    skipped = []
+    result = analyze_documents(iter_uploaded_documents(uploaded_files, skipped), lang_code, stop_words, policy, threshold)
+    st.session_state.collection_cache = {'key': key, 'result': result, 'skipped': skipped}
+    return result, skipped
+
+
+def render_collection_input_ui():
+    """
+    Render multi-file upload with duplicate handling options
+
+    Returns:
+        tuple: (uploaded_files, policy, threshold) - files is an empty list
+               until something is uploaded
+    """
+    st.subheader("📚 Коллекция документов")
+    uploaded_files = st.file_uploader(
+        "Выберите файлы",
+        type=['txt', 'pdf', 'docx'] + ARCHIVE_EXTENSIONS,
+        accept_multiple_files=True,
+        key="collection_files",
+        help="Все файлы анализируются вместе; перепечатки и почти одинаковые копии находятся автоматически. "
+             "Каждый файл архива (.zip, .tar.gz) или сжатого файла (.gz, .bz2, .xz) - отдельный документ"
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        policy = st.selectbox(
+            "Почти одинаковые документы:",
+            options=list(DUPLICATE_POLICIES),
+            format_func=DUPLICATE_POLICIES.get,
+            key="collection_policy",
+            help="Понижение веса: группа копий учитывается как один документ"
+        )
+    with col2:
+        threshold = st.slider(
+            "Порог сходства:",
+            min_value=0.5,
+            max_value=1.0,
+            value=DEFAULT_THRESHOLD,
+            step=0.05,
+            key="collection_threshold",
+            help="Оценка доли общих фрагментов (коэффициент Жаккара по тройкам лемм)"
+        )
+    return uploaded_files or [], policy, threshold
+
+
+def render_duplicates_report(analysis, skipped=()):
+    """
+    Render collection statistics, per-document results and the list of
+    detected near-duplicates
+
+    Args:
+        analysis: Result of analyze_documents()
+        skipped: (name, reason) of files that could not be read
+    """
+    documents = analysis['documents']
+    duplicates = [doc for doc in documents if doc['duplicate_of'] is not None]
+    groups = len({doc['duplicate_of'] for doc in duplicates})
+
+    if skipped:
+        st.warning(
+            f"⚠️ Пропущено файлов: {len(skipped):,} ("
+            + "; ".join(f"{name}: {reason}" for name, reason in skipped[:5])
+            + ("; ..." if len(skipped) > 5 else "") + ")"
+        )
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Документов", f"{len(documents):,}")
+    with col2:
+        st.metric("Почти дубликатов", f"{len(duplicates):,}")
+    with col3:
+        st.metric("Групп копий", f"{groups:,}")
+
+    if documents:
+        with st.expander("📄 Результаты по документам", expanded=False):
+            index = st.selectbox(
+                "Документ:",
+                options=range(len(documents)),
+                format_func=lambda i: documents[i]['name'],
+                key="collection_document"
+            )
+            doc = documents[index]
+            st.caption(
+                f"Слов: {doc['tokens']:,}. Вес в общей статистике: {doc['weight']:.3g}"
+                + (f". Копия документа {doc['duplicate_of']}" if doc['duplicate_of'] else "")
+            )
+            top = document_table(analysis, index).top(20)
+            if top:
+                st.table({
+                    "Лемма": [lemma for lemma, _ in top],
+                    "Частота": [count for _, count in top]
+                })
+
+    if duplicates:
+        with st.expander(f"🧬 Найденные почти дубликаты ({len(duplicates):,})", expanded=False):
+            shown = duplicates[:500]
+            st.table({
+                "Документ": [doc['name'] for doc in shown],
+                "Копия документа": [doc['duplicate_of'] for doc in shown],
+                "Сходство": [f"{doc['similarity'] * 100:.0f}%" for doc in shown],
+                "Вес": [round(doc['weight'], 3) for doc in shown]
+            })
+            if len(duplicates) > len(shown):
+                st.caption(f"Показаны первые {len(shown)} из {len(duplicates):,}")
@@ -0,0 +1,276 @@
+"""
+External Counting
+Exact frequency counting under a memory budget: counts stay in a dict
+until its estimated size exceeds the budget, then go to disk as a sorted
+run; the runs are k-way merged into exact totals when they are read, and
+the top-K is collected while the totals stream by
+"""
+
+import heapq
+import os
+import sys
+import tempfile
+from operator import itemgetter
+
+
+# Default budget of the in-memory count table
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Estimated bytes per dict entry besides the key string (hash table slot,
+# count object, resize headroom)
+ENTRY_OVERHEAD = 100
+
+# Runs merged at once (one open file each); when this many runs exist they
+# are merged into one before counting continues
+MERGE_FANIN = 64
+
+# Write/read buffer per run file
+RUN_BUFFER = 1024 * 1024
+
+
+class SpillingCounter:
+    """
+    Counter of string keys with a bounded in-memory table
+
+    Below the budget it is a plain dict. Each time the estimated size of
+    the table (key string sizes plus ENTRY_OVERHEAD per key) exceeds the
+    budget, the table is sorted, written to a temporary run file as
+    'key<TAB>count' lines and cleared. items() merges the sorted runs with
+    a heap, summing equal keys, so totals are exact and memory during the
+    merge is one line per run; the merged totals replace the runs, so
+    reading the totals again does not repeat the merge. Negative counts
+    subtract (e.g. a removed document) and keys whose total drops to zero
+    are left out. Keys must not contain newlines.
+
+    Use as a context manager (or call close()) to delete the run files.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, temp_dir=None):
+        """
+        Initialize counter
+
+        Args:
+            memory_budget: Estimated bytes the in-memory table may use
+            temp_dir: Parent directory for run files (default: system temp)
+        """
+        self.memory_budget = memory_budget
+        self.temp_dir = temp_dir
+        self.total = 0
+        self.spills = 0
+        self._counts = {}
+        self._bytes = 0
+        self._runs = []
+        self._run_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Delete the run files"""
+        if self._run_dir is not None:
+            self._run_dir.cleanup()
+            self._run_dir = None
+        self._runs = []
+
+    @property
+    def spilled(self):
+        """True if counts were written to disk"""
+        return bool(self._runs)
+
+    def add(self, key, count=1):
+        """
+        Add a count for a key
+
+        Args:
+            key: Key string (e.g. a lemma)
+            count: Count to add (negative to subtract)
+        """
+        counts = self._counts
+        if key in counts:
+            total = counts[key] + count
+            if total:
+                counts[key] = total
+            else:
+                del counts[key]
+                self._bytes -= sys.getsizeof(key) + ENTRY_OVERHEAD
+        elif count:
+            counts[key] = count
+            self._bytes += sys.getsizeof(key) + ENTRY_OVERHEAD
+            if self._bytes > self.memory_budget:
+                self._spill()
+        self.total += count
+
+    def update(self, counts):
+        """
+        Add counts from a mapping or an iterable of (key, count) pairs
+
+        Args:
+            counts: dict/Counter or iterable of pairs
+        """
+        pairs = counts.items() if hasattr(counts, 'items') else counts
+        for key, count in pairs:
+            self.add(key, count)
+
+    def _spill(self):
+        """Write the in-memory table as a sorted run and clear it"""
+        if not self._counts:
+            return
+        self._runs.append(self._write_run(sorted(self._counts.items())))
+        self._counts = {}
+        self._bytes = 0
+        self.spills += 1
+
+        # Keep the number of open files of the final merge bounded
+        if len(self._runs) >= MERGE_FANIN:
+            runs, self._runs = self._runs, []
+            self._runs.append(self._write_run(_merge_sorted([_read_run(path) for path in runs])))
+            for path in runs:
+                os.unlink(path)
+
+    def _open_run(self):
+        """Create a new run file; returns (path, text file open for writing)"""
+        if self._run_dir is None:
+            self._run_dir = tempfile.TemporaryDirectory(prefix="counts-", dir=self.temp_dir)
+        fd, path = tempfile.mkstemp(dir=self._run_dir.name, suffix=".run")
+        return path, open(fd, 'w', encoding='utf-8', buffering=RUN_BUFFER)
+
+    def _write_run(self, items):
+        """Write sorted (key, count) pairs to a new run file"""
+        path, f = self._open_run()
+        with f:
+            for key, count in items:
+                if '\n' in key:
+                    raise ValueError(f"Key with a newline cannot be spilled: {key!r}")
+                f.write(f"{key}\t{count}\n")
+        return path
+
+    def items(self):
+        """
+        Exact totals in key order
+
+        If anything was spilled, the rest of the table is spilled too, so
+        the merge reads only runs and memory stays within the budget.
+
+        Yields:
+            tuple: (key, count) pairs sorted by key (zero totals left out)
+        """
+        if not self._runs:
+            yield from sorted(self._counts.items())
+            return
+        self._spill()
+        if len(self._runs) == 1:
+            yield from _read_run(self._runs[0])
+            return
+
+        # The merged totals are written to one new run while they stream by;
+        # it replaces the old runs only if the merge was read to the end
+        runs = self._runs
+        path, f = self._open_run()
+        complete = False
+        try:
+            with f:
+                for key, count in _merge_sorted([_read_run(run) for run in runs]):
+                    f.write(f"{key}\t{count}\n")
+                    yield key, count
+            complete = True
+        finally:
+            for stale in (runs if complete else [path]):
+                os.unlink(stale)
+            if complete:
+                self._runs = [path]
+
+    def top(self, n):
+        """
+        The n keys with the highest totals
+
+        Runs a separate merge; to get the top-K while consuming items()
+        anyway, feed the pairs to a TopCounts instead.
+
+        Args:
+            n: Number of keys
+
+        Returns:
+            list: (key, count) pairs, highest first (ties in key order)
+        """
+        top = TopCounts(n)
+        for key, count in self.items():
+            top.add(key, count)
+        return top.result()
+
+
+class TopCounts:
+    """
+    The n highest (key, count) pairs of a stream, kept in a heap of n
+    entries while the stream is consumed for something else
+    """
+
+    def __init__(self, n):
+        """
+        Initialize tracker
+
+        Args:
+            n: Number of pairs to keep (0 keeps none)
+        """
+        self.n = n
+        self._heap = []
+        self._seen = 0
+
+    def add(self, key, count):
+        """
+        Offer a pair
+
+        Args:
+            key: Key string
+            count: Its total
+        """
+        if self.n <= 0:
+            return
+        # Earlier pairs win ties: a larger -position ranks higher
+        entry = (count, -self._seen, key)
+        self._seen += 1
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def result(self):
+        """
+        Collected pairs
+
+        Returns:
+            list: (key, count) pairs, highest first (ties in stream order)
+        """
+        return [(key, count) for count, _, key in sorted(self._heap, reverse=True)]
+
+
+def _read_run(path):
+    """Yield the (key, count) pairs of a run file"""
+    with open(path, encoding='utf-8', buffering=RUN_BUFFER) as f:
+        for line in f:
+            key, _, count = line[:-1].rpartition('\t')
+            yield key, int(count)
+
+
+def _merge_sorted(runs):
+    """
+    k-way merge of sorted (key, count) streams, summing equal keys
+
+    Args:
+        runs: List of iterables sorted by key
+
+    Yields:
+        tuple: (key, total) pairs sorted by key (zero totals left out)
+    """
+    current, total = None, 0
+    for key, count in heapq.merge(*runs, key=itemgetter(0)):
+        if key == current:
+            total += count
+        else:
+            if current is not None and total:
+                yield current, total
+            current, total = key, count
+    if current is not None and total:
+        yield current, total
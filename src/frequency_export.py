@@ -0,0 +1,299 @@
+"""
+Frequency Table Export
+Streams the complete lemma frequency table as CSV, JSONL or Parquet
+byte chunks, reading rows straight from the table's count arrays
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+
+import streamlit as st
+
+# Parquet export is optional (pyarrow ships with Streamlit, but may be missing)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# Supported formats: key -> (display name, MIME type)
+EXPORT_FORMATS = {
+    'csv': ("CSV (Excel)", "text/csv"),
+    'jsonl': ("JSONL", "application/x-ndjson"),
+    'parquet': ("Parquet", "application/vnd.apache.parquet")
+}
+
+# Number of table rows serialized per yielded chunk
+CHUNK_ROWS = 10000
+
+
+def _iter_ranked_chunks(table, chunk_rows):
+    """Yield (first_rank, lemma_ids) slices of the ranked lemma IDs"""
+    ranked = table.ranked_ids()
+    for start in range(0, len(ranked), chunk_rows):
+        yield start + 1, ranked[start:start + chunk_rows]
+
+
+def iter_csv_export(table, include_forms=False, include_doc_freq=False, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the frequency table as CSV
+
+    The first chunk starts with a UTF-8 BOM for Excel compatibility.
+
+    Args:
+        table: LemmaFrequencyTable to export
+        include_forms: Add a column with word forms and their frequencies
+        include_doc_freq: Add a document frequency column
+        chunk_rows: Rows per yielded chunk
+
+    Yields:
+        bytes: Consecutive chunks of the CSV file
+    """
+    include_forms = include_forms and table.has_forms
+    include_doc_freq = include_doc_freq and table.document_frequency is not None
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    header = ['Ранг', 'Лемма', 'Частота']
+    if include_doc_freq:
+        header.append('Документов')
+    if include_forms:
+        header.append('Словоформы')
+    writer.writerow(header)
+    yield output.getvalue().encode('utf-8-sig')  # BOM for Excel compatibility
+
+    for first_rank, lemma_ids in _iter_ranked_chunks(table, chunk_rows):
+        output.seek(0)
+        output.truncate()
+        for rank, lemma_id in enumerate(lemma_ids, first_rank):
+            row = [rank, table.vocabulary[lemma_id], int(table.counts[lemma_id])]
+            if include_doc_freq:
+                row.append(int(table.document_frequency[lemma_id]))
+            if include_forms:
+                row.append(', '.join(f"{form} ({freq})" for form, freq in table.forms_of(lemma_id)))
+            writer.writerow(row)
+        yield output.getvalue().encode('utf-8')
+
+
+def iter_jsonl_export(table, include_forms=False, include_doc_freq=False, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the frequency table as JSON Lines (one lemma per line)
+
+    Args:
+        table: LemmaFrequencyTable to export
+        include_forms: Add a "forms" object {form: frequency}
+        include_doc_freq: Add a "documents" field
+        chunk_rows: Rows per yielded chunk
+
+    Yields:
+        bytes: Consecutive chunks of the JSONL file
+    """
+    include_forms = include_forms and table.has_forms
+    include_doc_freq = include_doc_freq and table.document_frequency is not None
+
+    for first_rank, lemma_ids in _iter_ranked_chunks(table, chunk_rows):
+        lines = []
+        for rank, lemma_id in enumerate(lemma_ids, first_rank):
+            record = {
+                'rank': rank,
+                'lemma': table.vocabulary[lemma_id],
+                'frequency': int(table.counts[lemma_id])
+            }
+            if include_doc_freq:
+                record['documents'] = int(table.document_frequency[lemma_id])
+            if include_forms:
+                record['forms'] = dict(table.forms_of(lemma_id))
+            lines.append(json.dumps(record, ensure_ascii=False))
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back in chunks"""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer.write(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        """Return bytes written since the last call and reset the buffer"""
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+def iter_parquet_export(table, include_forms=False, include_doc_freq=False, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the frequency table as a Parquet file, one row group per chunk
+
+    Args:
+        table: LemmaFrequencyTable to export
+        include_forms: Add a list<struct<form, frequency>> column
+        include_doc_freq: Add a document frequency column
+        chunk_rows: Rows per row group
+
+    Yields:
+        bytes: Consecutive chunks of the Parquet file
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet export requires pyarrow")
+
+    include_forms = include_forms and table.has_forms
+    include_doc_freq = include_doc_freq and table.document_frequency is not None
+
+    fields = [('rank', pa.int64()), ('lemma', pa.string()), ('frequency', pa.int64())]
+    if include_doc_freq:
+        fields.append(('documents', pa.int64()))
+    if include_forms:
+        form_type = pa.struct([('form', pa.string()), ('frequency', pa.int64())])
+        fields.append(('forms', pa.list_(form_type)))
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for first_rank, lemma_ids in _iter_ranked_chunks(table, chunk_rows):
+            columns = {
+                'rank': range(first_rank, first_rank + len(lemma_ids)),
+                'lemma': [table.vocabulary[i] for i in lemma_ids],
+                'frequency': table.counts[lemma_ids]
+            }
+            if include_doc_freq:
+                columns['documents'] = table.document_frequency[lemma_ids]
+            if include_forms:
+                columns['forms'] = [
+                    [{'form': form, 'frequency': freq} for form, freq in table.forms_of(i)]
+                    for i in lemma_ids
+                ]
+            writer.write_table(pa.table({
+                name: pa.array(columns[name], type=schema.field(name).type) for name in schema.names
+            }, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def iter_export(table, export_format, include_forms=False, include_doc_freq=False):
+    """
+    Stream the frequency table in the requested format
+
+    Args:
+        table: LemmaFrequencyTable to export
+        export_format: Key from EXPORT_FORMATS
+        include_forms: Include the per-form breakdown
+        include_doc_freq: Include document frequency
+
+    Returns:
+        iterator: Byte chunks of the exported file
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    exporters = {
+        'csv': iter_csv_export,
+        'jsonl': iter_jsonl_export,
+        'parquet': iter_parquet_export
+    }
+    if export_format not in exporters:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    return exporters[export_format](table, include_forms, include_doc_freq)
+
+
+def write_export(path, table, export_format, include_forms=False, include_doc_freq=False):
+    """
+    Write the export to a file chunk by chunk
+
+    Args:
+        path: Output file path
+        table: LemmaFrequencyTable to export
+        export_format: Key from EXPORT_FORMATS
+        include_forms: Include the per-form breakdown
+        include_doc_freq: Include document frequency
+
+    Returns:
+        int: Number of bytes written
+    """
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in iter_export(table, export_format, include_forms, include_doc_freq):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def render_export_ui(table, safe_filename):
+    """
+    Render export options and download button for the full frequency table
+
+    Args:
+        table: LemmaFrequencyTable to export
+        safe_filename: Base name for the downloaded file
+    """
+    with st.expander(f"📦 Экспорт полной таблицы ({table.num_lemmas:,} лемм)", expanded=False):
+        formats = [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or PARQUET_AVAILABLE]
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            export_format = st.selectbox(
+                "Формат:",
+                options=formats,
+                format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+                key="export_format"
+            )
+        with col2:
+            include_forms = st.checkbox(
+                "Словоформы",
+                value=False,
+                disabled=not table.has_forms,
+                key="export_include_forms",
+                help="Добавить разбивку по словоформам для каждой леммы"
+            )
+        with col3:
+            include_doc_freq = st.checkbox(
+                "Частота по документам",
+                value=table.document_frequency is not None,
+                disabled=table.document_frequency is None,
+                key="export_include_doc_freq",
+                help="Количество документов, в которых встречается лемма"
+            )
+
+        # Serialize only on request, not on every rerun
+        if st.button("⚙️ Подготовить файл", key="export_prepare"):
+            # Chunks go to a temporary file instead of being joined in
+            # memory; the download button reads it once
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, f"export.{export_format}")
+                write_export(path, table, export_format, include_forms, include_doc_freq)
+                with open(path, 'rb') as f:
+                    st.download_button(
+                        label=f"📥 Скачать полную таблицу ({EXPORT_FORMATS[export_format][0]})",
+                        data=f,
+                        file_name=f"text_analysis_{safe_filename}_full.{export_format}",
+                        mime=EXPORT_FORMATS[export_format][1],
+                        key="export_download"
+                    )
@@ -0,0 +1,339 @@
+"""
+Lemma Frequency Table
+Complete frequency table backed by count arrays over lemma IDs,
+with optional per-form breakdown and document frequency
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from lemma_vocabulary import encode_lemmas, count_keys, COUNT_SLICE
+
+
+# Collation for alphabetical order: ё sorts with е, Belarusian і with и
+# and ў right after у (ties are broken by the original spelling)
+COLLATION = str.maketrans({'ё': 'е', 'і': 'и', 'ў': 'у\uffff'})
+
+# Prefix search treats only ё as е (often written without the dots); і/и
+# and ў/у are different letters and must not match each other
+SEARCH_FOLDING = str.maketrans({'ё': 'е'})
+
+
+def collation_key(lemma):
+    """
+    Sort key for Russian/Belarusian alphabetical order
+
+    Args:
+        lemma: Lemma string
+
+    Returns:
+        str: Lemma with ё, і and ў mapped to their alphabet positions
+    """
+    return lemma.translate(COLLATION)
+
+
+class LemmaFrequencyTable:
+    """
+    Frequency table for the whole vocabulary of an analysis
+
+    Counts are stored as numpy arrays indexed by lemma ID; rows are never
+    materialized as Python lists. Word forms are stored in CSR layout:
+    the forms of lemma i are form_ids[form_offsets[i]:form_offsets[i + 1]].
+    """
+
+    def __init__(self, vocabulary, counts, form_vocabulary=None, form_offsets=None,
+                 form_ids=None, form_counts=None, document_frequency=None):
+        """
+        Initialize frequency table
+
+        Args:
+            vocabulary: List of unique lemmas (index = lemma ID)
+            counts: numpy array of lemma frequencies (0 = excluded lemma)
+            form_vocabulary: Optional list of unique word forms
+            form_offsets: Optional CSR offsets into form_ids/form_counts
+            form_ids: Optional form IDs grouped by lemma
+            form_counts: Optional frequencies of each (lemma, form) pair
+            document_frequency: Optional numpy array of document counts
+        """
+        self.vocabulary = vocabulary
+        self.counts = counts
+        self.form_vocabulary = form_vocabulary
+        self.form_offsets = form_offsets
+        self.form_ids = form_ids
+        self.form_counts = form_counts
+        self.document_frequency = document_frequency
+        self._ranked_ids = None
+        self._alphabetical_ids = None
+        self._ranks = None
+        self._search_cache = {}
+
+    @classmethod
+    def from_lemma_ids(cls, vocabulary, lemma_ids, stop_mask=None, words=None, weights=None, token_counts=None,
+                       form_vocabulary=None, form_ids=None):
+        """
+        Build a frequency table from an encoded token sequence
+
+        Args:
+            vocabulary: List of unique lemmas (index = lemma ID)
+            lemma_ids: numpy array of lemma IDs (token sequence)
+            stop_mask: Optional boolean array over lemma IDs; stop words
+                       get a zero count
+            words: Optional list of word forms aligned with lemma_ids,
+                   enables the per-form breakdown
+            weights: Optional per-token weights (e.g. down-weighted
+                     duplicate documents); weighted counts are rounded
+            token_counts: Optional unweighted np.bincount(lemma_ids) that
+                          the caller already has (not modified)
+            form_vocabulary: Optional list of unique word forms; with
+                             form_ids, the already encoded alternative to
+                             words
+            form_ids: Optional numpy array of form IDs aligned with lemma_ids
+
+        Returns:
+            LemmaFrequencyTable: Table for the token sequence
+        """
+        if token_counts is not None and weights is None:
+            counts = token_counts.astype(np.int64)  # copy: stop words are zeroed below
+        else:
+            counts = np.bincount(lemma_ids, weights=weights, minlength=len(vocabulary))
+            counts = np.rint(counts).astype(np.int64) if weights is not None else counts.astype(np.int64)
+        if stop_mask is not None:
+            counts[stop_mask] = 0
+
+        table = cls(vocabulary, counts)
+        if words is not None:
+            form_vocabulary, form_ids = encode_lemmas(words)
+        if form_ids is not None:
+            table._add_forms(lemma_ids, form_vocabulary, form_ids, stop_mask, weights)
+        return table
+
+    def _add_forms(self, lemma_ids, form_vocabulary, form_ids, stop_mask, weights=None):
+        """
+        Count (lemma, form) pairs as packed keys and store them in CSR layout
+
+        Pairs are packed and counted COUNT_SLICE tokens at a time, so no
+        int64 key array over the whole token sequence is built.
+        """
+        num_forms = max(len(form_vocabulary), 1)
+
+        def pair_slices():
+            for start in range(0, len(lemma_ids), COUNT_SLICE):
+                ids = lemma_ids[start:start + COUNT_SLICE]
+                keys = ids.astype(np.int64) * num_forms + form_ids[start:start + COUNT_SLICE]
+                slice_weights = weights[start:start + COUNT_SLICE] if weights is not None else None
+                if stop_mask is not None:
+                    keep = ~stop_mask[ids]
+                    keys = keys[keep]
+                    if slice_weights is not None:
+                        slice_weights = slice_weights[keep]
+                yield keys, slice_weights
+
+        pair_keys, pair_counts = count_keys(pair_slices())
+        if weights is not None:
+            pair_counts = np.rint(pair_counts).astype(np.int64)
+            nonzero = pair_counts > 0
+            pair_keys, pair_counts = pair_keys[nonzero], pair_counts[nonzero]
+
+        pair_lemmas, pair_forms = np.divmod(pair_keys, num_forms)
+        self.form_vocabulary = form_vocabulary
+        self.form_offsets = np.searchsorted(pair_lemmas, np.arange(len(self.vocabulary) + 1))
+        self.form_ids = pair_forms
+        self.form_counts = pair_counts
+
+    def relabeled(self, transform):
+        """
+        Copy of the table with every lemma and word form spelled differently
+        (e.g. transliterated for display); counts are shared, orderings
+        are recomputed for the new spelling
+
+        Args:
+            transform: Function applied to each lemma and form string
+
+        Returns:
+            LemmaFrequencyTable: Table over the transformed vocabulary
+        """
+        return LemmaFrequencyTable(
+            [transform(lemma) for lemma in self.vocabulary],
+            self.counts,
+            [transform(form) for form in self.form_vocabulary] if self.has_forms else None,
+            self.form_offsets,
+            self.form_ids,
+            self.form_counts,
+            self.document_frequency
+        )
+
+    def restricted(self, mask):
+        """
+        Copy of the table that counts only the lemmas selected by a mask
+        (e.g. one part of speech); other lemmas get a zero count like stop
+        words. Vocabulary and word forms are shared.
+
+        Args:
+            mask: Boolean array over lemma IDs
+
+        Returns:
+            LemmaFrequencyTable: Restricted table
+        """
+        document_frequency = self.document_frequency
+        if document_frequency is not None:
+            document_frequency = np.where(mask, document_frequency, 0)
+        return LemmaFrequencyTable(
+            self.vocabulary,
+            np.where(mask, self.counts, 0),
+            self.form_vocabulary,
+            self.form_offsets,
+            self.form_ids,
+            self.form_counts,
+            document_frequency
+        )
+
+    @property
+    def has_forms(self):
+        """True if the per-form breakdown is available"""
+        return self.form_offsets is not None
+
+    @property
+    def total(self):
+        """Total number of counted tokens"""
+        return int(self.counts.sum())
+
+    @property
+    def num_lemmas(self):
+        """Number of lemmas with a non-zero count"""
+        return int(np.count_nonzero(self.counts))
+
+    def ranked_ids(self):
+        """
+        Lemma IDs ordered by frequency (descending)
+
+        Ties keep first-occurrence order, matching Counter.most_common().
+        The order is computed once and cached.
+
+        Returns:
+            numpy.ndarray: IDs of all lemmas with a non-zero count
+        """
+        if self._ranked_ids is None:
+            order = np.argsort(-self.counts, kind='stable')
+            self._ranked_ids = order[:self.num_lemmas]
+        return self._ranked_ids
+
+    def top(self, n=50):
+        """
+        Get the n most frequent lemmas
+
+        Args:
+            n: Number of lemmas
+
+        Returns:
+            list: Tuples of (lemma, frequency)
+        """
+        return [(self.vocabulary[i], int(self.counts[i])) for i in self.ranked_ids()[:n]]
+
+    def forms_of(self, lemma_id):
+        """
+        Get word forms of a lemma with their frequencies
+
+        Args:
+            lemma_id: Lemma ID
+
+        Returns:
+            list: Tuples of (form, frequency), most frequent first
+        """
+        if not self.has_forms:
+            return []
+
+        start, end = self.form_offsets[lemma_id], self.form_offsets[lemma_id + 1]
+        order = np.argsort(-self.form_counts[start:end], kind='stable') + start
+        return [(self.form_vocabulary[self.form_ids[i]], int(self.form_counts[i])) for i in order]
+
+    def alphabetical_ids(self):
+        """
+        Lemma IDs in alphabetical order (computed once and cached)
+
+        Returns:
+            numpy.ndarray: IDs of all lemmas with a non-zero count
+        """
+        if self._alphabetical_ids is None:
+            vocabulary = self.vocabulary
+            self._alphabetical_ids = np.array(
+                sorted(self.ranked_ids(), key=lambda i: (collation_key(vocabulary[i]), vocabulary[i])),
+                dtype=np.int64
+            )
+        return self._alphabetical_ids
+
+    def ranks(self):
+        """
+        Frequency rank of every lemma ID (1 = most frequent, 0 = excluded)
+
+        Returns:
+            numpy.ndarray: Rank per lemma ID
+        """
+        if self._ranks is None:
+            ranked = self.ranked_ids()
+            self._ranks = np.zeros(len(self.vocabulary), dtype=np.int64)
+            self._ranks[ranked] = np.arange(1, len(ranked) + 1)
+        return self._ranks
+
+    def search(self, query="", mode="prefix", sort="frequency"):
+        """
+        Find lemmas matching a prefix or regular expression
+
+        Prefix search is a binary search over the alphabetical order,
+        which narrows the candidates to one slice; within it the prefix is
+        compared with only ё folded, so 'у' does not find words with ў.
+        Regex search scans the vocabulary once. Results are cached per
+        (query, mode, sort), so paging through them costs nothing extra.
+
+        Args:
+            query: Prefix or regular expression (empty = all lemmas)
+            mode: 'prefix' or 'regex'
+            sort: 'frequency' (descending) or 'alphabet'
+
+        Returns:
+            numpy.ndarray: Matching lemma IDs in the requested order
+
+        Raises:
+            re.error: If mode is 'regex' and the pattern is invalid
+        """
+        if not query:
+            return self.ranked_ids() if sort == "frequency" else self.alphabetical_ids()
+
+        cache_key = (query, mode, sort)
+        if cache_key in self._search_cache:
+            return self._search_cache[cache_key]
+
+        if mode == "prefix":
+            # Matches form a contiguous slice of the alphabetical order
+            alphabetical = self.alphabetical_ids()
+            vocabulary = self.vocabulary
+            prefix = collation_key(query.lower())
+
+            def key(i):
+                return collation_key(vocabulary[i])
+
+            start = bisect_left(alphabetical, prefix, key=key)
+            end = bisect_left(alphabetical, prefix + '\U0010ffff', key=key)
+            # Collation is only the sort order: it puts ў with у and і with
+            # и, so the slice is filtered on the actual letters
+            raw_prefix = query.lower().translate(SEARCH_FOLDING)
+            matches = np.array(
+                [i for i in alphabetical[start:end] if vocabulary[i].translate(SEARCH_FOLDING).startswith(raw_prefix)],
+                dtype=np.int64
+            )
+            if sort == "frequency":
+                matches = matches[np.argsort(self.ranks()[matches], kind='stable')]
+        else:
+            pattern = re.compile(query)
+            order = self.ranked_ids() if sort == "frequency" else self.alphabetical_ids()
+            matches = np.array(
+                [i for i in order if pattern.search(self.vocabulary[i])],
+                dtype=np.int64
+            )
+
+        # Keep only the latest few searches
+        if len(self._search_cache) >= 8:
+            self._search_cache.pop(next(iter(self._search_cache)))
+        self._search_cache[cache_key] = matches
+        return matches
@@ -0,0 +1,597 @@
+"""
+Keyness Analysis
+Compares lemma frequencies of a text with a second text or a precompiled
+reference frequency list: log-likelihood, %DIFF and frequency per million,
+computed over aligned count arrays
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+import numpy as np
+import streamlit as st
+
+from analysis_pipeline import analyze_text
+from text_input_handler import extract_text
+from text_cache import get_text_cache
+
+
+# Binary reference list layout version
+REFERENCE_FORMAT = "keyness-reference/1"
+
+# Lemmas converted to the fixed-width array layout per step when a list
+# is written from a stream (write_reference_list)
+WRITE_BATCH = 65536
+
+# Precompiled reference lists (built by scripts/build_reference_list.py)
+REFERENCE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "reference")
+
+# Log-likelihood critical values (1 degree of freedom)
+CRITICAL_VALUES = {
+    0.05: 3.84,
+    0.01: 6.63,
+    0.001: 10.83,
+    0.0001: 15.13
+}
+
+# Keyword directions: key -> display name
+DIRECTIONS = {
+    'positive': "Чаще в тексте",
+    'negative': "Реже в тексте"
+}
+
+
+class FrequencyList:
+    """
+    Lemma frequency list used as the comparison side of a keyness analysis
+
+    Lemmas are kept as a sorted numpy string array, so a text's vocabulary
+    is aligned with it by binary search (np.searchsorted) without Python
+    loops. Lists are stored as uncompressed .npz files and load in
+    milliseconds.
+    """
+
+    def __init__(self, lemmas, counts, name=""):
+        """
+        Initialize frequency list
+
+        Args:
+            lemmas: Sequence of unique lemmas
+            counts: Frequencies aligned with lemmas
+            name: Display name (e.g. corpus name or file name)
+        """
+        lemmas = np.asarray(lemmas, dtype=str)
+        counts = np.asarray(counts, dtype=np.int64)
+        order = np.argsort(lemmas, kind='stable')
+        self.lemmas = lemmas[order]
+        self.counts = counts[order]
+        self.name = name
+
+    @classmethod
+    def from_table(cls, freq_table, name=""):
+        """
+        Build a list from an analysis (lemmas with a non-zero count)
+
+        Args:
+            freq_table: LemmaFrequencyTable of the analysis
+            name: Display name
+
+        Returns:
+            FrequencyList: List for the analysis
+        """
+        ids = np.flatnonzero(freq_table.counts)
+        vocabulary = freq_table.vocabulary
+        return cls([vocabulary[i] for i in ids], freq_table.counts[ids], name)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a list saved by save()
+
+        Args:
+            path: .npz file path
+
+        Returns:
+            FrequencyList: Loaded list
+
+        Raises:
+            ValueError: If the file has another format version
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            if meta.get('format') != REFERENCE_FORMAT:
+                raise ValueError(f"{path}: unsupported reference list format {meta.get('format')}")
+            # Stored sorted, so skip re-sorting in __init__
+            frequency_list = cls.__new__(cls)
+            frequency_list.lemmas = data['lemmas']
+            frequency_list.counts = data['counts']
+            frequency_list.name = meta.get('name', '')
+        return frequency_list
+
+    def save(self, path, **meta):
+        """
+        Save the list as .npz (sorted lemmas, counts and JSON metadata)
+
+        Args:
+            path: Output file path or binary file (e.g. from
+                  atomic_files.atomic_open)
+            **meta: Extra metadata (e.g. language, source files)
+        """
+        meta = dict(meta, format=REFERENCE_FORMAT, name=self.name,
+                    lemmas=len(self.lemmas), tokens=self.total)
+        if hasattr(path, 'write'):
+            np.savez(path, lemmas=self.lemmas, counts=self.counts, meta=np.array(json.dumps(meta, ensure_ascii=False)))
+            return
+        with open(path, 'wb') as f:
+            self.save(f, **meta)
+
+    @property
+    def total(self):
+        """Total number of counted tokens"""
+        return int(self.counts.sum())
+
+    def __len__(self):
+        return len(self.lemmas)
+
+
+def write_reference_list(file, items, name, **meta):
+    """
+    Write a reference list from sorted (lemma, count) pairs in one pass
+
+    Produces the .npz layout of FrequencyList.save() without holding the
+    list in memory: lemmas and counts go to temporary files while the
+    pairs stream by (the fixed-width lemma array needs the longest lemma
+    before its header), then the archive members are written in batches.
+
+    Args:
+        file: Seekable binary file (e.g. from atomic_files.atomic_open)
+        items: Iterable of (lemma, count) pairs sorted by lemma, such as
+               external_counts.SpillingCounter.items(); lemmas must not
+               contain newlines
+        name: Display name
+        **meta: Extra metadata (e.g. language, source files)
+
+    Returns:
+        tuple: (lemmas, tokens) - number of lemmas and total count
+    """
+    num_lemmas, tokens, width = 0, 0, 1
+    with tempfile.TemporaryFile() as lemma_file, tempfile.TemporaryFile() as count_file:
+        lemma_text = io.TextIOWrapper(lemma_file, encoding='utf-8', newline='\n')
+        batch = []
+        for lemma, count in items:
+            lemma_text.write(lemma + '\n')
+            width = max(width, len(lemma))
+            batch.append(count)
+            tokens += count
+            num_lemmas += 1
+            if len(batch) >= WRITE_BATCH:
+                count_file.write(np.asarray(batch, dtype='<i8').tobytes())
+                batch.clear()
+        count_file.write(np.asarray(batch, dtype='<i8').tobytes())
+        lemma_text.detach()  # flushes; the file stays open for reading back
+        lemma_file.seek(0)
+        count_file.seek(0)
+
+        meta = dict(meta, format=REFERENCE_FORMAT, name=name, lemmas=num_lemmas, tokens=tokens)
+        lemma_dtype = np.dtype(f'<U{width}')
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            with archive.open('lemmas.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array_header_1_0(member, {
+                    'descr': np.lib.format.dtype_to_descr(lemma_dtype),
+                    'fortran_order': False,
+                    'shape': (num_lemmas,)
+                })
+                lines = io.TextIOWrapper(lemma_file, encoding='utf-8', newline='\n')
+                batch = []
+                for line in lines:
+                    batch.append(line[:-1])
+                    if len(batch) >= WRITE_BATCH:
+                        member.write(np.asarray(batch, dtype=lemma_dtype).tobytes())
+                        batch.clear()
+                member.write(np.asarray(batch, dtype=lemma_dtype).tobytes())
+                lines.detach()
+            with archive.open('counts.npy', 'w', force_zip64=True) as member:
+                np.lib.format.write_array_header_1_0(member, {
+                    'descr': np.lib.format.dtype_to_descr(np.dtype('<i8')),
+                    'fortran_order': False,
+                    'shape': (num_lemmas,)
+                })
+                shutil.copyfileobj(count_file, member)
+            with archive.open('meta.npy', 'w') as member:
+                np.save(member, np.array(json.dumps(meta, ensure_ascii=False)), allow_pickle=False)
+    return num_lemmas, tokens
+
+
+def iter_reference_list(path):
+    """
+    Read the (lemma, count) pairs of a saved list in batches
+
+    The counterpart of write_reference_list(): lemmas and counts are read
+    from the archive members WRITE_BATCH at a time, so a large list is
+    never loaded as a whole.
+
+    Args:
+        path: .npz file path
+
+    Yields:
+        tuple: (lemma, count) pairs sorted by lemma
+
+    Raises:
+        ValueError: If the file has another format version
+    """
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('meta.npy') as member:
+            meta = json.loads(str(np.load(member, allow_pickle=False)))
+        if meta.get('format') != REFERENCE_FORMAT:
+            raise ValueError(f"{path}: unsupported reference list format {meta.get('format')}")
+        with archive.open('lemmas.npy') as lemma_member, archive.open('counts.npy') as count_member:
+            lemma_shape, lemma_dtype = _read_npy_header(lemma_member)
+            _, count_dtype = _read_npy_header(count_member)
+            remaining = lemma_shape[0]
+            while remaining:
+                size = min(remaining, WRITE_BATCH)
+                lemmas = np.frombuffer(lemma_member.read(size * lemma_dtype.itemsize), dtype=lemma_dtype)
+                counts = np.frombuffer(count_member.read(size * count_dtype.itemsize), dtype=count_dtype)
+                yield from zip(lemmas.tolist(), counts.tolist())
+                remaining -= size
+
+
+def _read_npy_header(member):
+    """Read the header of an .npy archive member; returns (shape, dtype)"""
+    version = np.lib.format.read_magic(member)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(member)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(member)
+    return shape, dtype
+
+
+def _find_sorted(sorted_lemmas, lemmas):
+    """Positions of lemmas in a sorted lemma array and a mask of those present"""
+    positions = np.searchsorted(sorted_lemmas, lemmas)
+    if len(sorted_lemmas) == 0:
+        return positions, np.zeros(len(lemmas), dtype=bool)
+    found = sorted_lemmas[np.minimum(positions, len(sorted_lemmas) - 1)] == lemmas
+    return positions, found
+
+
+def align_counts(freq_table, reference, stop_words=None):
+    """
+    Align the counts of an analysis and a reference list on common lemma IDs
+
+    Lemma IDs are reference positions; lemmas missing from the reference
+    get IDs after them with a zero reference count. Only those extra
+    lemmas are materialized, the reference strings are never copied.
+    Stop words are zeroed in the reference as well, so both sides are
+    counted the same way.
+
+    Args:
+        freq_table: LemmaFrequencyTable of the analysis (stop words zeroed)
+        reference: FrequencyList to compare with
+        stop_words: Optional set of stop words to exclude from the reference
+
+    Returns:
+        tuple: (study_counts, reference_counts, extra_lemmas) - count arrays
+               over the union of both vocabularies and the lemmas with IDs
+               from len(reference) on
+    """
+    ids = np.flatnonzero(freq_table.counts)
+    vocabulary = np.array([freq_table.vocabulary[i] for i in ids], dtype=str)
+    counts = freq_table.counts[ids]
+
+    ref_counts = reference.counts
+    if stop_words:
+        # Stop words keep their lemma ID with a zero count
+        positions, found = _find_sorted(reference.lemmas, np.array(sorted(stop_words), dtype=str))
+        ref_counts = ref_counts.copy()
+        ref_counts[positions[found]] = 0
+
+    # Position of each text lemma in the sorted reference
+    positions, found = _find_sorted(reference.lemmas, vocabulary)
+    missing = ~found
+    num_missing = int(np.count_nonzero(missing))
+
+    study_counts = np.zeros(len(reference) + num_missing, dtype=np.int64)
+    study_counts[positions[found]] = counts[found]
+    study_counts[len(reference):] = counts[missing]
+    reference_counts = np.concatenate([ref_counts, np.zeros(num_missing, dtype=np.int64)])
+    return study_counts, reference_counts, vocabulary[missing]
+
+
+def score_keyness(study_counts, reference_counts):
+    """
+    Compute keyness statistics for aligned count arrays, vectorized
+
+    Log-likelihood (G2) follows Rayson and Garside; its sign is negative
+    for lemmas that are relatively less frequent in the text. %DIFF is
+    the difference of normalized frequencies relative to the reference
+    (infinite for lemmas absent from the reference).
+
+    Args:
+        study_counts: Lemma counts in the text
+        reference_counts: Lemma counts in the reference, same lemma IDs
+
+    Returns:
+        dict: 'study_ipm', 'reference_ipm', 'log_likelihood', 'percent_diff'
+              arrays and the 'study_total' and 'reference_total' token counts
+    """
+    a = np.asarray(study_counts, dtype=np.float64)
+    b = np.asarray(reference_counts, dtype=np.float64)
+    c, d = a.sum(), b.sum()
+
+    study_ipm = a / max(c, 1.0) * 1e6
+    reference_ipm = b / max(d, 1.0) * 1e6
+
+    # Expected counts if the lemma were equally frequent in both corpora
+    expected_a = c * (a + b) / max(c + d, 1.0)
+    expected_b = d * (a + b) / max(c + d, 1.0)
+
+    # 0 * log(0) terms are zero; evaluating only non-zero counts also keeps
+    # numpy off the slow inf/nan path for a large reference vocabulary
+    terms = np.zeros(len(a))
+    nonzero = np.flatnonzero(a)
+    terms[nonzero] += a[nonzero] * np.log(a[nonzero] / expected_a[nonzero])
+    nonzero = np.flatnonzero(b)
+    terms[nonzero] += b[nonzero] * np.log(b[nonzero] / expected_b[nonzero])
+    log_likelihood = 2.0 * terms
+
+    percent_diff = np.full(len(a), np.inf)
+    nonzero = np.flatnonzero(reference_ipm)
+    percent_diff[nonzero] = (study_ipm[nonzero] - reference_ipm[nonzero]) * 100.0 / reference_ipm[nonzero]
+    log_likelihood = np.where(study_ipm < reference_ipm, -log_likelihood, log_likelihood)
+
+    return {
+        'study_ipm': study_ipm,
+        'reference_ipm': reference_ipm,
+        'log_likelihood': log_likelihood,
+        'percent_diff': percent_diff,
+        'study_total': int(c),
+        'reference_total': int(d)
+    }
+
+
+def compare(freq_table, reference, stop_words=None):
+    """
+    Align an analysis with a reference list and score every lemma
+
+    Args:
+        freq_table: LemmaFrequencyTable of the analysis
+        reference: FrequencyList to compare with
+        stop_words: Optional set of stop words to exclude from the reference
+
+    Returns:
+        dict: 'reference_lemmas', 'extra_lemmas' (see align_counts()),
+              'study_counts', 'reference_counts' plus the statistics from
+              score_keyness()
+    """
+    study_counts, reference_counts, extra_lemmas = align_counts(freq_table, reference, stop_words)
+    result = {
+        'reference_lemmas': reference.lemmas,
+        'extra_lemmas': extra_lemmas,
+        'study_counts': study_counts,
+        'reference_counts': reference_counts
+    }
+    result.update(score_keyness(study_counts, reference_counts))
+    return result
+
+
+def lemma_of(comparison, lemma_id):
+    """
+    Get the lemma string of an aligned lemma ID
+
+    Args:
+        comparison: Result of compare()
+        lemma_id: Lemma ID in the aligned arrays
+
+    Returns:
+        str: Lemma
+    """
+    num_reference = len(comparison['reference_lemmas'])
+    if lemma_id < num_reference:
+        return str(comparison['reference_lemmas'][lemma_id])
+    return str(comparison['extra_lemmas'][lemma_id - num_reference])
+
+
+def top_keywords(comparison, direction='positive', top_n=50, p_value=0.05, min_count=1):
+    """
+    Rank keywords in one direction by log-likelihood
+
+    Args:
+        comparison: Result of compare()
+        direction: 'positive' (over-represented in the text) or
+                   'negative' (under-represented)
+        top_n: Number of keywords to return
+        p_value: Significance level from CRITICAL_VALUES (None = no cut-off)
+        min_count: Minimum count on the side where the lemma is more frequent
+
+    Returns:
+        list: Tuples of (lemma, study count, reference count, study ipm,
+              reference ipm, log-likelihood, %DIFF), strongest first
+    """
+    scores = comparison['log_likelihood']
+    if direction == 'positive':
+        candidates = (scores > 0) & (comparison['study_counts'] >= min_count)
+        values = scores
+    else:
+        candidates = (scores < 0) & (comparison['reference_counts'] >= min_count)
+        values = -scores
+    if p_value is not None:
+        candidates &= values >= CRITICAL_VALUES[p_value]
+
+    ids = np.flatnonzero(candidates)
+    if len(ids) == 0:
+        return []
+
+    # argpartition keeps selection linear in the vocabulary size
+    k = min(top_n, len(ids))
+    top = ids[np.argpartition(-values[ids], k - 1)[:k]]
+    top = top[np.argsort(-values[top], kind='stable')]
+    return [
+        (
+            lemma_of(comparison, i),
+            int(comparison['study_counts'][i]),
+            int(comparison['reference_counts'][i]),
+            float(comparison['study_ipm'][i]),
+            float(comparison['reference_ipm'][i]),
+            float(comparison['log_likelihood'][i]),
+            float(comparison['percent_diff'][i])
+        )
+        for i in top
+    ]
+
+
+def list_reference_files(reference_dir=REFERENCE_DIR):
+    """
+    Find precompiled reference lists
+
+    Args:
+        reference_dir: Directory with .npz reference lists
+
+    Returns:
+        list: File names, sorted
+    """
+    if not os.path.isdir(reference_dir):
+        return []
+    return sorted(name for name in os.listdir(reference_dir) if name.endswith('.npz'))
+
+
+@st.cache_resource
+def load_reference(path, mtime):
+    """Load and cache a reference list (mtime invalidates the cache on rebuild)"""
+    return FrequencyList.load(path)
+
+
+def _format_percent_diff(value):
+    """%DIFF for display: lemmas absent from the reference have no finite value"""
+    return "∞" if np.isinf(value) else f"{value:+.1f}"
+
+
+def _keyword_table(keywords):
+    """Columns for st.table / CSV from top_keywords() rows"""
+    return {
+        "Лемма": [row[0] for row in keywords],
+        "Частота (текст)": [row[1] for row in keywords],
+        "Частота (эталон)": [row[2] for row in keywords],
+        "ipm (текст)": [round(row[3], 1) for row in keywords],
+        "ipm (эталон)": [round(row[4], 1) for row in keywords],
+        "LL": [round(row[5], 2) for row in keywords],
+        "%DIFF": [_format_percent_diff(row[6]) for row in keywords]
+    }
+
+
+def _keywords_csv(comparison, p_value, min_count):
+    """CSV with keywords of both directions"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Направление', 'Лемма', 'Частота (текст)', 'Частота (эталон)',
+                     'ipm (текст)', 'ipm (эталон)', 'LL', '%DIFF'])
+    for direction, label in DIRECTIONS.items():
+        for row in top_keywords(comparison, direction, len(comparison['study_counts']), p_value, min_count):
+            writer.writerow([label, row[0], row[1], row[2], round(row[3], 2), round(row[4], 2),
+                             round(row[5], 3), _format_percent_diff(row[6])])
+    return output.getvalue().encode('utf-8-sig')  # BOM for Excel compatibility
+
+
+def _get_second_analysis(uploaded_file, lang_code, stop_words):
+    """Analyze the uploaded comparison text once per file/language/stop words (text from the extraction cache)"""
+    data = uploaded_file.getvalue()
+    key = (hashlib.sha1(data).hexdigest(), lang_code, frozenset(stop_words))
+    cached = st.session_state.get('keyness_second_analysis')
+    if cached is not None and cached['key'] == key:
+        return cached['reference']
+
+    text = get_text_cache().get_or_extract(data, uploaded_file.name, extract_text)
+    analysis = analyze_text(text, lang_code, stop_words)
+    reference = FrequencyList.from_table(analysis['freq_table'], uploaded_file.name)
+    st.session_state.keyness_second_analysis = {'key': key, 'reference': reference}
+    return reference
+
+
+def render_keyness_ui(freq_table, lang_code, stop_words, safe_filename, top_n=50):
+    """
+    Render the keyness comparison with a second text or a reference list
+
+    Args:
+        freq_table: LemmaFrequencyTable of the analyzed text
+        lang_code: Language code ('ru', 'be' or 'auto')
+        stop_words: Set of stop words used for the analysis
+        safe_filename: Base name for the downloaded file
+        top_n: Number of keywords shown per direction
+    """
+    with st.expander("⚖️ Ключевые слова: сравнение с другим текстом или эталонным корпусом", expanded=False):
+        reference_files = list_reference_files()
+        source = st.radio(
+            "Сравнить с:",
+            options=["Другой текст", "Эталонный корпус"],
+            horizontal=True,
+            key="keyness_source"
+        )
+
+        reference = None
+        if source == "Другой текст":
+            uploaded_file = st.file_uploader(
+                "Текст для сравнения (.txt, .pdf, .docx):",
+                type=['txt', 'pdf', 'docx'],
+                key="keyness_file"
+            )
+            if uploaded_file is not None:
+                with st.spinner("Анализ текста для сравнения..."):
+                    reference = _get_second_analysis(uploaded_file, lang_code, stop_words)
+        elif reference_files:
+            name = st.selectbox("Эталонный список:", options=reference_files, key="keyness_reference")
+            path = os.path.join(REFERENCE_DIR, name)
+            reference = load_reference(path, os.path.getmtime(path))
+        else:
+            st.info("Эталонные списки не найдены. Создайте их командой "
+                    "`python scripts/build_reference_list.py` (папка data/reference/)")
+
+        if reference is None:
+            return
+
+        col1, col2 = st.columns(2)
+        with col1:
+            p_value = st.selectbox(
+                "Уровень значимости:",
+                options=list(CRITICAL_VALUES),
+                format_func=lambda p: f"p < {p} (LL ≥ {CRITICAL_VALUES[p]})",
+                key="keyness_p_value"
+            )
+        with col2:
+            min_count = st.number_input(
+                "Мин. частота:",
+                min_value=1,
+                value=3,
+                step=1,
+                key="keyness_min_count",
+                help="Минимальная частота леммы в том корпусе, где она встречается чаще"
+            )
+
+        comparison = compare(freq_table, reference, stop_words)
+        st.caption(
+            f"Текст: {comparison['study_total']:,} словоупотреблений, "
+            f"«{reference.name}»: {comparison['reference_total']:,} словоупотреблений"
+        )
+
+        columns = st.columns(2)
+        for column, (direction, label) in zip(columns, DIRECTIONS.items()):
+            with column:
+                st.markdown(f"**{label}**")
+                keywords = top_keywords(comparison, direction, top_n, p_value, int(min_count))
+                if keywords:
+                    st.table(_keyword_table(keywords))
+                else:
+                    st.info("Значимых различий не найдено")
+
+        st.download_button(
+            label="📥 Скачать ключевые слова (CSV)",
+            data=_keywords_csv(comparison, p_value, int(min_count)),
+            file_name=f"keywords_{safe_filename}.csv",
+            mime="text/csv",
+            key="keyness_download"
+        )
@@ -0,0 +1,165 @@
+"""
+Language Detection Module
+Fast Russian/Belarusian identification for documents and per-token routing
+of mixed-language texts to the matching lemmatizer
+"""
+
+import re
+
+from ru_support import lemmatize_russian, is_known_russian
+from belarusian.be_support import lemmatize_belarusian, is_known_belarusian
+from analysis_profiler import profiled_stage
+
+
+# Character n-gram weights for document-level scoring.
+# Only n-grams that are typical for one language and rare in the other
+# are listed, so the score is a simple weighted count.
+BELARUSIAN_NGRAMS = {
+    'ў': 3.0, 'і': 2.0, "'": 1.0, 'дз': 1.0, 'ць': 2.0, 'цц': 2.0,
+    'чы': 2.0, 'шы': 2.0, 'жы': 2.0, 'рэ': 1.5, 'тэ': 1.5, 'ння': 1.5,
+    'ага ': 1.0, 'аў ': 1.5,
+    # Łacinka (Latin-script Belarusian)
+    'ŭ': 3.0, 'ł': 2.0, 'ć': 2.0, 'ś': 2.0, 'ź': 2.0, 'č': 1.5, 'š': 1.5, 'ž': 1.5,
+}
+RUSSIAN_NGRAMS = {
+    'и': 2.0, 'щ': 3.0, 'ъ': 3.0, 'ть': 2.0, 'ого ': 1.0, 'ие': 1.0,
+    'чи': 2.0, 'ши': 2.0, 'жи': 2.0, 'тся': 1.5,
+}
+
+# Letter signatures for single tokens: letters and patterns that occur
+# in only one of the two languages
+BELARUSIAN_SIGNATURE = re.compile(r"[ўі'ćčłńśšŭźž]|[чшж]ы|ць|[бвгджзклмнпрстфхцчш]э")
+RUSSIAN_SIGNATURE = re.compile(r"[иъщ]|ть")
+
+# Sample size used for document-level detection
+SAMPLE_CHUNKS = 10
+SAMPLE_CHUNK_SIZE = 2000
+
+LANGUAGE_NAMES = {
+    'ru': "Русский",
+    'be': "Белорусский"
+}
+
+
+def sample_text(text, chunks=SAMPLE_CHUNKS, chunk_size=SAMPLE_CHUNK_SIZE):
+    """
+    Take evenly spaced chunks of the text for language scoring
+
+    Args:
+        text: Full document text
+        chunks: Number of chunks to take
+        chunk_size: Length of each chunk in characters
+
+    Returns:
+        str: Lowercased sample (the whole text if it is short)
+    """
+    if len(text) <= chunks * chunk_size:
+        return text.lower()
+
+    step = len(text) // chunks
+    return " ".join(
+        text[i * step:i * step + chunk_size] for i in range(chunks)
+    ).lower()
+
+
+@profiled_stage('detection')
+def detect_language(text):
+    """
+    Detect the document language by character n-gram scoring on a sample
+
+    Args:
+        text: Document text
+
+    Returns:
+        tuple: (lang_code, confidence) where lang_code is 'ru' or 'be' and
+               confidence is the winning share of the total score (0..1)
+    """
+    sample = sample_text(text)
+    be_score = sum(weight * sample.count(ngram) for ngram, weight in BELARUSIAN_NGRAMS.items())
+    ru_score = sum(weight * sample.count(ngram) for ngram, weight in RUSSIAN_NGRAMS.items())
+
+    total = be_score + ru_score
+    if total == 0:
+        return 'ru', 0.0
+    if be_score > ru_score:
+        return 'be', be_score / total
+    return 'ru', ru_score / total
+
+
+def detect_token_language(word, document_language):
+    """
+    Decide which lemmatizer a single word form should go to
+
+    Letter signatures decide first: ў, і, ', чы/шы/жы, ць, э after a
+    consonant and the Łacinka letters (ł, ŭ, č, ...) are Belarusian;
+    и, ъ, щ and ть are Russian. Words without a signature are checked
+    against the GrammarDB and pymorphy3 dictionaries, and anything still
+    ambiguous follows the document language.
+
+    Args:
+        word: Lowercase word form
+        document_language: Language code of the document ('ru' or 'be')
+
+    Returns:
+        str: 'ru' or 'be'
+    """
+    is_belarusian = BELARUSIAN_SIGNATURE.search(word) is not None
+    is_russian = RUSSIAN_SIGNATURE.search(word) is not None
+    if is_belarusian != is_russian:
+        return 'be' if is_belarusian else 'ru'
+
+    # No signature (or conflicting ones): use dictionary membership
+    in_belarusian = is_known_belarusian(word)
+    in_russian = is_known_russian(word)
+    if in_belarusian != in_russian:
+        return 'be' if in_belarusian else 'ru'
+
+    return document_language
+
+
+def route_tokens(words, document_language):
+    """
+    Group unique word forms by the lemmatizer they should be sent to
+
+    Args:
+        words: List of tokens
+        document_language: Language code of the document ('ru' or 'be')
+
+    Returns:
+        dict: {'ru': [...], 'be': [...]} lists of unique word forms
+    """
+    routes = {'ru': [], 'be': []}
+    for word in dict.fromkeys(words):
+        routes[detect_token_language(word, document_language)].append(word)
+    return routes
+
+
+@profiled_stage('lemmatize')
+def lemmatize_mixed(words, document_language, stats=None, tags=None):
+    """
+    Lemmatize a possibly mixed-language token list
+
+    Each unique word form is routed once and lemmatized in one batch per
+    language, then lemmas are mapped back onto the token sequence.
+
+    Args:
+        words: List of tokens
+        document_language: Language code of the document ('ru' or 'be')
+        stats: Optional dict for Belarusian lemmatizer counters
+        tags: Optional dict that receives word form -> native part-of-speech
+              tag from the lemmatizer the form was routed to
+
+    Returns:
+        tuple: (lemmas, token_counts) where token_counts maps language
+               code to the number of tokens routed to that language
+    """
+    routes = route_tokens(words, document_language)
+
+    form_to_lemma = dict(zip(routes['ru'], lemmatize_russian(routes['ru'], tags)))
+    form_to_lemma.update(zip(routes['be'], lemmatize_belarusian(routes['be'], stats, tags)))
+
+    belarusian_forms = set(routes['be'])
+    be_tokens = sum(1 for word in words if word in belarusian_forms)
+    token_counts = {'ru': len(words) - be_tokens, 'be': be_tokens}
+
+    return [form_to_lemma[word] for word in words], token_counts
@@ -0,0 +1,99 @@
+"""
+Lemma Vocabulary
+Maps lemma sequences to compact integer IDs for array-based counting
+"""
+
+import numpy as np
+
+
+# Keys counted at once by count_keys(): sorting never holds more than one
+# slice plus the distinct keys counted so far
+COUNT_SLICE = 1 << 20
+
+
+def encode_with(index, items):
+    """
+    Encode a sequence with a growing index (new items get the next IDs)
+
+    Args:
+        index: Dictionary item -> ID, extended in place
+        items: List of strings (one per token)
+
+    Returns:
+        numpy.ndarray: int32 IDs aligned with items
+    """
+    return np.fromiter(
+        (index.setdefault(item, len(index)) for item in items),
+        dtype=np.int32,
+        count=len(items)
+    )
+
+
+def encode_lemmas(lemmas):
+    """
+    Encode a sequence of lemmas as integer IDs
+
+    IDs are assigned in order of first occurrence, so the same lemma
+    list always produces the same encoding.
+
+    Args:
+        lemmas: List of lemma strings (one per token)
+
+    Returns:
+        tuple: (vocabulary, lemma_ids) where vocabulary is a list of unique
+               lemmas and lemma_ids is an int32 numpy array of token IDs
+    """
+    index = {}
+    lemma_ids = encode_with(index, lemmas)
+    return list(index), lemma_ids
+
+
+def count_keys(slices):
+    """
+    Count integer keys (e.g. packed lemma/form pairs) that arrive in slices
+
+    Each slice is merged into the running totals with one sort, so peak
+    memory is the distinct keys plus one slice rather than one entry per
+    token of the whole sequence.
+
+    Args:
+        slices: Iterable of (keys, weights) - int64 key arrays and aligned
+                weights, or None to count each key once
+
+    Returns:
+        tuple: (keys, counts) - sorted unique keys and their totals (int64,
+               or float64 for weighted slices)
+    """
+    keys = np.empty(0, dtype=np.int64)
+    counts = np.empty(0, dtype=np.int64)
+    for slice_keys, slice_weights in slices:
+        if len(slice_keys) == 0:
+            continue
+        if slice_weights is None:
+            slice_weights = np.ones(len(slice_keys), dtype=np.int64)
+        all_keys = np.concatenate([keys, slice_keys])
+        all_counts = np.concatenate([counts, slice_weights])
+        order = np.argsort(all_keys, kind='stable')
+        all_keys = all_keys[order]
+        starts = np.flatnonzero(np.concatenate([[True], all_keys[1:] != all_keys[:-1]]))
+        keys = all_keys[starts]
+        counts = np.add.reduceat(all_counts[order], starts)
+    return keys, counts
+
+
+def stop_word_mask(vocabulary, stop_words):
+    """
+    Build a boolean mask marking stop words in the vocabulary
+
+    Args:
+        vocabulary: List of unique lemmas (index = lemma ID)
+        stop_words: Set of stop words
+
+    Returns:
+        numpy.ndarray: Boolean array, True where the lemma is a stop word
+    """
+    return np.fromiter(
+        (lemma in stop_words for lemma in vocabulary),
+        dtype=bool,
+        count=len(vocabulary)
+    )
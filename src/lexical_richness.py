@@ -0,0 +1,216 @@
+"""
+Lexical Richness
+Length-robust diversity measures over the lemma token sequence: MTLD
+(streamed over lemma IDs), HD-D, Yule's K, Herdan's C and hapax/dis
+legomena ratios (vectorized over the frequency spectrum)
+"""
+
+from fractions import Fraction
+
+import numpy as np
+import streamlit as st
+
+
+# Measures shown in the app: key -> (display name, description)
+RICHNESS_MEASURES = {
+    'ttr': ("TTR", "Доля уникальных лемм среди всех слов; сильно зависит от длины текста"),
+    'mtld': ("MTLD", "Средняя длина отрезка, на котором TTR держится выше 0,72 (в обе стороны); "
+                     "почти не зависит от длины текста"),
+    'hdd': ("HD-D", "Ожидаемая доля разных лемм в случайной выборке из 42 слов"),
+    'yule_k': ("K Юла", "Вероятность повторной встречи леммы (×10⁴); меньше — богаче словарь"),
+    'herdan_c': ("C Хердана", "log(лемм) / log(слов)"),
+    'hapax_ratio': ("Доля hapax legomena", "Леммы, встретившиеся один раз, от всех лемм"),
+    'dis_ratio': ("Доля dis legomena", "Леммы, встретившиеся дважды, от всех лемм")
+}
+
+# MTLD factor threshold (McCarthy & Jarvis 2010) and HD-D sample size
+MTLD_THRESHOLD = 0.72
+HDD_SAMPLE = 42
+
+# Lemma IDs converted to Python ints per block while streaming MTLD
+MTLD_BLOCK = 65536
+
+
+def frequency_spectrum(counts):
+    """
+    Frequency spectrum of a count vector
+
+    Args:
+        counts: Token count per lemma (zeros are ignored)
+
+    Returns:
+        tuple: (frequencies, num_lemmas) - sorted distinct frequencies m
+               and the number of lemmas V(m) occurring exactly m times
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    return np.unique(counts[counts > 0], return_counts=True)
+
+
+def _mtld_factors(blocks, num_types, threshold=MTLD_THRESHOLD):
+    """
+    Count MTLD factors over a stream of lemma ID blocks
+
+    A factor ends when the running TTR of the current segment falls to
+    the threshold; the remaining segment adds a partial factor. Types of
+    the current segment are marked with the segment number, so the state
+    is one list over the vocabulary. With the threshold as p/q, the TTR
+    test types / tokens <= p/q is tracked as the integer q*types - p*tokens,
+    which only a repeated lemma can lower.
+
+    Args:
+        blocks: Iterable of lemma ID lists, in reading order
+        num_types: Vocabulary size (IDs are below it)
+        threshold: TTR threshold
+
+    Returns:
+        float: Number of factors (with the partial one)
+    """
+    ratio = Fraction(threshold).limit_denominator(1000)
+    new_type, repeat = ratio.denominator - ratio.numerator, ratio.numerator
+    seen = [-1] * num_types
+    segment = 0
+    balance = 0
+    factors = 0
+    for block in blocks:
+        for lemma_id in block:
+            if seen[lemma_id] != segment:
+                seen[lemma_id] = segment
+                balance += new_type
+            else:
+                balance -= repeat
+                if balance <= 0:
+                    factors += 1
+                    segment += 1
+                    balance = 0
+
+    # Partial factor of the unfinished segment
+    types = seen.count(segment)
+    if types:
+        tokens = types + (new_type * types - balance) // repeat
+        factors += (1 - types / tokens) / (1 - threshold)
+    return factors
+
+
+def _iter_blocks(lemma_ids, block=MTLD_BLOCK):
+    """Yield consecutive slices of an ID array as Python lists"""
+    for start in range(0, len(lemma_ids), block):
+        yield lemma_ids[start:start + block].tolist()
+
+
+def mtld(lemma_ids, num_types, threshold=MTLD_THRESHOLD):
+    """
+    Bidirectional MTLD (mean of the forward and backward passes)
+
+    Both passes stream over the ID array block by block; the backward
+    pass reads a reversed view, so no copy of the sequence is made.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        num_types: Vocabulary size
+        threshold: TTR threshold
+
+    Returns:
+        float: MTLD in tokens, or None for an empty sequence
+    """
+    if len(lemma_ids) == 0:
+        return None
+    values = []
+    for sequence in (lemma_ids, lemma_ids[::-1]):
+        factors = _mtld_factors(_iter_blocks(sequence), num_types, threshold)
+        # A text that never drops to the threshold has MTLD of its length
+        values.append(len(lemma_ids) / factors if factors > 0 else float(len(lemma_ids)))
+    return sum(values) / 2
+
+
+def hdd(frequencies, num_lemmas, total, sample=HDD_SAMPLE):
+    """
+    HD-D: expected type-token ratio of a random sample of tokens
+
+    For a lemma with frequency m, the chance that a sample of n tokens
+    (drawn without replacement) misses it is the hypergeometric
+    C(N - m, n) / C(N, n) = prod_i (N - m - i) / (N - i), computed for
+    all distinct frequencies at once.
+
+    Args:
+        frequencies: Distinct frequencies from frequency_spectrum()
+        num_lemmas: V(m) for each frequency
+        total: Number of tokens N
+        sample: Sample size n
+
+    Returns:
+        float: HD-D between 0 and 1, or None if the text is shorter than
+               the sample
+    """
+    if total < sample:
+        return None
+    steps = np.arange(sample, dtype=np.float64)
+    remaining = np.maximum(total - frequencies[:, None].astype(np.float64) - steps, 0)
+    miss = np.prod(remaining / (total - steps), axis=1)
+    return float(np.sum(num_lemmas * (1 - miss)) / sample)
+
+
+def lexical_richness(lemma_ids, num_types, token_counts=None):
+    """
+    Compute all richness measures for a token sequence
+
+    Stop words are included: the measures describe the whole text.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        num_types: Vocabulary size
+        token_counts: Optional np.bincount(lemma_ids) if already counted
+
+    Returns:
+        dict: Values for the keys of RICHNESS_MEASURES (None where the
+              text is too short for a measure)
+    """
+    if token_counts is None:
+        token_counts = np.bincount(lemma_ids, minlength=num_types)
+    frequencies, num_lemmas = frequency_spectrum(token_counts)
+    total = int(np.sum(frequencies * num_lemmas))
+    types = int(np.sum(num_lemmas))
+    if total == 0:
+        return dict.fromkeys(RICHNESS_MEASURES)
+
+    hapax = int(num_lemmas[frequencies == 1].sum())
+    dis = int(num_lemmas[frequencies == 2].sum())
+    # Yule's K = 10^4 * (sum m^2 V(m) - N) / N^2
+    squares = float(np.sum(frequencies.astype(np.float64) ** 2 * num_lemmas))
+    return {
+        'ttr': types / total,
+        'mtld': mtld(lemma_ids, num_types),
+        'hdd': hdd(frequencies, num_lemmas, total),
+        'yule_k': 1e4 * (squares - total) / total ** 2,
+        'herdan_c': float(np.log(types) / np.log(total)) if total > 1 else None,
+        'hapax_ratio': hapax / types,
+        'dis_ratio': dis / types
+    }
+
+
+def _format_measure(key, value):
+    """Display value of a measure"""
+    if value is None:
+        return "—"
+    if key == 'mtld':
+        return f"{value:.1f}"
+    if key == 'yule_k':
+        return f"{value:.2f}"
+    if key in ('ttr', 'hapax_ratio', 'dis_ratio'):
+        return f"{value * 100:.1f}%"
+    return f"{value:.3f}"
+
+
+def render_richness_ui(richness):
+    """
+    Render the lexical richness measures of an analysis
+
+    Args:
+        richness: Result of lexical_richness()
+    """
+    with st.expander("📐 Лексическое богатство", expanded=False):
+        st.caption("Все слова текста, включая стоп-слова, по леммам")
+        st.table({
+            "Показатель": [name for name, _ in RICHNESS_MEASURES.values()],
+            "Значение": [_format_measure(key, richness.get(key)) for key in RICHNESS_MEASURES],
+            "Описание": [description for _, description in RICHNESS_MEASURES.values()]
+        })
@@ -0,0 +1,239 @@
+"""
+Near-Duplicate Detection
+MinHash signatures over lemma shingles and LSH banding, so reposts and
+syndicated copies in a document collection are found without comparing
+every pair of documents
+"""
+
+import numpy as np
+
+
+# Signature length (number of hash functions)
+NUM_PERM = 128
+
+# LSH banding: BANDS x ROWS = NUM_PERM. Documents agreeing on all rows of
+# at least one band become candidates; with 16 x 8 the detection
+# probability passes 50% at a Jaccard similarity of about 0.7
+BANDS = 16
+ROWS = 8
+
+# Lemmas per shingle
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity at which candidates count as duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# Duplicate handling before aggregation: key -> display name
+DUPLICATE_POLICIES = {
+    'drop': "Исключить дубликаты",
+    'downweight': "Понизить вес дубликатов",
+    'keep': "Учитывать все документы"
+}
+
+# Shingles hashed per step in MinHasher.signature(): bounds the
+# NUM_PERM x block uint64 temporaries (about 4 MB each with 4096)
+SIGNATURE_BLOCK = 4096
+
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _mix(z):
+    """splitmix64 finalizer: spreads every input bit over the whole word"""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class MinHasher:
+    """
+    MinHash over 32-bit shingle hashes with h(x) = mix(a * x + b)
+
+    Each hash function is a random odd multiplier and offset followed by
+    the splitmix64 finalizer, computed in wrapping uint64 arithmetic, so
+    all hash functions are applied to a block of shingles in one
+    vectorized step. (A plain (a * x + b) mod p with 32-bit a and x wraps
+    too few times to make the functions independent, which inflates the
+    variance of the similarity estimate.)
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        """
+        Initialize hash functions
+
+        Args:
+            num_perm: Number of hash functions (signature length)
+            seed: Random seed; signatures are comparable only between
+                  hashers with the same seed and num_perm
+        """
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None] * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, shingles):
+        """
+        Compute the MinHash signature of a shingle set
+
+        Args:
+            shingles: numpy array of 32-bit shingle hashes (duplicates allowed)
+
+        Returns:
+            numpy.ndarray: uint32 signature; documents without shingles get
+                           the maximum value in every position
+        """
+        minimum = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        x = np.unique(np.asarray(shingles, dtype=np.uint64))
+        # Blocks of shingles keep the temporaries at num_perm x SIGNATURE_BLOCK
+        # however long the document is
+        for start in range(0, len(x), SIGNATURE_BLOCK):
+            block = x[None, start:start + SIGNATURE_BLOCK]
+            with np.errstate(over='ignore'):
+                hashes = _mix(self.a * block + self.b) >> np.uint64(32)
+            np.minimum(minimum, hashes.min(axis=1), out=minimum)
+        return minimum.astype(np.uint32)
+
+
+def lemma_shingles(lemma_ids, shingle_size=SHINGLE_SIZE):
+    """
+    Hash the lemma n-grams of a document to 32 bits
+
+    Lemma IDs must come from one vocabulary shared by all documents of
+    the collection. Documents shorter than shingle_size use their whole
+    lemma sequence as a single shingle.
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (content lemmas of one document)
+        shingle_size: Lemmas per shingle
+
+    Returns:
+        numpy.ndarray: uint64 array of 32-bit shingle hashes
+    """
+    ids = np.asarray(lemma_ids, dtype=np.uint64)
+    if len(ids) == 0:
+        return ids
+    size = min(shingle_size, len(ids))
+    num_windows = len(ids) - size + 1
+
+    # Polynomial rolling combination, then a multiplicative mix to 32 bits
+    # (uint64 arithmetic wraps around, which is fine for hashing)
+    keys = np.zeros(num_windows, dtype=np.uint64)
+    for offset in range(size):
+        keys = keys * np.uint64(1000003) + ids[offset:offset + num_windows] + np.uint64(1)
+    return (keys * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+
+
+def find_duplicate_groups(signatures, threshold=DEFAULT_THRESHOLD, bands=BANDS):
+    """
+    Group near-duplicate documents with LSH banding
+
+    For every band, documents are grouped by their band values with one
+    np.unique call. Within a bucket, each document is compared with the
+    bucket's anchors: the first document and every later one that matched
+    no earlier anchor. A document joins every anchor it matches, so a
+    bucket holding two unrelated groups (or a first document that is a
+    poor match for the rest) still yields all groups. Buckets of near
+    duplicates have one anchor, so the work stays close to linear in the
+    number of documents. Confirmed pairs are merged with union-find; the
+    earliest document of a group represents it.
+
+    Args:
+        signatures: uint32 matrix (documents x NUM_PERM) from MinHasher
+        threshold: Minimum share of equal signature values
+                   (estimated Jaccard similarity)
+        bands: Number of LSH bands (must divide the signature length)
+
+    Returns:
+        tuple: (representative, similarity) - for every document the index
+               of its group's representative (itself if unique) and the
+               estimated similarity to the document it was matched with
+               (0 for representatives)
+
+    Raises:
+        ValueError: If bands does not divide the signature length
+    """
+    signatures = np.asarray(signatures, dtype=np.uint32)
+    num_docs, num_perm = signatures.shape if signatures.ndim == 2 else (0, 0)
+    representative = np.arange(num_docs)
+    similarity = np.zeros(num_docs)
+    if num_docs < 2:
+        return representative, similarity
+    if num_perm % bands:
+        raise ValueError(f"{bands} bands do not divide a signature of {num_perm} values")
+    rows = num_perm // bands
+
+    # Documents without shingles have identical (empty) signatures
+    has_content = (signatures != _MAX_HASH).any(axis=1)
+
+    parent = np.arange(num_docs)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def join(doc, anchor, score):
+        root_doc, root_anchor = find(doc), find(anchor)
+        if root_doc != root_anchor:
+            # The earlier document stays the representative
+            parent[max(root_doc, root_anchor)] = min(root_doc, root_anchor)
+        similarity[doc] = max(similarity[doc], score)
+
+    content_docs = np.flatnonzero(has_content)
+    for band in range(bands if len(content_docs) > 1 else 0):
+        band_values = np.ascontiguousarray(signatures[content_docs, band * rows:(band + 1) * rows])
+        keys = band_values.view(np.dtype((np.void, band_values.dtype.itemsize * rows))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        inverse = inverse.ravel()
+
+        # Documents of buckets with at least two members, bucket by bucket
+        # in document order (stable sort)
+        shared = counts[inverse] > 1
+        if not shared.any():
+            continue
+        order = np.argsort(inverse[shared], kind='stable')
+        docs = content_docs[shared][order]
+        buckets = inverse[shared][order]
+        boundaries = np.flatnonzero(np.diff(buckets)) + 1
+
+        for bucket in np.split(docs, boundaries):
+            anchors = [bucket[0]]
+            for doc in bucket[1:]:
+                agreement = (signatures[anchors] == signatures[doc]).mean(axis=1)
+                matched = np.flatnonzero(agreement >= threshold)
+                if len(matched) == 0:
+                    anchors.append(doc)
+                    continue
+                for index in matched:
+                    join(doc, anchors[index], agreement[index])
+
+    for i in range(num_docs):
+        representative[i] = find(i)
+    similarity[representative == np.arange(num_docs)] = 0.0
+    return representative, similarity
+
+
+def document_weights(representative, policy='drop'):
+    """
+    Aggregation weight of every document under a duplicate policy
+
+    Args:
+        representative: Result of find_duplicate_groups()
+        policy: 'drop' (only representatives count), 'downweight' (each
+                group counts once, split evenly over its members) or 'keep'
+
+    Returns:
+        numpy.ndarray: float64 weight per document
+
+    Raises:
+        ValueError: If the policy is unknown
+    """
+    representative = np.asarray(representative)
+    if policy == 'keep':
+        return np.ones(len(representative))
+    if policy == 'drop':
+        return (representative == np.arange(len(representative))).astype(np.float64)
+    if policy == 'downweight':
+        group_sizes = np.bincount(representative, minlength=len(representative))
+        return 1.0 / group_sizes[representative]
+    raise ValueError(f"Unknown duplicate policy: {policy}")
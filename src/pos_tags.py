@@ -0,0 +1,221 @@
+"""
+Part-of-Speech Tags
+Compact part-of-speech IDs shared by both languages: native tags of the
+lemmatizers (pymorphy3 for Russian, GrammarDB/lemmatizer_be letters for
+Belarusian) are mapped to one small tag set, and every lemma of an
+analysis gets one uint8 tag ID
+"""
+
+import numpy as np
+import streamlit as st
+
+
+# Common tag set: key -> display name (the ID of a tag is its position)
+POS_TAGS = {
+    'NOUN': "Существительные",
+    'ADJ': "Прилагательные",
+    'VERB': "Глаголы",
+    'ADV': "Наречия",
+    'PRON': "Местоимения",
+    'NUM': "Числительные",
+    'ADP': "Предлоги",
+    'CONJ': "Союзы",
+    'PART': "Частицы",
+    'INTJ': "Междометия",
+    'X': "Прочие"
+}
+POS_KEYS = list(POS_TAGS)
+POS_IDS = {key: i for i, key in enumerate(POS_KEYS)}
+UNKNOWN_POS = POS_IDS['X']
+
+# Native tag -> common tag. pymorphy3 (OpenCorpora) uses 4-letter tags and
+# GrammarDB/lemmatizer_be single letters, so one table serves both.
+# Participles and gerunds count as verbs (pymorphy3 lemmatizes them to the
+# infinitive); predicatives count as adverbs.
+NATIVE_POS = {
+    # pymorphy3
+    'NOUN': 'NOUN', 'ADJF': 'ADJ', 'ADJS': 'ADJ', 'COMP': 'ADJ',
+    'VERB': 'VERB', 'INFN': 'VERB', 'PRTF': 'VERB', 'PRTS': 'VERB', 'GRND': 'VERB',
+    'NUMR': 'NUM', 'ADVB': 'ADV', 'PRED': 'ADV', 'NPRO': 'PRON',
+    'PREP': 'ADP', 'CONJ': 'CONJ', 'PRCL': 'PART', 'INTJ': 'INTJ',
+    # GrammarDB / lemmatizer_be
+    'N': 'NOUN', 'A': 'ADJ', 'V': 'VERB', 'P': 'VERB', 'M': 'NUM', 'S': 'PRON',
+    'R': 'ADV', 'Z': 'ADV', 'I': 'ADP', 'C': 'CONJ', 'E': 'PART', 'Y': 'INTJ'
+}
+_NATIVE_POS_IDS = {tag: POS_IDS[key] for tag, key in NATIVE_POS.items()}
+
+
+def pos_id(native_tag):
+    """
+    Common tag ID of a native lemmatizer tag
+
+    Args:
+        native_tag: pymorphy3 POS ('NOUN', 'INFN', ...), GrammarDB letter
+                    ('N', 'V', ...) or None
+
+    Returns:
+        int: Position in POS_TAGS (UNKNOWN_POS for unknown or missing tags)
+    """
+    return _NATIVE_POS_IDS.get(native_tag, UNKNOWN_POS)
+
+
+def token_pos_ids(words, form_tags):
+    """
+    Tag ID of every token
+
+    Args:
+        words: List of tokens
+        form_tags: Dictionary of word form -> native tag (filled by the
+                   lemmatizers, one entry per distinct form)
+
+    Returns:
+        numpy.ndarray: uint8 tag IDs aligned with words
+    """
+    form_ids = {form: pos_id(tag) for form, tag in form_tags.items()}
+    return np.fromiter(
+        (form_ids.get(word, UNKNOWN_POS) for word in words),
+        dtype=np.uint8,
+        count=len(words)
+    )
+
+
+def lemma_pos_ids(lemma_ids, token_pos, num_types):
+    """
+    One tag ID per lemma: the tag of most of its tokens
+
+    Nearly every lemma has a single tag, so tags are scattered directly;
+    only lemmas whose forms disagree are counted (ties go to the tag
+    listed first in POS_TAGS).
+
+    Args:
+        lemma_ids: numpy array of lemma IDs (token sequence)
+        token_pos: uint8 tag IDs aligned with lemma_ids
+        num_types: Vocabulary size
+
+    Returns:
+        numpy.ndarray: uint8 tag ID per lemma ID (UNKNOWN_POS if unused)
+    """
+    pos_ids = np.full(num_types, UNKNOWN_POS, dtype=np.uint8)
+    pos_ids[lemma_ids] = token_pos
+
+    disagree = token_pos != pos_ids[lemma_ids]
+    if disagree.any():
+        mixed = np.unique(lemma_ids[disagree])
+        is_mixed = np.zeros(num_types, dtype=bool)
+        is_mixed[mixed] = True
+        selected = is_mixed[lemma_ids]
+        rows = np.searchsorted(mixed, lemma_ids[selected])
+        counts = np.bincount(
+            rows * len(POS_KEYS) + token_pos[selected], minlength=len(mixed) * len(POS_KEYS)
+        ).reshape(len(mixed), len(POS_KEYS))
+        pos_ids[mixed] = counts.argmax(axis=1)
+    return pos_ids
+
+
+def pos_mask(pos_ids, selected):
+    """
+    Boolean mask of the lemmas with one of the selected tags
+
+    Args:
+        pos_ids: Tag ID per lemma ID
+        selected: Iterable of POS_TAGS keys
+
+    Returns:
+        numpy.ndarray: Boolean array over lemma IDs
+    """
+    allowed = np.zeros(len(POS_KEYS), dtype=bool)
+    allowed[[POS_IDS[key] for key in selected]] = True
+    return allowed[pos_ids]
+
+
+def pos_frequencies(freq_table, pos_ids, top_n=10):
+    """
+    Per part-of-speech totals of a frequency table
+
+    Args:
+        freq_table: LemmaFrequencyTable (excluded lemmas have zero counts)
+        pos_ids: Tag ID per lemma ID
+        top_n: Number of most frequent lemmas listed per tag
+
+    Returns:
+        list: (key, lemmas, tokens, top_lemmas) tuples in POS_TAGS order,
+              only tags that occur
+    """
+    counts = freq_table.counts
+    tokens = np.bincount(pos_ids, weights=counts, minlength=len(POS_KEYS))
+    lemmas = np.bincount(pos_ids[counts > 0], minlength=len(POS_KEYS))
+
+    # Walk the frequency order once, collecting the top lemmas of each tag
+    top = [[] for _ in POS_KEYS]
+    missing = int(np.count_nonzero(lemmas))
+    for lemma_id in freq_table.ranked_ids():
+        lemmas_of_tag = top[pos_ids[lemma_id]]
+        if len(lemmas_of_tag) < top_n:
+            lemmas_of_tag.append(freq_table.vocabulary[lemma_id])
+            if len(lemmas_of_tag) == min(top_n, lemmas[pos_ids[lemma_id]]):
+                missing -= 1
+                if missing == 0:
+                    break
+
+    return [
+        (key, int(lemmas[i]), int(tokens[i]), top[i])
+        for i, key in enumerate(POS_KEYS)
+        if lemmas[i]
+    ]
+
+
+def render_pos_filter_ui(analysis, table, script):
+    """
+    Render the part-of-speech filter for the results
+
+    Args:
+        analysis: Analysis result with 'pos_ids'
+        table: Frequency table shown in the results
+        script: Display script of table (restricted tables are cached per
+                script and selection)
+
+    Returns:
+        LemmaFrequencyTable: table restricted to the selected parts of
+                             speech (table itself if all are selected)
+    """
+    selected = st.multiselect(
+        "🏷️ Части речи:",
+        options=POS_KEYS,
+        default=POS_KEYS,
+        format_func=POS_TAGS.get,
+        key="pos_filter",
+        help="Показывать только леммы выбранных частей речи, например только "
+             "существительные и глаголы. Причастия и деепричастия относятся к глаголам"
+    )
+    if not selected or len(selected) == len(POS_KEYS):
+        return table
+
+    # Restricted tables keep their cached orderings across reruns
+    cache = analysis.setdefault('pos_tables', {})
+    cache_key = (script, tuple(selected))
+    if cache_key not in cache:
+        if len(cache) >= 8:
+            cache.pop(next(iter(cache)))
+        cache[cache_key] = table.restricted(pos_mask(analysis['pos_ids'], selected))
+    return cache[cache_key]
+
+
+def render_pos_frequencies_ui(freq_table, pos_ids):
+    """
+    Render word and lemma counts per part of speech
+
+    Args:
+        freq_table: LemmaFrequencyTable of the analysis
+        pos_ids: Tag ID per lemma ID
+    """
+    with st.expander("🏷️ Части речи", expanded=False):
+        rows = pos_frequencies(freq_table, pos_ids)
+        total = sum(tokens for _, _, tokens, _ in rows) or 1
+        st.caption("Без стоп-слов; часть речи леммы — по большинству её словоупотреблений")
+        st.table({
+            "Часть речи": [POS_TAGS[key] for key, _, _, _ in rows],
+            "Лемм": [lemmas for _, lemmas, _, _ in rows],
+            "Словоупотреблений": [tokens for _, _, tokens, _ in rows],
+            "Доля": [f"{tokens / total * 100:.1f}%" for _, _, tokens, _ in rows],
+            "Частые леммы": [", ".join(top) for _, _, _, top in rows]
+        })
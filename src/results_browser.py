@@ -0,0 +1,117 @@
+"""
+Results Browser
+Paginated, sortable and searchable view of the full frequency table.
+Sorting and search run on the server over the table's count arrays;
+only the visible page is sent to the browser.
+"""
+
+import re
+import streamlit as st
+
+
+SORT_OPTIONS = {
+    'frequency': "По частоте",
+    'alphabet': "По алфавиту"
+}
+
+SEARCH_MODES = {
+    'prefix': "Начало слова",
+    'regex': "Регулярное выражение"
+}
+
+PAGE_SIZES = [25, 50, 100, 200]
+
+
+def get_results_page(table, query="", mode="prefix", sort="frequency", page=1, page_size=50):
+    """
+    Get one page of the frequency table
+
+    Args:
+        table: LemmaFrequencyTable to browse
+        query: Prefix or regular expression to filter lemmas
+        mode: Search mode ('prefix' or 'regex')
+        sort: Sort order ('frequency' or 'alphabet')
+        page: 1-based page number
+        page_size: Rows per page
+
+    Returns:
+        tuple: (page_data, total_matches) where page_data is a dict of
+               columns (Ранг, Лемма, Частота) for the requested page
+
+    Raises:
+        re.error: If mode is 'regex' and the pattern is invalid
+    """
+    matches = table.search(query, mode, sort)
+    start = (page - 1) * page_size
+    page_ids = matches[start:start + page_size]
+
+    ranks = table.ranks()
+    page_data = {
+        "Ранг": [int(ranks[i]) for i in page_ids],
+        "Лемма": [table.vocabulary[i] for i in page_ids],
+        "Частота": [int(table.counts[i]) for i in page_ids]
+    }
+    return page_data, len(matches)
+
+
+def render_results_browser(table):
+    """
+    Render the full results browser with search, sorting and pagination
+
+    Args:
+        table: LemmaFrequencyTable to browse
+    """
+    with st.expander(f"📚 Все результаты ({table.num_lemmas:,} лемм)", expanded=False):
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            query = st.text_input(
+                "Поиск леммы:",
+                key="browser_query",
+                placeholder="например, книг или ^пере.*ть$"
+            ).strip()
+        with col2:
+            mode = st.selectbox(
+                "Режим поиска:",
+                options=list(SEARCH_MODES),
+                format_func=SEARCH_MODES.get,
+                key="browser_mode"
+            )
+        with col3:
+            sort = st.selectbox(
+                "Сортировка:",
+                options=list(SORT_OPTIONS),
+                format_func=SORT_OPTIONS.get,
+                key="browser_sort"
+            )
+
+        try:
+            total_matches = len(table.search(query, mode, sort))
+        except re.error as e:
+            st.error(f"❌ Неверное регулярное выражение: {e}")
+            return
+
+        col_size, col_page = st.columns(2)
+        with col_size:
+            page_size = st.selectbox(
+                "Строк на странице:",
+                options=PAGE_SIZES,
+                index=1,
+                key="browser_page_size"
+            )
+        num_pages = max(1, (total_matches + page_size - 1) // page_size)
+        with col_page:
+            page = st.number_input(
+                f"Страница (из {num_pages:,}):",
+                min_value=1,
+                value=1,
+                step=1,
+                key="browser_page"
+            )
+        page = min(int(page), num_pages)
+
+        page_data, _ = get_results_page(table, query, mode, sort, page, page_size)
+        st.caption(f"Найдено: {total_matches:,} лемм")
+        if total_matches:
+            st.table(page_data)
+        else:
+            st.info("Ничего не найдено")
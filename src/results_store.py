@@ -0,0 +1,445 @@
+"""
+Analysis Results Store
+Keeps finished analyses in a local SQLite database - document metadata
+and sparse lemma count vectors with an inverted lemma -> document index -
+so lemma frequencies and top documents across all stored analyses are
+answered without re-reading or re-lemmatizing the sources
+"""
+
+import datetime
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import streamlit as st
+
+from belarusian.lacinka import is_lacinka, to_cyrillic
+from text_normalization import normalize_word
+
+
+STORE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "results.sqlite")
+
+# Bump with a migration in ResultsStore._create_schema()
+SCHEMA_VERSION = 1
+
+# Query result ordering: key -> display name
+DOCUMENT_ORDERS = {
+    'count': "По числу употреблений",
+    'ipm': "По частоте на миллион слов"
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    language TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    analyzed_at REAL NOT NULL,
+    total_words INTEGER NOT NULL,
+    unique_lemmas INTEGER NOT NULL,
+    UNIQUE (name, language, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS documents_by_time ON documents (analyzed_at);
+CREATE TABLE IF NOT EXISTS lemmas (
+    id INTEGER PRIMARY KEY,
+    lemma TEXT NOT NULL UNIQUE
+);
+-- Inverted index: postings of a lemma are stored together
+CREATE TABLE IF NOT EXISTS postings (
+    lemma_id INTEGER NOT NULL,
+    document_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (lemma_id, document_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_document ON postings (document_id);
+"""
+
+
+def normalize_query(lemma):
+    """
+    Bring a queried lemma to the stored spelling
+
+    Args:
+        lemma: Lemma as typed (any case, Łacinka allowed)
+
+    Returns:
+        str: Normalized lowercase lemma (Łacinka transliterated to Cyrillic)
+    """
+    lemma = normalize_word(lemma)
+    return to_cyrillic(lemma) if is_lacinka(lemma) else lemma
+
+
+def document_fingerprint(lemmas, counts):
+    """
+    Fingerprint of a lemma count vector (same text and lemmatizer -> same value)
+
+    Args:
+        lemmas: Lemmas with a non-zero count
+        counts: Counts aligned with lemmas
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    for lemma, count in sorted(zip(lemmas, counts)):
+        digest.update(f"{lemma}\t{count}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultsStore:
+    """
+    SQLite store of analysis results
+
+    Each document is one row with its lemma counts in the postings table,
+    whose primary key (lemma_id, document_id) is the inverted index: all
+    documents of a lemma are one range scan. Counts include stop words,
+    so stored documents do not depend on the stop-word settings of the
+    analysis. Saving the same document again (same name, language and
+    counts) replaces it.
+
+    One connection is shared by all sessions and serialized with a lock;
+    the database runs in WAL mode so the CLI can read while the app writes.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        """
+        Open (and create if needed) the store
+
+        Args:
+            path: SQLite database file (':memory:' for a temporary store)
+        """
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # WAL with NORMAL sync never corrupts the database; a power loss can
+        # only drop the latest saves (no fsync on every commit)
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(f"{self.path}: results store version {version} is newer than supported")
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+            self._connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def save_document(self, name, lang_code, lemmas, counts, analyzed_at=None):
+        """
+        Store one document's lemma counts
+
+        Args:
+            name: Document name
+            lang_code: Language code of the analysis
+            lemmas: Lemmas with a non-zero count
+            counts: Counts aligned with lemmas
+            analyzed_at: Unix time of the analysis (default: now)
+
+        Returns:
+            int: Document ID
+        """
+        counts = [int(count) for count in counts]
+        fingerprint = document_fingerprint(lemmas, counts)
+        with self._lock, self._connection:
+            cursor = self._connection.cursor()
+            cursor.execute(
+                "SELECT id FROM documents WHERE name = ? AND language = ? AND fingerprint = ?",
+                (name, lang_code, fingerprint)
+            )
+            existing = cursor.fetchone()
+            if existing is not None:
+                self._delete(cursor, existing[0])
+
+            cursor.execute(
+                "INSERT INTO documents (name, language, fingerprint, analyzed_at, total_words, unique_lemmas) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, lang_code, fingerprint, analyzed_at or time.time(), sum(counts), len(counts))
+            )
+            document_id = cursor.lastrowid
+
+            # Stage the vector in a temp table, then resolve lemma IDs in SQL
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS incoming (lemma TEXT PRIMARY KEY, count INTEGER)")
+            cursor.execute("DELETE FROM incoming")
+            cursor.executemany("INSERT INTO incoming VALUES (?, ?)", zip(lemmas, counts))
+            cursor.execute("INSERT OR IGNORE INTO lemmas (lemma) SELECT lemma FROM incoming")
+            cursor.execute(
+                "INSERT INTO postings (lemma_id, document_id, count) "
+                "SELECT lemmas.id, ?, incoming.count FROM incoming JOIN lemmas USING (lemma)",
+                (document_id,)
+            )
+            cursor.execute("DELETE FROM incoming")
+        return document_id
+
+    def save_analysis(self, analysis, name, lang_code):
+        """
+        Store an analysis result; a collection is stored document by document
+
+        Near-duplicates in a collection are not stored, whatever the
+        duplicate policy: only the representative of each group is, so
+        repeated copies never inflate corpus-wide frequencies.
+
+        Args:
+            analysis: Result of analyze_text(), a background job or
+                      analyze_documents()
+            name: Source name (used for single texts)
+            lang_code: Language code of the analysis
+
+        Returns:
+            list: IDs of the stored documents
+        """
+        vocabulary = analysis['vocabulary']
+        if 'documents' not in analysis:
+            parts = [(name, analysis['lemma_ids'])]
+        else:
+            lemma_ids = analysis['document_lemma_ids']
+            offsets = analysis['document_offsets']
+            parts = [
+                (document['name'], lemma_ids[offsets[i]:offsets[i + 1]])
+                for i, document in enumerate(analysis['documents'])
+                if document['duplicate_of'] is None
+            ]
+
+        analyzed_at = time.time()
+        document_ids = []
+        for part_name, ids in parts:
+            counts = np.bincount(ids, minlength=len(vocabulary))
+            present = np.flatnonzero(counts)
+            document_ids.append(self.save_document(
+                part_name, lang_code, [vocabulary[i] for i in present], counts[present], analyzed_at
+            ))
+        return document_ids
+
+    def _delete(self, cursor, document_id):
+        cursor.execute("DELETE FROM postings WHERE document_id = ?", (document_id,))
+        cursor.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+    def delete_document(self, document_id):
+        """
+        Remove a stored document and its postings
+
+        Args:
+            document_id: Document ID
+        """
+        with self._lock, self._connection:
+            self._delete(self._connection.cursor(), document_id)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def lemma_frequency(self, lemma, since=None, language=None):
+        """
+        Total frequency of a lemma over the stored documents
+
+        Args:
+            lemma: Lemma (normalized with normalize_query())
+            since: Only documents analyzed at or after this Unix time
+            language: Only documents of this analysis language
+
+        Returns:
+            dict: 'count' (occurrences), 'documents' (documents containing
+                  it), 'total_words' and 'total_documents' of the selection
+        """
+        where, params = self._document_filter(since, language)
+        count, documents = self._query(
+            "SELECT COALESCE(SUM(p.count), 0), COUNT(*) FROM postings p "
+            "JOIN documents d ON d.id = p.document_id "
+            f"WHERE p.lemma_id = (SELECT id FROM lemmas WHERE lemma = ?){where}",
+            (lemma, *params)
+        )[0]
+        total_words, total_documents = self._query(
+            f"SELECT COALESCE(SUM(total_words), 0), COUNT(*) FROM documents d WHERE 1 = 1{where}", params
+        )[0]
+        return {
+            'count': count,
+            'documents': documents,
+            'total_words': total_words,
+            'total_documents': total_documents
+        }
+
+    def top_documents(self, lemma, n=20, since=None, language=None, order='count'):
+        """
+        Documents that mention a lemma most
+
+        Args:
+            lemma: Lemma (normalized with normalize_query())
+            n: Number of documents
+            since: Only documents analyzed at or after this Unix time
+            language: Only documents of this analysis language
+            order: Key from DOCUMENT_ORDERS
+
+        Returns:
+            list: (document_id, name, analyzed_at, count, total_words, ipm)
+                  tuples, best first
+        """
+        if order not in DOCUMENT_ORDERS:
+            raise ValueError(f"Unknown order: {order}")
+        where, params = self._document_filter(since, language)
+        order_by = "p.count DESC" if order == 'count' else "ipm DESC"
+        return self._query(
+            "SELECT d.id, d.name, d.analyzed_at, p.count, d.total_words, "
+            "p.count * 1e6 / d.total_words AS ipm FROM postings p "
+            "JOIN documents d ON d.id = p.document_id "
+            f"WHERE p.lemma_id = (SELECT id FROM lemmas WHERE lemma = ?){where} "
+            f"ORDER BY {order_by}, d.analyzed_at DESC LIMIT ?",
+            (lemma, *params, n)
+        )
+
+    def document_top_lemmas(self, document_id, n=20):
+        """
+        Most frequent lemmas of a stored document (stop words included)
+
+        Args:
+            document_id: Document ID
+            n: Number of lemmas
+
+        Returns:
+            list: (lemma, count) tuples
+        """
+        return self._query(
+            "SELECT l.lemma, p.count FROM postings p JOIN lemmas l ON l.id = p.lemma_id "
+            "WHERE p.document_id = ? ORDER BY p.count DESC, l.lemma LIMIT ?",
+            (document_id, n)
+        )
+
+    def list_documents(self, since=None, language=None, limit=100):
+        """
+        Most recently stored documents
+
+        Args:
+            since: Only documents analyzed at or after this Unix time
+            language: Only documents of this analysis language
+            limit: Maximum number of rows
+
+        Returns:
+            list: (document_id, name, language, analyzed_at, total_words,
+                  unique_lemmas) tuples, newest first
+        """
+        where, params = self._document_filter(since, language)
+        return self._query(
+            "SELECT id, name, language, analyzed_at, total_words, unique_lemmas FROM documents d "
+            f"WHERE 1 = 1{where} ORDER BY analyzed_at DESC, id DESC LIMIT ?",
+            (*params, limit)
+        )
+
+    def stats(self):
+        """
+        Get store size
+
+        Returns:
+            dict: documents, lemmas, postings and total_words
+        """
+        documents, total_words = self._query("SELECT COUNT(*), COALESCE(SUM(total_words), 0) FROM documents")[0]
+        return {
+            'documents': documents,
+            'lemmas': self._query("SELECT COUNT(*) FROM lemmas")[0][0],
+            'postings': self._query("SELECT COUNT(*) FROM postings")[0][0],
+            'total_words': total_words
+        }
+
+    @staticmethod
+    def _document_filter(since, language):
+        """SQL conditions on the documents table (alias d) and their parameters"""
+        where, params = "", []
+        if since is not None:
+            where += " AND d.analyzed_at >= ?"
+            params.append(since)
+        if language is not None:
+            where += " AND d.language = ?"
+            params.append(language)
+        return where, params
+
+
+@st.cache_resource
+@functools.cache
+def get_results_store():
+    """
+    Get the process-wide results store (shared by all sessions)
+
+    Returns:
+        ResultsStore: Store at STORE_PATH
+    """
+    return ResultsStore()
+
+
+def format_time(timestamp):
+    """Local date and time of a Unix timestamp for display"""
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def render_save_result_ui(analysis, lang_code, source_name):
+    """
+    Render the button that stores the current analysis
+
+    Args:
+        analysis: Analysis result
+        lang_code: Language code of the analysis
+        source_name: File name or description of the source
+    """
+    if st.button("💾 Сохранить в хранилище результатов", key="results_store_save",
+                 help="Сохранить частоты лемм документа для запросов по всем сохранённым анализам"):
+        document_ids = get_results_store().save_analysis(analysis, source_name, lang_code)
+        st.success(f"✅ Сохранено документов: {len(document_ids):,}")
+
+
+def render_results_query_ui():
+    """Render lemma queries over the stored analyses"""
+    with st.expander("🗄️ Хранилище результатов: поиск по сохранённым документам", expanded=False):
+        store = get_results_store()
+        stats = store.stats()
+        st.caption(
+            f"Документов: {stats['documents']:,}, слов: {stats['total_words']:,}, "
+            f"лемм: {stats['lemmas']:,}"
+        )
+        if not stats['documents']:
+            st.info("Хранилище пусто. Сохраните результаты анализа кнопкой «💾 Сохранить в хранилище результатов».")
+            return
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            query = st.text_input("Лемма:", key="results_store_lemma")
+        with col2:
+            days = st.number_input("За последние дней (0 — все):", min_value=0, value=0, key="results_store_days")
+        with col3:
+            order = st.selectbox(
+                "Сортировка:",
+                options=list(DOCUMENT_ORDERS),
+                format_func=DOCUMENT_ORDERS.get,
+                key="results_store_order"
+            )
+
+        if not query.strip():
+            return
+        lemma = normalize_query(query)
+        since = time.time() - days * 86400 if days else None
+
+        started = time.perf_counter()
+        frequency = store.lemma_frequency(lemma, since)
+        rows = store.top_documents(lemma, 20, since, order=order)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        ipm = frequency['count'] / frequency['total_words'] * 1e6 if frequency['total_words'] else 0
+        st.markdown(
+            f"**{lemma}**: {frequency['count']:,} употреблений в {frequency['documents']:,} "
+            f"из {frequency['total_documents']:,} документов ({ipm:.1f} на миллион слов)"
+        )
+        st.caption(f"⏱️ Запрос: {elapsed:.1f} мс")
+        if rows:
+            st.table({
+                "Документ": [row[1] for row in rows],
+                "Дата анализа": [format_time(row[2]) for row in rows],
+                "Употреблений": [row[3] for row in rows],
+                "Слов в документе": [row[4] for row in rows],
+                "На миллион слов": [round(row[5], 1) for row in rows]
+            })
@@ -3,34 +3,174 @@ Russian Language Support Module
 Provides lemmatization and stop words for Russian text
 """
 
+import functools
+import gzip
+import os
+
 import streamlit as st
 import pymorphy3
 
 
+# Precompiled form -> (lemma, part of speech) table for frequent forms
+# (built by scripts/build_ru_hot_vocabulary.py)
+HOT_VOCABULARY_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "ru_hot_vocabulary.tsv.gz")
+HOT_VOCABULARY_FORMAT = "ru_hot_vocabulary/2"
+
+
+# st.cache_resource shares one instance between Streamlit sessions;
+# functools.cache keeps it cached outside the Streamlit runtime as well
+# (HTTP service worker processes, scripts), where st.cache_resource does not
 @st.cache_resource
+@functools.cache
 def get_russian_analyzer():
     """Initialize and cache the pymorphy3 analyzer for Russian"""
     return pymorphy3.MorphAnalyzer()
 
 
-def lemmatize_russian(words):
+def get_dictionary_version(morph):
+    """
+    Describe the pymorphy3 library and dictionary a lemma table was built with
+    
+    Args:
+        morph: pymorphy3 MorphAnalyzer
+        
+    Returns:
+        str: Version string; tables built with another version are not used
+    """
+    meta = morph.dictionary.meta
+    return (
+        f"pymorphy3-{pymorphy3.__version__} "
+        f"{meta.get('source')}-{meta.get('source_version')}-r{meta.get('source_revision')} "
+        f"compiled-{meta.get('compiled_at')}"
+    )
+
+
+def parse_russian(morph, word):
+    """
+    Lemma and part of speech of a word form from its first pymorphy3 parse
+    
+    Args:
+        morph: pymorphy3 MorphAnalyzer
+        word: Word form
+        
+    Returns:
+        tuple: (lemma, pos) with the OpenCorpora POS tag ('NOUN', 'INFN',
+               ...) or None for forms without one (numbers, Latin words)
+    """
+    parsed = morph.parse(word)[0]
+    return parsed.normal_form, parsed.tag.POS
+
+
+def save_hot_vocabulary(path, form_entries, version):
+    """
+    Write a form -> (lemma, part of speech) table as gzipped TSV
+    
+    The first line holds the format and dictionary version. Forms that are
+    their own lemma are written with an empty lemma column; forms without
+    a part of speech with an empty tag column.
+    
+    Args:
+        path: Output file path
+        form_entries: Dictionary of word form -> (lemma, pos) from
+                      parse_russian() (in frequency order)
+        version: Dictionary version from get_dictionary_version()
+    """
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(f"# {HOT_VOCABULARY_FORMAT}\t{version}\n")
+        for form, (lemma, pos) in form_entries.items():
+            f.write(f"{form}\t{'' if lemma == form else lemma}\t{pos or ''}\n")
+
+
+def load_hot_vocabulary(path, version):
+    """
+    Read a table written by save_hot_vocabulary()
+    
+    Args:
+        path: Table file path
+        version: Expected dictionary version
+        
+    Returns:
+        dict: word form -> (lemma, pos), or None if the file is missing,
+              unreadable (truncated or corrupt) or was built for another
+              format or dictionary version
+    """
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = f.readline().rstrip('\n')
+            if header != f"# {HOT_VOCABULARY_FORMAT}\t{version}":
+                print(f"⚠️ Russian hot vocabulary {path} does not match {version}, ignoring it")
+                return None
+            
+            form_entries = {}
+            for line in f:
+                form, lemma, pos = line.rstrip('\n').split('\t')
+                form_entries[form] = (lemma or form, pos or None)
+    except (OSError, EOFError, ValueError) as e:
+        # gzip.BadGzipFile is an OSError; bad UTF-8 and malformed lines
+        # raise ValueError
+        print(f"⚠️ Russian hot vocabulary {path} is unreadable ({e}), ignoring it")
+        return None
+    return form_entries
+
+
+@st.cache_resource
+@functools.cache
+def get_russian_hot_vocabulary():
+    """Load and cache the precompiled table of frequent forms (empty if not built)"""
+    table = load_hot_vocabulary(HOT_VOCABULARY_PATH, get_dictionary_version(get_russian_analyzer()))
+    if table is None:
+        return {}
+    print(f"✅ Russian hot vocabulary loaded: {len(table):,} forms")
+    return table
+
+
+def lemmatize_russian(words, tags=None):
     """
     Lemmatize Russian words using pymorphy3
     
+    Each distinct form is resolved once. Frequent forms are looked up in
+    the precompiled hot vocabulary first; pymorphy3 parses only the
+    remaining forms. The table stores pymorphy3's own first-parse lemmas
+    and tags, so results are the same either way.
+    
     Args:
         words: List of words to lemmatize
+        tags: Optional dict that receives word form -> OpenCorpora POS tag
+              (or None) of every distinct form, from the same parse
         
     Returns:
         List of lemmas
     """
     morph = get_russian_analyzer()
-    lemmas = []
+    hot_vocabulary = get_russian_hot_vocabulary()
+    entries = {}
     for word in words:
-        # Parse the word and get the normal form (lemma)
-        parsed = morph.parse(word)[0]
-        lemma = parsed.normal_form
-        lemmas.append(lemma)
-    return lemmas
+        if word not in entries:
+            entry = hot_vocabulary.get(word)
+            if entry is None:
+                # Parse the word: normal form (lemma) and part of speech
+                entry = parse_russian(morph, word)
+            entries[word] = entry
+    
+    if tags is not None:
+        tags.update((word, pos) for word, (_, pos) in entries.items())
+    return [entries[word][0] for word in words]
+
+
+def is_known_russian(word):
+    """
+    Check if a word form is in the pymorphy3 dictionary
+    
+    Args:
+        word: Word form to check
+        
+    Returns:
+        bool: True if pymorphy3 knows the word (no prediction involved)
+    """
+    return get_russian_analyzer().word_is_known(word)
 
 
 def get_russian_stop_words():
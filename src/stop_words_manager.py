@@ -4,8 +4,8 @@ Provides interface for viewing and managing stop words
 """
 
 import streamlit as st
-from ru_support import get_russian_stop_words
-from belarusian.be_support import get_belarusian_stop_words
+from analysis_pipeline import get_default_stop_words
+from text_normalization import normalize_word
 
 
 def render_stop_words_ui(lang_code="ru"):
@@ -13,7 +13,7 @@ def render_stop_words_ui(lang_code="ru"):
     Render the stop words management UI
     
     Args:
-        lang_code: Language code ('ru' or 'be')
+        lang_code: Language code ('ru', 'be' or 'auto' for both lists)
         
     Returns:
         set: Combined set of default and custom stop words
@@ -23,10 +23,7 @@ def render_stop_words_ui(lang_code="ru"):
         st.session_state.custom_stop_words = set()
     
     # Get default stop words based on language
-    if lang_code == "ru":
-        default_stop_words = get_russian_stop_words()
-    else:
-        default_stop_words = get_belarusian_stop_words()
+    default_stop_words = get_default_stop_words(lang_code)
     
     # Combine default and custom
     current_stop_words = default_stop_words | st.session_state.custom_stop_words
@@ -56,7 +53,8 @@ def render_stop_words_ui(lang_code="ru"):
         with col_add2:
             if st.button("Добавить", type="primary"):
                 if new_words_input:
-                    new_words = [w.strip().lower() for w in new_words_input.split(',') if w.strip()]
+                    # Same normalization as text tokens (case, homoglyphs, apostrophes)
+                    new_words = [normalize_word(w) for w in new_words_input.split(',') if w.strip()]
                     st.session_state.custom_stop_words.update(new_words)
                     st.success(f"✅ Добавлено {len(new_words)} слов(а)")
                     st.rerun()
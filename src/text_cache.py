@@ -0,0 +1,258 @@
+"""
+Extracted Text Cache
+Text extracted from uploaded files, keyed by a hash of the raw bytes and
+the reader versions, in an in-memory LRU tier backed by an on-disk tier
+with size-based eviction, so a known file is never extracted twice
+(also across app restarts)
+"""
+
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from atomic_files import atomic_write_bytes
+
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "text_cache")
+
+# Bump when the output of the readers in text_input_handler changes
+# (e.g. page separators), so stale entries are not reused
+TEXT_READER_VERSION = 1
+
+# Memory tier limit in characters of cached text, disk tier limit in bytes
+MEMORY_LIMIT = 64 * 1024 * 1024
+DISK_LIMIT = 1024 * 1024 * 1024
+
+
+@functools.cache
+def reader_version():
+    """
+    Version string of the text readers (own format plus PDF/DOCX libraries)
+
+    Returns:
+        str: e.g. 'text-1;PyPDF2-3.0.1;docx-1.1.0'
+    """
+    parts = [f"text-{TEXT_READER_VERSION}"]
+    try:
+        import PyPDF2
+        parts.append(f"PyPDF2-{PyPDF2.__version__}")
+    except ImportError:
+        pass
+    try:
+        import docx
+        parts.append(f"docx-{getattr(docx, '__version__', '?')}")
+    except ImportError:
+        pass
+    return ";".join(parts)
+
+
+def cache_key(data, filename, member=None):
+    """
+    Cache key of a file: SHA-256 of the bytes, the extension (it selects
+    the reader) and the reader version; the file name itself does not matter
+
+    Args:
+        data: Raw file bytes
+        filename: File name
+        member: Name of an archive member, to key the text of that member
+                (its extension then selects the reader) instead of the
+                text of the whole archive
+
+    Returns:
+        str: Hex digest usable as a file name
+    """
+    # Compressed files are read by their inner extension ('.txt.gz')
+    suffixes = (member or filename).lower().split('.')[1:]
+    reader = '.'.join(suffixes[-2:] if suffixes and suffixes[-1] in ('gz', 'bz2', 'xz') else suffixes[-1:])
+
+    digest = hashlib.sha256(data)
+    digest.update(b"\0" + reader.encode('utf-8'))
+    digest.update(b"\0" + reader_version().encode('utf-8'))
+    if member is not None:
+        digest.update(b"\0member\0" + member.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TextCache:
+    """
+    Two-tier cache of extracted texts
+
+    Recently used texts stay in memory (LRU by total characters). Every
+    text is also written to cache_dir as <key>.txt with an atomic rename;
+    file modification times record use, and the least recently used files
+    are deleted once the directory grows beyond disk_limit. All methods
+    are thread-safe.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit=MEMORY_LIMIT, disk_limit=DISK_LIMIT):
+        """
+        Initialize cache and measure the disk tier
+
+        Args:
+            cache_dir: Directory of the disk tier (created on first write)
+            memory_limit: Characters kept in memory
+            disk_limit: Bytes kept on disk (0 disables the disk tier)
+        """
+        self.cache_dir = cache_dir
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.hits = {'memory': 0, 'disk': 0}
+        self.misses = 0
+        self._disk_size = sum(size for _, _, size in self._disk_entries())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def _disk_entries(self):
+        """(mtime, path, size) of every cached file"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.txt') and entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def _remember(self, key, text):
+        """Put text into the memory tier and evict the least recently used"""
+        if key in self._memory:
+            self._memory_size -= len(self._memory.pop(key))
+        if len(text) > self.memory_limit:
+            return
+        self._memory[key] = text
+        self._memory_size += len(text)
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key):
+        """
+        Look up a text
+
+        Args:
+            key: Result of cache_key()
+
+        Returns:
+            str: Cached text or None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits['memory'] += 1
+                return self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path, encoding='utf-8', newline='') as f:
+                    text = f.read()
+                os.utime(path)  # mark as recently used
+            except OSError:
+                self.misses += 1
+                return None
+            self.hits['disk'] += 1
+            self._remember(key, text)
+            return text
+
+    def put(self, key, text):
+        """
+        Store a text in both tiers
+
+        Disk errors (read-only or full disk) only disable the disk copy.
+
+        Args:
+            key: Result of cache_key()
+            text: Extracted text
+        """
+        with self._lock:
+            self._remember(key, text)
+            if not self.disk_limit:
+                return
+            data = text.encode('utf-8')
+            if len(data) > self.disk_limit:
+                return
+            try:
+                self._write(key, data)
+            except OSError as e:
+                print(f"⚠️ Text cache not written: {e}")
+                return
+            self._disk_size += len(data)
+            if self._disk_size > self.disk_limit:
+                self._evict_disk()
+
+    def _write(self, key, data):
+        """Write a cache file atomically (readers never see partial texts)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        if os.path.exists(path):
+            self._disk_size -= os.path.getsize(path)
+        atomic_write_bytes(path, data)
+
+    def _evict_disk(self):
+        """Delete least recently used files down to 90% of the disk limit"""
+        entries = sorted(self._disk_entries())
+        self._disk_size = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if self._disk_size <= self.disk_limit * 0.9:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            self._disk_size -= size
+
+    def get_or_extract(self, data, filename, extract):
+        """
+        Return the cached text of a file or extract and cache it
+
+        Args:
+            data: Raw file bytes
+            filename: File name (extension selects the reader)
+            extract: Function (data, filename) -> text, called on a miss
+
+        Returns:
+            str: Extracted text
+        """
+        key = cache_key(data, filename)
+        text = self.get(key)
+        if text is None:
+            text = extract(data, filename)
+            self.put(key, text)
+        return text
+
+    def stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: memory_hits, disk_hits, misses, memory_entries,
+                  memory_chars and disk_bytes
+        """
+        with self._lock:
+            return {
+                'memory_hits': self.hits['memory'],
+                'disk_hits': self.hits['disk'],
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_chars': self._memory_size,
+                'disk_bytes': self._disk_size
+            }
+
+
+@st.cache_resource
+@functools.cache
+def get_text_cache():
+    """
+    Get the process-wide text cache (shared by all sessions)
+
+    Returns:
+        TextCache: Cache over CACHE_DIR
+    """
+    return TextCache()
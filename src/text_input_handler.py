@@ -3,9 +3,27 @@ Text Input Handler
 Provides interface for text input via file upload or direct paste
 """
 
+import codecs
+
 import streamlit as st
 from io import BytesIO
 
+from archive_input import archive_kind, iter_archive_members, ARCHIVE_EXTENSIONS
+from text_cache import get_text_cache, cache_key
+from analysis_profiler import profiled_stage
+
+
+# Size of text chunks for incremental (background) processing
+TEXT_CHUNK_SIZE = 100000
+
+
+class NamedBytesIO(BytesIO):
+    """In-memory file with a .name, accepted by the readers below like an UploadedFile"""
+    
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
 
 def read_txt_file(file):
     """
@@ -17,13 +35,14 @@ def read_txt_file(file):
     Returns:
         str: Decoded text content
     """
+    # Read once: decompressing archive streams cannot seek back
+    data = file.read()
     try:
         # Try UTF-8 encoding first (most common)
-        content = file.read().decode('utf-8')
+        content = data.decode('utf-8')
     except UnicodeDecodeError:
         # Fallback to Windows-1251 (common for Cyrillic text)
-        file.seek(0)  # Reset file pointer to beginning
-        content = file.read().decode('cp1251', errors='ignore')
+        content = data.decode('cp1251', errors='ignore')
     return content
 
 
@@ -41,9 +60,10 @@ def read_pdf_file(file):
     # Create PDF reader from bytes
     pdf_reader = PyPDF2.PdfReader(BytesIO(file.read()))
     content = ""
-    # Extract text from each page
+    # Extract text from each page; pages are separated by a form feed
+    # (used for per-page frequency dynamics)
     for page in pdf_reader.pages:
-        content += page.extract_text() + "\n"
+        content += page.extract_text() + "\n\f"
     return content
 
 
@@ -67,12 +87,17 @@ def read_docx_file(file):
     return content
 
 
-def read_file_content(uploaded_file):
+@profiled_stage('reading')
+def read_file_content(uploaded_file, filename=None):
     """
     Read file content based on file type
     
+    Archives and compressed files are decompressed on the fly; the texts
+    of all their members are joined.
+    
     Args:
-        uploaded_file: Streamlit UploadedFile object
+        uploaded_file: Streamlit UploadedFile object (or any binary stream)
+        filename: Name that selects the reader (default: uploaded_file.name)
         
     Returns:
         str: Extracted text content from the file
@@ -80,8 +105,14 @@ def read_file_content(uploaded_file):
     Raises:
         ValueError: If file type is not supported
     """
+    filename = filename or uploaded_file.name
+    if archive_kind(filename) is not None:
+        return "\n".join(
+            "".join(chunks) for _, chunks in iter_input_documents(uploaded_file, filename)
+        )
+    
     # Extract file extension from filename
-    file_extension = uploaded_file.name.split('.')[-1].lower()
+    file_extension = filename.split('.')[-1].lower()
     
     # Route to appropriate reader based on file type
     if file_extension == 'txt':
@@ -94,13 +125,288 @@ def read_file_content(uploaded_file):
         raise ValueError(f"Unsupported file type: {file_extension}")
 
 
-def render_text_input_ui():
+def extract_text(data, filename):
+    """
+    Extract text from file bytes (uncached)
+    
+    Args:
+        data: Raw file bytes
+        filename: File name (extension selects the reader)
+        
+    Returns:
+        str: Extracted text content
+    """
+    return read_file_content(NamedBytesIO(data, filename))
+
+
+def read_file_cached(uploaded_file):
+    """
+    Read file content through the extracted-text cache
+    
+    Reruns and re-uploads of a known file (same bytes) return the cached
+    text instead of running the PDF/DOCX readers again.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile object
+        
+    Returns:
+        str: Extracted text content from the file
+    """
+    return get_text_cache().get_or_extract(uploaded_file.getvalue(), uploaded_file.name, extract_text)
+
+
+def iter_txt_chunks(stream, chunk_size=TEXT_CHUNK_SIZE):
+    """
+    Decode a .txt stream incrementally into chunks cut at whitespace
+    
+    The encoding is chosen like read_txt_file() does for the whole file:
+    UTF-8, or Windows-1251 if the bytes are not valid UTF-8. The choice is
+    made at the first non-ASCII character, not on the first block (ASCII
+    reads the same in both), so a Windows-1251 file with an English
+    preamble is still recognized. Invalid bytes after UTF-8 text has been
+    confirmed are replaced instead of restarting.
+    
+    Args:
+        stream: Binary stream
+        chunk_size: Bytes read per step
+        
+    Yields:
+        str: Text chunks (words are never cut in half)
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    decided = False
+    text = ""
+    block = True
+    while block:
+        block = stream.read(chunk_size)
+        if decided:
+            text += decoder.decode(block, final=not block)
+        else:
+            try:
+                piece = decoder.decode(block, final=not block)
+            except UnicodeDecodeError:
+                # Everything decoded so far was ASCII, which Windows-1251
+                # reads the same; continue from the undecoded bytes
+                pending = decoder.getstate()[0]
+                decoder = codecs.getincrementaldecoder('cp1251')(errors='ignore')
+                piece = decoder.decode(pending + block)
+                decided = True
+            else:
+                if not piece.isascii():
+                    decoder.errors = 'replace'
+                    decided = True
+            text += piece
+        cut = max(text.rfind(' '), text.rfind('\n'))
+        if block and cut > 0:
+            yield text[:cut]
+            text = text[cut:]
+    if text:
+        yield text
+
+
+def iter_document_chunks(stream, filename):
+    """
+    Extract the text of one document stream piece by piece
+    
+    Plain text is decoded while reading and PDF is extracted page by
+    page; .docx needs the whole file, so it is read at once.
+    
+    Args:
+        stream: Binary stream of a .txt, .pdf or .docx document
+        filename: Document name (extension selects the reader)
+        
+    Yields:
+        str: Text chunks
+        
+    Raises:
+        ValueError: If file type is not supported
+    """
+    file_extension = filename.split('.')[-1].lower()
+    if file_extension == 'txt':
+        yield from iter_txt_chunks(stream)
+    elif file_extension == 'pdf':
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(BytesIO(stream.read()))
+        for page in pdf_reader.pages:
+            yield page.extract_text() + "\n\f"
+    else:
+        yield read_file_content(stream, filename)
+
+
+def iter_input_documents(fileobj, filename, skipped=None, cache_data=None):
+    """
+    Iterate over the documents of an upload: the members of an archive or
+    compressed file, or the file itself
+    
+    Documents are streamed: each chunk iterator must be consumed before
+    the next document is requested. Archive members of other types
+    (images, etc.) are skipped.
+    
+    Args:
+        fileobj: Binary file object
+        filename: File name (suffix selects archive format and reader)
+        skipped: Optional list; (member_name, reason) is appended for every
+                 skipped member, and members that fail to read (damaged,
+                 too large) are skipped too, keeping the chunks read so
+                 far. Without it, read errors propagate.
+        cache_data: Raw bytes of fileobj; if given, each document's text
+                    goes through the extracted-text cache (keyed per
+                    archive member), so known documents are not read again
+        
+    Yields:
+        tuple: (document_name, chunks) - chunks is an iterator of text
+    """
+    if archive_kind(filename) is None:
+        chunks = iter_document_chunks(fileobj, filename)
+        if cache_data is not None:
+            chunks = iter_cached_chunks(cache_key(cache_data, filename), chunks)
+        yield filename, chunks
+        return
+    
+    for name, stream in iter_archive_members(fileobj, filename):
+        if name.split('.')[-1].lower() not in ('txt', 'pdf', 'docx'):
+            if skipped is not None:
+                skipped.append((name, "неподдерживаемый формат"))
+            continue
+        chunks = iter_document_chunks(stream, name)
+        if cache_data is not None:
+            chunks = iter_cached_chunks(cache_key(cache_data, filename, member=name), chunks)
+        yield name, chunks if skipped is None else _guarded_chunks(chunks, name, skipped)
+
+
+def _guarded_chunks(chunks, name, skipped):
+    """Yield document chunks, recording a read error instead of raising it"""
+    try:
+        yield from chunks
+    except Exception as e:
+        skipped.append((name, str(e)))
+
+
+def iter_cached_chunks(key, chunks):
+    """
+    Yield the text chunks of a document through the extracted-text cache
+    
+    On a hit the cached text is split into chunks and the document is not
+    read at all; on a miss the chunks are passed through and their text is
+    cached once the document has been read completely (a read error
+    leaves the cache untouched).
+    
+    Args:
+        key: Result of text_cache.cache_key() for the document
+        chunks: Iterator of text chunks, consumed only on a miss
+        
+    Yields:
+        str: Text chunks
+    """
+    cache = get_text_cache()
+    text = cache.get(key)
+    if text is not None:
+        yield from split_text_chunks(text)
+        return
+    pieces = []
+    for chunk in chunks:
+        pieces.append(chunk)
+        yield chunk
+    cache.put(key, "".join(pieces))
+
+
+def split_text_chunks(text, chunk_size=TEXT_CHUNK_SIZE):
+    """
+    Split text into chunks of about chunk_size characters at whitespace
+    
+    Args:
+        text: Text to split
+        chunk_size: Target chunk length in characters
+        
+    Returns:
+        list: Text chunks (words are never cut in half)
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Move the cut back to the last whitespace inside the chunk
+            cut = max(text.rfind(' ', start, end), text.rfind('\n', start, end))
+            if cut > start:
+                end = cut
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+
+
+def iter_file_chunks(data, filename):
+    """
+    Extract text from file bytes piece by piece, through the
+    extracted-text cache
+    
+    PDF files are read page by page, so extraction itself is incremental;
+    archives and compressed files are decompressed while reading, member
+    by member; other formats are read at once and split into text chunks.
+    The text is cached under the same key and in the same form as
+    read_file_cached() uses, so a file read either way is not extracted
+    again; cached PDF text is split back into its pages.
+    
+    Args:
+        data: Raw file bytes
+        filename: File name (extension selects the reader)
+        
+    Yields:
+        tuple: (chunk_text, total_chunks) - total is the page count for PDF
+               and 0 (unknown) for archives
+    """
+    cache = get_text_cache()
+    key = cache_key(data, filename)
+    is_pdf = archive_kind(filename) is None and filename.split('.')[-1].lower() == 'pdf'
+    text = cache.get(key)
+    
+    if text is not None and is_pdf:
+        # read_pdf_file() ends every page with a form feed
+        pages = [page + "\f" for page in text.split("\f")[:-1]]
+        for page in pages:
+            yield page, len(pages)
+    elif text is None and archive_kind(filename) is not None:
+        # Members are joined with newlines like read_file_content() does
+        pieces = []
+        for index, (_, chunks) in enumerate(iter_input_documents(BytesIO(data), filename)):
+            if index:
+                pieces.append("\n")
+                yield "\n", 0
+            for chunk in chunks:
+                pieces.append(chunk)
+                yield chunk, 0
+        cache.put(key, "".join(pieces))
+    elif text is None and is_pdf:
+        import PyPDF2
+        pdf_reader = PyPDF2.PdfReader(BytesIO(data))
+        total = len(pdf_reader.pages)
+        pages = []
+        for page in pdf_reader.pages:
+            pages.append(page.extract_text() + "\n\f")
+            yield pages[-1], total
+        cache.put(key, "".join(pages))
+    else:
+        if text is None:
+            text = extract_text(data, filename)
+            cache.put(key, text)
+        chunks = split_text_chunks(text)
+        for chunk in chunks:
+            yield chunk, len(chunks)
+
+
+def render_text_input_ui(read_files=True):
     """
     Render text input interface with file upload and direct text input options
     
+    Args:
+        read_files: Extract text from an uploaded file right away; pass False
+                    when the file is processed later (background jobs)
+    
     Returns:
-        tuple: (text_content, source_name) where text_content is the text to analyze
-               and source_name is the name/description of the source
+        tuple: (text_content, source_name, uploaded_file) where text_content is
+               the text to analyze (None for an unread file), source_name is the
+               name/description of the source and uploaded_file is the
+               UploadedFile object (or None for direct text input)
     """
     st.subheader("📄 Выберите способ ввода текста")
     
@@ -109,23 +415,26 @@ def render_text_input_ui():
     
     text_content = None
     source_name = None
+    uploaded_file = None
     
     # Tab 1: File Upload
     with tab1:
         uploaded_file = st.file_uploader(
             "Выберите файл",
-            type=['txt', 'pdf', 'docx'],
-            help="Поддерживаются форматы: .txt, .pdf, .docx"
+            type=['txt', 'pdf', 'docx'] + ARCHIVE_EXTENSIONS,
+            help="Поддерживаются форматы: .txt, .pdf, .docx, а также архивы .zip, .tar.gz "
+                 "и сжатые файлы (.gz, .bz2, .xz) - тексты всех файлов архива объединяются"
         )
         
         if uploaded_file is not None:
             st.success(f"✅ Файл загружен: **{uploaded_file.name}**")
-            try:
-                text_content = read_file_content(uploaded_file)
-                source_name = uploaded_file.name
-            except Exception as e:
-                st.error(f"❌ Ошибка чтения файла: {str(e)}")
-                return None, None
+            source_name = uploaded_file.name
+            if read_files:
+                try:
+                    text_content = read_file_cached(uploaded_file)
+                except Exception as e:
+                    st.error(f"❌ Ошибка чтения файла: {str(e)}")
+                    return None, None, None
     
     # Tab 2: Direct Text Input
     with tab2:
@@ -153,6 +462,13 @@ def render_text_input_ui():
             if direct_text and direct_text.strip():
                 text_content = direct_text
                 source_name = "Прямой ввод текста"
+                uploaded_file = None
+                st.session_state.submitted_direct_text = direct_text
+        elif uploaded_file is None and direct_text and \
+                st.session_state.get('submitted_direct_text') == direct_text:
+            # Keep showing results for the submitted text when other widgets rerun the app
+            text_content = direct_text
+            source_name = "Прямой ввод текста"
     
-    return text_content, source_name
+    return text_content, source_name, uploaded_file
 
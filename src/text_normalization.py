@@ -0,0 +1,178 @@
+"""
+Text Normalization
+Folds word forms to one spelling before stop-word and dictionary lookup:
+case, Latin homoglyphs in Cyrillic words, apostrophe variants, soft
+hyphens and stress marks (and optionally ё -> е).
+Each profile is compiled into str.translate tables once, and every unique
+token type is normalized only once per text.
+"""
+
+import os
+import re
+
+
+# Characters accepted inside tokens (see analysis_pipeline.tokenize_text)
+LETTERS = "а-яёіўА-ЯЁІЎa-zA-ZćčłńśšŭźžĆČŁŃŚŠŬŹŽ"  # Latin incl. Belarusian Łacinka
+SOFT_HYPHEN = "\u00ad"
+STRESS_MARKS = "\u0300\u0301"  # grave and acute accents
+APOSTROPHE = "'"
+APOSTROPHE_VARIANTS = "\u2019\u02bc\u2018`\u2032"  # ’ ʼ ‘ ` ′
+
+# Latin letters that look like Cyrillic ones (after lowercasing)
+HOMOGLYPHS = {
+    'a': 'а', 'c': 'с', 'e': 'е', 'i': 'і', 'k': 'к',
+    'o': 'о', 'p': 'р', 'x': 'х', 'y': 'у'
+}
+
+# Normalization profiles: name -> options
+PROFILES = {
+    # Homoglyphs, apostrophes, soft hyphens and stress marks; ё is kept
+    'default': {'homoglyphs': True, 'fold_yo': False, 'apostrophes': True, 'strip_marks': True},
+    # Same as default, plus ё -> е (for texts with inconsistent ё spelling)
+    'fold_yo': {'homoglyphs': True, 'fold_yo': True, 'apostrophes': True, 'strip_marks': True},
+    # Lowercasing only
+    'minimal': {'homoglyphs': False, 'fold_yo': False, 'apostrophes': False, 'strip_marks': False}
+}
+
+DEFAULT_PROFILE = 'default'
+
+# Environment variable that selects the profile of word forms for the
+# whole process (app, service, scripts)
+NORMALIZATION_ENV = "TEXT_ANALYZER_NORMALIZATION"
+
+CYRILLIC = re.compile(r"[а-яёіў]")
+LATIN_HOMOGLYPH = re.compile(f"[{''.join(HOMOGLYPHS)}]")
+
+
+class TextNormalizer:
+    """
+    Token normalizer compiled from a profile
+
+    A base table lowercases Cyrillic and Latin letters, unifies apostrophes,
+    deletes soft hyphens and stress marks and folds ё. A second table maps
+    Latin homoglyphs to Cyrillic and is applied only to tokens that contain
+    Cyrillic letters (мoлоко with a Latin o) or consist of a single letter
+    (a Latin y or i standing for у or і), so Latin words stay Latin.
+    """
+
+    def __init__(self, homoglyphs=True, fold_yo=False, apostrophes=True, strip_marks=True):
+        """
+        Initialize normalizer
+
+        Args:
+            homoglyphs: Fold Latin homoglyphs inside Cyrillic words
+            fold_yo: Replace ё with е
+            apostrophes: Replace apostrophe variants with '
+            strip_marks: Remove soft hyphens and combining stress marks
+        """
+        mapping = {}
+        for upper in "АБВГДЕЁЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯІЎABCDEFGHIJKLMNOPQRSTUVWXYZĆČŁŃŚŠŬŹŽ":
+            mapping[ord(upper)] = upper.lower()
+        if fold_yo:
+            mapping[ord('ё')] = 'е'
+            mapping[ord('Ё')] = 'е'
+        if apostrophes:
+            for variant in APOSTROPHE_VARIANTS:
+                mapping[ord(variant)] = APOSTROPHE
+        if strip_marks:
+            for mark in SOFT_HYPHEN + STRESS_MARKS:
+                mapping[ord(mark)] = None
+
+        self.table = str.maketrans(mapping)
+        self.homoglyph_table = str.maketrans(HOMOGLYPHS) if homoglyphs else None
+
+    def normalize(self, token):
+        """
+        Normalize a single token
+
+        Args:
+            token: Token as found in the text
+
+        Returns:
+            str: Normalized token (may be empty, e.g. for a lone stress mark)
+        """
+        token = token.translate(self.table)
+        if self.homoglyph_table is not None and LATIN_HOMOGLYPH.search(token) and \
+                (len(token) == 1 or CYRILLIC.search(token)):
+            token = token.translate(self.homoglyph_table)
+        return token
+
+    def normalize_tokens(self, tokens):
+        """
+        Normalize a token sequence, each unique type only once
+
+        Args:
+            tokens: List of tokens
+
+        Returns:
+            list: Normalized tokens aligned with the input
+        """
+        cache = {}
+        normalized = []
+        for token in tokens:
+            form = cache.get(token)
+            if form is None:
+                form = cache[token] = self.normalize(token)
+            normalized.append(form)
+        return normalized
+
+
+_normalizers = {}
+
+
+def get_normalizer(profile=DEFAULT_PROFILE):
+    """
+    Get the compiled normalizer for a profile
+
+    Args:
+        profile: Profile name from PROFILES
+
+    Returns:
+        TextNormalizer: Normalizer (compiled once per profile)
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    normalizer = _normalizers.get(profile)
+    if normalizer is None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown normalization profile: {profile}")
+        normalizer = _normalizers[profile] = TextNormalizer(**PROFILES[profile])
+    return normalizer
+
+
+def active_profile():
+    """
+    Profile applied to word forms in this process
+
+    Tokenization and the GrammarDB index keys both use it, so a token is
+    looked up as it was normalized. Lemmas, stop lists and result queries
+    keep the default spelling. Changing the profile rebuilds the GrammarDB
+    artifacts on the next start.
+
+    Returns:
+        str: Profile name from the TEXT_ANALYZER_NORMALIZATION environment
+             variable, DEFAULT_PROFILE if it is not set
+
+    Raises:
+        ValueError: If the variable names an unknown profile
+    """
+    profile = os.environ.get(NORMALIZATION_ENV, "").strip().lower() or DEFAULT_PROFILE
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown normalization profile in {NORMALIZATION_ENV}: {profile} "
+                         f"(expected one of: {', '.join(PROFILES)})")
+    return profile
+
+
+def normalize_word(word, profile=DEFAULT_PROFILE):
+    """
+    Normalize a single word, e.g. a user-entered stop word
+
+    Args:
+        word: Word to normalize
+        profile: Profile name from PROFILES
+
+    Returns:
+        str: Normalized word
+    """
+    return get_normalizer(profile).normalize(word.strip())
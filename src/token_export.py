@@ -0,0 +1,299 @@
+"""
+Token Stream Export
+Streams the lemmatized token sequence of a text - word form, lemma,
+character offsets and the lemmatizer that produced the lemma - as
+CoNLL-U-style TSV or JSON Lines, in byte chunks with memory bounded by
+the vocabulary, not the text length
+"""
+
+import json
+import os
+import re
+import tempfile
+
+import streamlit as st
+
+from analysis_pipeline import iter_token_spans
+from language_detection import detect_token_language, route_tokens
+from belarusian.be_support import belarusian_lemma_source, transliterate_lacinka
+
+
+# Supported formats: key -> (display name, MIME type, file extension)
+TOKEN_EXPORT_FORMATS = {
+    'conllu': ("CoNLL-U (TSV)", "text/tab-separated-values", "conllu"),
+    'jsonl': ("JSONL", "application/x-ndjson", "jsonl")
+}
+
+# Number of tokens serialized per yielded chunk
+CHUNK_TOKENS = 10000
+
+# CoNLL-U sentences: a new one starts after sentence-final punctuation or
+# a blank line between two tokens; longer runs are cut so a text without
+# punctuation does not become one sentence held in memory
+SENTENCE_BREAK = re.compile(r"[.!?…]|\n[ \t]*\n")
+MAX_SENTENCE_TOKENS = 500
+
+
+class LemmaSources:
+    """
+    Name of the lemmatizer that produces the lemma of a word form
+
+    'pymorphy3' for Russian; for Belarusian 'grammardb', 'suffix_rules'
+    (enhanced mode) or 'lemmatizer_be'. With automatic detection each
+    form is routed like in language_detection.lemmatize_mixed(). Every
+    unique form is resolved once.
+
+    Belarusian forms are looked up by the spelling the analysis used: the
+    Łacinka map of be_support.transliterate_lacinka() over all Belarusian
+    forms of the text, so plain-Latin forms like 'mova' resolve as 'мова'
+    when the text also has Łacinka-only forms.
+    """
+
+    def __init__(self, lang_code, document_language=None, forms=()):
+        """
+        Initialize resolver
+
+        Args:
+            lang_code: Language code of the analysis ('ru', 'be' or 'auto')
+            document_language: Detected document language for 'auto'
+            forms: Unique word forms of the text (for the Łacinka map)
+        """
+        self.lang_code = lang_code
+        self.document_language = document_language or "ru"
+        self._sources = {}
+
+        if lang_code == "ru":
+            belarusian_forms = []
+        elif lang_code == "auto":
+            belarusian_forms = route_tokens(forms, self.document_language)['be']
+        else:
+            belarusian_forms = list(forms)
+        self._lacinka = transliterate_lacinka(belarusian_forms) if belarusian_forms else {}
+
+    def __call__(self, form):
+        source = self._sources.get(form)
+        if source is None:
+            language = self.lang_code
+            if language == "auto":
+                language = detect_token_language(form, self.document_language)
+            if language == "ru":
+                source = 'pymorphy3'
+            else:
+                source = belarusian_lemma_source(self._lacinka.get(form, form))
+            self._sources[form] = source
+        return source
+
+
+def iter_token_records(text, analysis, lang_code):
+    """
+    Iterate over the tokens of an analyzed text with their lemmas
+
+    Args:
+        text: Analyzed text
+        analysis: Analysis result of the same text (from analyze_text())
+        lang_code: Language code of the analysis ('ru', 'be' or 'auto')
+
+    Yields:
+        tuple: (index, start, end, form, lemma, source, is_stop) with
+               zero-based token index and character offsets into text
+
+    Raises:
+        ValueError: If the text does not match the analysis
+    """
+    vocabulary = analysis['vocabulary']
+    lemma_ids = analysis['lemma_ids']
+    stop_mask = analysis['stop_mask']
+    # First pass over the text for the unique forms (memory bounded by
+    # the vocabulary), so Łacinka forms map like in the analysis
+    forms = list(dict.fromkeys(form for _, _, form in iter_token_spans(text)))
+    sources = LemmaSources(lang_code, analysis.get('detected_lang'), forms)
+
+    mismatch = ValueError("Text does not match the analysis (token count differs)")
+    index = 0
+    for start, end, form in iter_token_spans(text):
+        if index >= len(lemma_ids):
+            raise mismatch
+        lemma_id = lemma_ids[index]
+        yield index, start, end, form, vocabulary[lemma_id], sources(form), bool(stop_mask[lemma_id])
+        index += 1
+    if index != len(lemma_ids):
+        raise mismatch
+
+
+def iter_conllu_export(text, analysis, lang_code, doc_id=None, chunk_tokens=CHUNK_TOKENS):
+    """
+    Stream the token sequence as CoNLL-U
+
+    Only ID, FORM (as written in the text) and LEMMA are filled; the
+    normalized form, character offsets, lemmatizer and stop-word flag go
+    to MISC, e.g. 'TokenRange=0:5|Norm=мама|LemmaSource=pymorphy3'.
+
+    Args:
+        text: Analyzed text
+        analysis: Analysis result of the same text
+        lang_code: Language code of the analysis
+        doc_id: Optional document name for the '# newdoc id' comment
+        chunk_tokens: Tokens per yielded chunk
+
+    Yields:
+        bytes: Consecutive chunks of the CoNLL-U file
+    """
+    lines = []
+    if doc_id:
+        lines.append(f"# newdoc id = {doc_id}")
+    sentence = []
+    sentence_id = 0
+    previous_end = None
+    buffered = 0
+
+    def flush_sentence():
+        nonlocal sentence_id
+        sentence_id += 1
+        first_start, last_end = sentence[0][0], sentence[-1][1]
+        lines.append(f"# sent_id = {sentence_id}")
+        lines.append(f"# text = {' '.join(text[first_start:last_end].split())}")
+        lines.extend(row for _, _, row in sentence)
+        lines.append("")
+        sentence.clear()
+
+    for index, start, end, form, lemma, source, is_stop in iter_token_records(text, analysis, lang_code):
+        if sentence and (len(sentence) >= MAX_SENTENCE_TOKENS or SENTENCE_BREAK.search(text, previous_end, start)):
+            flush_sentence()
+        previous_end = end
+
+        misc = f"TokenRange={start}:{end}|Norm={form}|LemmaSource={source}"
+        if is_stop:
+            misc += "|Stop=Yes"
+        row = f"{len(sentence) + 1}\t{text[start:end]}\t{lemma}\t_\t_\t_\t_\t_\t_\t{misc}"
+        sentence.append((start, end, row))
+
+        buffered += 1
+        if buffered >= chunk_tokens and lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines.clear()
+            buffered = len(sentence)
+
+    if sentence:
+        flush_sentence()
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def iter_jsonl_tokens(text, analysis, lang_code, chunk_tokens=CHUNK_TOKENS):
+    """
+    Stream the token sequence as JSON Lines (one token per line)
+
+    Args:
+        text: Analyzed text
+        analysis: Analysis result of the same text
+        lang_code: Language code of the analysis
+        chunk_tokens: Tokens per yielded chunk
+
+    Yields:
+        bytes: Consecutive chunks of the JSONL file
+    """
+    lines = []
+    for index, start, end, form, lemma, source, is_stop in iter_token_records(text, analysis, lang_code):
+        lines.append(json.dumps({
+            'i': index,
+            'form': text[start:end],
+            'norm': form,
+            'lemma': lemma,
+            'start': start,
+            'end': end,
+            'source': source,
+            'stop': is_stop
+        }, ensure_ascii=False))
+        if len(lines) >= chunk_tokens:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines.clear()
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def iter_token_export(text, analysis, lang_code, export_format, doc_id=None):
+    """
+    Stream the token sequence in the requested format
+
+    Args:
+        text: Analyzed text
+        analysis: Analysis result of the same text
+        lang_code: Language code of the analysis
+        export_format: Key from TOKEN_EXPORT_FORMATS
+        doc_id: Optional document name (CoNLL-U only)
+
+    Returns:
+        iterator: Byte chunks of the exported file
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if export_format == 'conllu':
+        return iter_conllu_export(text, analysis, lang_code, doc_id)
+    if export_format == 'jsonl':
+        return iter_jsonl_tokens(text, analysis, lang_code)
+    raise ValueError(f"Unsupported token export format: {export_format}")
+
+
+def write_token_export(path, text, analysis, lang_code, export_format, doc_id=None):
+    """
+    Write the token export to a file chunk by chunk
+
+    Args:
+        path: Output file path
+        text: Analyzed text
+        analysis: Analysis result of the same text
+        lang_code: Language code of the analysis
+        export_format: Key from TOKEN_EXPORT_FORMATS
+        doc_id: Optional document name (CoNLL-U only)
+
+    Returns:
+        int: Number of bytes written
+    """
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in iter_token_export(text, analysis, lang_code, export_format, doc_id):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def render_token_export_ui(text, analysis, lang_code, safe_filename):
+    """
+    Render export options and download button for the token sequence
+
+    Args:
+        text: Analyzed text (None if not kept, e.g. background jobs)
+        analysis: Analysis result of the text
+        lang_code: Language code of the analysis
+        safe_filename: Base name for the downloaded file
+    """
+    with st.expander(f"🧾 Экспорт токенов с леммами ({analysis['total_words']:,} словоупотреблений)", expanded=False):
+        if text is None:
+            st.info("ℹ️ Экспорт токенов доступен только для текста, проанализированного целиком")
+            return
+
+        export_format = st.selectbox(
+            "Формат:",
+            options=list(TOKEN_EXPORT_FORMATS),
+            format_func=lambda fmt: TOKEN_EXPORT_FORMATS[fmt][0],
+            key="token_export_format",
+            help="Словоформа, лемма, позиция в тексте и источник леммы для каждого слова"
+        )
+
+        # Serialize only on request, not on every rerun
+        if st.button("⚙️ Подготовить файл", key="token_export_prepare"):
+            name, mime, extension = TOKEN_EXPORT_FORMATS[export_format]
+            # Chunks go to a temporary file instead of being joined in
+            # memory; the download button reads it once
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = os.path.join(temp_dir, f"tokens.{extension}")
+                write_token_export(path, text, analysis, lang_code, export_format, safe_filename)
+                with open(path, 'rb') as f:
+                    st.download_button(
+                        label=f"📥 Скачать токены ({name})",
+                        data=f,
+                        file_name=f"tokens_{safe_filename}.{extension}",
+                        mime=mime,
+                        key="token_export_download"
+                    )
@@ -0,0 +1,317 @@
+"""
+Text Analyzer - Watch Folder
+Long-running mode that polls a directory and keeps a corpus-level lemma
+frequency list up to date: only new or changed files are read and
+lemmatized, removed files have their counts subtracted
+
+The state (per-file fingerprints, per-document lemma counts and the
+corpus aggregate) is persisted, so a restart continues where it stopped.
+The aggregate is a keyness reference list and can be published to
+data/reference/ for the app's keyword comparison.
+
+Usage:
+    python scripts/watch_folder.py incoming/ --language auto --interval 10
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from analysis_pipeline import count_chunk_lemmas
+from archive_input import archive_kind
+from external_counts import SpillingCounter, TopCounts, DEFAULT_MEMORY_BUDGET
+from keyness import write_reference_list, iter_reference_list
+from text_input_handler import iter_file_chunks
+from atomic_files import atomic_open, atomic_write_json
+
+
+STATE_FORMAT = "watch_state/1"
+STATE_ROOT = os.path.join(os.path.dirname(__file__), "..", "data", "watch")
+
+# Files modified less than this many seconds ago may still be being
+# copied and are picked up by a later poll
+SETTLE_SECONDS = 2.0
+
+DOCUMENT_EXTENSIONS = ('txt', 'pdf', 'docx')
+
+
+def is_supported_file(name):
+    """True for .txt/.pdf/.docx files and archives (by name)"""
+    return name.split('.')[-1].lower() in DOCUMENT_EXTENSIONS or archive_kind(name) is not None
+
+
+class WatchFolder:
+    """
+    Incrementally maintained lemma frequencies of a directory
+
+    Files are fingerprinted by modification time and size; only when
+    those change is the file read and hashed, and only when the SHA-256
+    changes is it lemmatized. Each document's counts are stored as
+    docs/<sha256>.npz in the state directory, so a changed or removed
+    file is subtracted from the aggregate without re-reading the old
+    version.
+
+    State files are written with atomic renames in this order: new
+    document counts, aggregate.npz, state.json; unreferenced document
+    files are deleted last. aggregate.npz carries the generation of the
+    state it belongs to and is rebuilt from the document counts if a
+    crash left it out of step.
+
+    Lemma counts never have to fit in memory: the aggregate and each
+    document being counted are SpillingCounters that move to disk beyond
+    memory_budget, documents are read chunk by chunk, and stored lists
+    are read back in batches. Call close() to delete the spilled runs.
+    """
+
+    def __init__(self, directory, state_dir, lang_code, settle_seconds=SETTLE_SECONDS,
+                 memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Initialize watcher and load its persisted state
+
+        Args:
+            directory: Directory to watch (scanned recursively)
+            state_dir: Directory for state.json, aggregate.npz and docs/
+            lang_code: Language code ('ru', 'be' or 'auto')
+            settle_seconds: Minimum age of a file modification
+            memory_budget: Estimated bytes the in-memory lemma counts of
+                           the aggregate (and of a document) may use
+        """
+        self.directory = directory
+        self.state_dir = state_dir
+        self.docs_dir = os.path.join(state_dir, "docs")
+        self.lang_code = lang_code
+        self.settle_seconds = settle_seconds
+        self.memory_budget = memory_budget
+        os.makedirs(self.docs_dir, exist_ok=True)
+
+        self.generation = 0
+        self.files = {}
+        self.num_lemmas = 0
+        self.aggregate = SpillingCounter(memory_budget)
+        self._form_cache = {}
+        self._load()
+
+    def close(self):
+        """Delete the aggregate's spilled runs"""
+        self.aggregate.close()
+
+    @property
+    def state_path(self):
+        return os.path.join(self.state_dir, "state.json")
+
+    @property
+    def aggregate_path(self):
+        return os.path.join(self.state_dir, "aggregate.npz")
+
+    def _doc_path(self, sha256):
+        return os.path.join(self.docs_dir, f"{sha256}.npz")
+
+    def _load(self):
+        """Read state.json and the aggregate (rebuilt if out of step)"""
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('format') != STATE_FORMAT or state.get('language') != self.lang_code:
+            print(f"⚠️ State in {self.state_dir} belongs to another format or language, starting over")
+            return
+
+        self.generation = state['generation']
+        self.files = state['files']
+        try:
+            meta = self._aggregate_meta()
+            if meta.get('generation') == self.generation:
+                self.aggregate.update(iter_reference_list(self.aggregate_path))
+                self.num_lemmas = meta['lemmas']
+                return
+        except (OSError, ValueError, KeyError):
+            self.aggregate.close()
+            self.aggregate = SpillingCounter(self.memory_budget)
+        print("🔄 Rebuilding corpus aggregate from document counts...")
+        for entry in self.files.values():
+            if entry.get('sha256'):
+                self.aggregate.update(self._document_counts(entry['sha256']))
+        self.num_lemmas = sum(1 for _ in self.aggregate.items())
+
+    def _aggregate_meta(self):
+        """Metadata recorded in aggregate.npz"""
+        with np.load(self.aggregate_path, allow_pickle=False) as data:
+            return json.loads(str(data['meta']))
+
+    def _document_counts(self, sha256):
+        """(lemma, count) pairs of a stored document, read in batches"""
+        return iter_reference_list(self._doc_path(sha256))
+
+    def scan(self):
+        """
+        List the supported files of the watched directory
+
+        Returns:
+            dict: relative path -> (absolute path, mtime_ns, size)
+        """
+        found = {}
+        for root, dirs, names in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in names:
+                if name.startswith('.') or not is_supported_file(name):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # removed while scanning
+                found[os.path.relpath(path, self.directory)] = (path, stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def poll(self):
+        """
+        Bring the aggregate up to date with the directory
+
+        Returns:
+            dict: Lists of relative paths ('added', 'changed', 'removed',
+                  'failed') and per-file analysis times ('seconds')
+        """
+        changes = {'added': [], 'changed': [], 'removed': [], 'failed': [], 'seconds': {}}
+        found = self.scan()
+        now_ns = time.time_ns()
+        updated = False
+
+        for rel in [rel for rel in self.files if rel not in found]:
+            self._subtract(self.files.pop(rel))
+            changes['removed'].append(rel)
+            updated = True
+
+        for rel, (path, mtime_ns, size) in sorted(found.items()):
+            entry = self.files.get(rel)
+            if entry is not None and entry['mtime_ns'] == mtime_ns and entry['size'] == size:
+                continue
+            if now_ns - mtime_ns < self.settle_seconds * 1e9:
+                continue  # still being written
+
+            started = time.perf_counter()
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue  # removed since the scan; handled by the next poll
+            sha256 = hashlib.sha256(data).hexdigest()
+            updated = True
+            if entry is not None and entry.get('sha256') == sha256:
+                entry.update(mtime_ns=mtime_ns, size=size)  # touched, same content
+                continue
+
+            new_entry = {'mtime_ns': mtime_ns, 'size': size, 'sha256': None, 'tokens': 0}
+            try:
+                tokens = self._save_document(sha256, data, os.path.basename(path))
+                new_entry.update(sha256=sha256, tokens=tokens)
+            except Exception as e:
+                # Damaged file: remembered with its fingerprint, retried once it changes
+                new_entry['error'] = str(e)
+                changes['failed'].append(rel)
+
+            if entry is not None:
+                self._subtract(entry)
+            if new_entry['sha256']:
+                self.aggregate.update(self._document_counts(sha256))
+            self.files[rel] = new_entry
+            changes['changed' if entry is not None else 'added'].append(rel)
+            changes['seconds'][rel] = time.perf_counter() - started
+
+        if updated:
+            self.save()
+        return changes
+
+    def _subtract(self, entry):
+        """Remove a document's counts from the aggregate (lemmas whose total reaches zero are dropped)"""
+        if not entry.get('sha256'):
+            return
+        for lemma, count in self._document_counts(entry['sha256']):
+            self.aggregate.add(lemma, -count)
+
+    def _save_document(self, sha256, data, filename):
+        """
+        Count a document's lemmas and store them as docs/<sha256>.npz
+
+        The text is lemmatized chunk by chunk into a budgeted counter;
+        nothing is counted if the file is already stored.
+
+        Args:
+            sha256: Content hash of the file
+            data: Raw file bytes
+            filename: File name (extension selects the reader)
+
+        Returns:
+            int: Number of tokens in the document
+        """
+        if os.path.exists(self._doc_path(sha256)):
+            with np.load(self._doc_path(sha256), allow_pickle=False) as stored:
+                return json.loads(str(stored['meta']))['tokens']
+        with SpillingCounter(self.memory_budget) as counts:
+            count_chunk_lemmas(
+                (chunk for chunk, _ in iter_file_chunks(data, filename)), self.lang_code, counts, self._form_cache
+            )
+            with atomic_open(self._doc_path(sha256)) as f:
+                _, tokens = write_reference_list(f, counts.items(), sha256, language=self.lang_code)
+        return tokens
+
+    @property
+    def tokens(self):
+        """Total number of tokens of all current documents"""
+        return self.aggregate.total
+
+    def write_aggregate(self, file, name, **meta):
+        """
+        Write the corpus aggregate as a keyness reference list
+
+        The lemma counts stream from the aggregate into the file, so the
+        list is never held in memory as a whole.
+
+        Args:
+            file: Seekable binary file (e.g. from atomic_files.atomic_open)
+            name: Display name
+            **meta: Extra metadata (e.g. language, source files)
+
+        Returns:
+            tuple: (lemmas, tokens) - number of lemmas and total count
+        """
+        return write_reference_list(file, self.aggregate.items(), name, **meta)
+
+    def save(self):
+        """Persist the aggregate and the file state, then drop unused document counts"""
+        self.generation += 1
+        with atomic_open(self.aggregate_path) as f:
+            self.num_lemmas, _ = self.write_aggregate(
+                f, os.path.basename(os.path.normpath(self.directory)),
+                language=self.lang_code, generation=self.generation, documents=len(self.files)
+            )
+        atomic_write_json(self.state_path, {
+            'format': STATE_FORMAT,
+            'language': self.lang_code,
+            'generation': self.generation,
+            'files': self.files
+        })
+
+        referenced = {entry['sha256'] for entry in self.files.values() if entry.get('sha256')}
+        for name in os.listdir(self.docs_dir):
+            if name.endswith('.npz') and name[:-4] not in referenced:
+                os.unlink(os.path.join(self.docs_dir, name))
+
+    def top(self, n, stop_words=frozenset()):
+        """
+        Most frequent lemmas of the corpus
+
+        Args:
+            n: Number of lemmas
+            stop_words: Lemmas to leave out
+
+        Returns:
+            list: (lemma, count) pairs, most frequent first
+        """
+        top = TopCounts(n)
+        for lemma, count in self.aggregate.items():
+            if lemma not in stop_words:
+                top.add(lemma, count)
+        return top.result()